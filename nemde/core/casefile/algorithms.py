@@ -36,6 +36,27 @@ def get_parsed_interconnector_loss_model_segments(data, interconnector_id) -> li
     segments = get_interconnector_loss_model_segments(
         data=data, interconnector_id=interconnector_id)
 
+    return parse_loss_model_segments(loss_lower_limit=loss_lower_limit, segments=segments)
+
+
+def parse_loss_model_segments(loss_lower_limit, segments) -> list:
+    """
+    Construct start-end-factor representation of loss model segments
+
+    Parameters
+    ----------
+    loss_lower_limit : float
+        Interconnector loss lower limit
+
+    segments : list
+        Loss model segments with '@Limit' and '@Factor' attributes
+
+    Returns
+    -------
+    new_segments : list
+        Loss model segments in a start-end-factor representation
+    """
+
     # First segment set equal to loss lower limit
     start = -loss_lower_limit
 
@@ -74,6 +95,28 @@ def get_interconnector_loss_estimate(data, interconnector_id, flow) -> float:
     segments = get_parsed_interconnector_loss_model_segments(
         data=data, interconnector_id=interconnector_id)
 
+    return get_loss_estimate(segments=segments, flow=flow)
+
+
+def get_loss_estimate(segments, flow) -> float:
+    """
+    Estimate loss by numerically integrating parsed loss model segments
+
+    Parameters
+    ----------
+    segments : list
+        Loss model segments in a start-end-factor representation. See
+        parse_loss_model_segments.
+
+    flow : float
+        Flow over interconnector (MW)
+
+    Returns
+    -------
+    total_area : float
+        Total area under MLF curve corresponds to total loss (MW)
+    """
+
     # Initialise total area
     total_area = 0
     for s in segments:
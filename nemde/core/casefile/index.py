@@ -0,0 +1,262 @@
+"""
+Index casefile collections by ID. Each collection is traversed once, the first
+time it is accessed, so repeated lookups read from dictionaries rather than
+walking the casefile from its root.
+"""
+
+from functools import cached_property
+
+import numpy as np
+
+from nemde.core.casefile.utils import convert_to_list
+
+
+def index_first(items) -> dict:
+    """
+    Build dictionary from (key, value) pairs. The first value is kept if a key
+    is repeated, so indexed lookups return the same element as a scan of the
+    collection.
+    """
+
+    index = {}
+    for key, value in items:
+        index.setdefault(key, value)
+
+    return index
+
+
+class CasefileIndex:
+    """
+    Casefile collections keyed by TraderID, InterconnectorID, RegionID and
+    ConstraintID. Dictionaries preserve the order in which elements appear in
+    the casefile, and keep the first element if an ID is repeated. Price and
+    quantity bands are converted to floats when the index is built.
+
+    Parameters
+    ----------
+    data : dict
+        NEMDE casefile
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    @cached_property
+    def inputs(self) -> dict:
+        return self.data['NEMSPDCaseFile']['NemSpdInputs']
+
+    @cached_property
+    def outputs(self) -> dict:
+        return self.data['NEMSPDCaseFile']['NemSpdOutputs']
+
+    @cached_property
+    def period(self) -> dict:
+        return self.inputs['PeriodCollection']['Period']
+
+    @cached_property
+    def case(self) -> dict:
+        return self.inputs['Case']
+
+    # Regions
+    @cached_property
+    def regions(self) -> dict:
+        return index_first((i['@RegionID'], i) for i in self.inputs['RegionCollection']['Region'])
+
+    @cached_property
+    def region_initial_conditions(self) -> dict:
+        return {k: index_first((j['@InitialConditionID'], j['@Value'])
+                               for j in convert_to_list(v['RegionInitialConditionCollection']['RegionInitialCondition']))
+                for k, v in self.regions.items()}
+
+    @cached_property
+    def region_periods(self) -> dict:
+        return index_first((i['@RegionID'], i) for i in self.period['RegionPeriodCollection']['RegionPeriod'])
+
+    # Traders
+    @cached_property
+    def traders(self) -> dict:
+        return index_first((i['@TraderID'], i) for i in self.inputs['TraderCollection']['Trader'])
+
+    @cached_property
+    def trader_initial_conditions(self) -> dict:
+        return {k: index_first((j['@InitialConditionID'], j['@Value'])
+                               for j in convert_to_list(v['TraderInitialConditionCollection']['TraderInitialCondition']))
+                for k, v in self.traders.items()}
+
+    @cached_property
+    def trader_price_structures(self) -> dict:
+        """Price structures keyed by (TraderID, TradeType)"""
+
+        return index_first(((k, j['@TradeType']), j) for k, v in self.traders.items()
+                           for j in convert_to_list(v['TradePriceStructureCollection']['TradePriceStructure']
+                                                    ['TradeTypePriceStructureCollection']['TradeTypePriceStructure']))
+
+    @cached_property
+    def trader_periods(self) -> dict:
+        return index_first((i['@TraderID'], i) for i in self.period['TraderPeriodCollection']['TraderPeriod'])
+
+    @cached_property
+    def trader_trades(self) -> dict:
+        """Trader offers keyed by (TraderID, TradeType)"""
+
+        return index_first(((k, j['@TradeType']), j) for k, v in self.trader_periods.items()
+                           for j in convert_to_list(v['TradeCollection']['Trade']))
+
+    @cached_property
+    def trader_offers(self) -> dict:
+        """
+        Trader offers as a columnar table with one row per (TraderID,
+        TradeType) offer, in the same order as trader_trades. 'trader_id',
+        'trade_type' and 'region_id' are parallel arrays, and 'price_bands' and
+        'quantity_bands' have shape (offers, 10). Price bands are NaN if the
+        offer has no price structure, and RegionID is an empty string if the
+        trader period does not define one.
+        """
+
+        keys = list(self.trader_trades.keys())
+        price_structures = self.trader_price_structures
+
+        prices = [[price_structures[k][f'@PriceBand{b}'] for b in range(1, 11)] if k in price_structures
+                  else [np.nan] * 10 for k in keys]
+        quantities = [[v[f'@BandAvail{b}'] for b in range(1, 11)] for v in self.trader_trades.values()]
+
+        return {
+            'index': keys,
+            'trader_id': np.array([i[0] for i in keys], dtype=str),
+            'trade_type': np.array([i[1] for i in keys], dtype=str),
+            'region_id': np.array([self.trader_periods[i[0]].get('@RegionID', '') for i in keys], dtype=str),
+            'price_bands': np.array(prices, dtype=float).reshape(-1, 10),
+            'quantity_bands': np.array(quantities, dtype=float).reshape(-1, 10),
+        }
+
+    @cached_property
+    def trader_quantity_bands(self) -> dict:
+        """Quantity bands keyed by (TraderID, TradeType, band)"""
+
+        offers = self.trader_offers
+        keys = [(*k, b) for k in offers['index'] for b in range(1, 11)]
+
+        return dict(zip(keys, offers['quantity_bands'].ravel().tolist()))
+
+    # Interconnectors
+    @cached_property
+    def interconnectors(self) -> dict:
+        return index_first((i['@InterconnectorID'], i) for i in self.inputs['InterconnectorCollection']['Interconnector'])
+
+    @cached_property
+    def interconnector_initial_conditions(self) -> dict:
+        return {k: index_first((j['@InitialConditionID'], j['@Value'])
+                               for j in convert_to_list(v['InterconnectorInitialConditionCollection']
+                                                        ['InterconnectorInitialCondition']))
+                for k, v in self.interconnectors.items()}
+
+    @cached_property
+    def interconnector_loss_models(self) -> dict:
+        return {k: v['LossModelCollection']['LossModel'] for k, v in self.interconnectors.items()}
+
+    @cached_property
+    def interconnector_loss_model_segments(self) -> dict:
+        """Loss model segments with '@Limit' converted to int and other attributes converted to float"""
+
+        return {k: [{a: int(b) if a == '@Limit' else float(b) for a, b in s.items()}
+                    for s in v['SegmentCollection']['Segment']]
+                for k, v in self.interconnector_loss_models.items()}
+
+    @cached_property
+    def interconnector_periods(self) -> dict:
+        return index_first((i['@InterconnectorID'], i)
+                           for i in self.period['InterconnectorPeriodCollection']['InterconnectorPeriod'])
+
+    @cached_property
+    def mnsp_offers(self) -> dict:
+        """MNSP offers keyed by (InterconnectorID, RegionID)"""
+
+        return index_first(((k, j['@RegionID']), j) for k, v in self.interconnector_periods.items()
+                           if v.get('MNSPOfferCollection') is not None
+                           for j in convert_to_list(v['MNSPOfferCollection']['MNSPOffer']))
+
+    @cached_property
+    def mnsp_price_structures(self) -> dict:
+        """MNSP price structures keyed by (InterconnectorID, RegionID)"""
+
+        return index_first(((k, j['@RegionID']), j) for k, v in self.interconnectors.items()
+                           if v.get('MNSPPriceStructureCollection') is not None
+                           for j in convert_to_list(v['MNSPPriceStructureCollection']['MNSPPriceStructure']
+                                                    ['MNSPRegionPriceStructureCollection']['MNSPRegionPriceStructure']))
+
+    # Generic constraints
+    @cached_property
+    def generic_constraints(self) -> dict:
+        return index_first((i['@ConstraintID'], i) for i in self.inputs['GenericConstraintCollection']['GenericConstraint'])
+
+    @cached_property
+    def generic_constraint_periods(self) -> dict:
+        return index_first((i['@ConstraintID'], i)
+                           for i in self.period['GenericConstraintPeriodCollection']['GenericConstraintPeriod'])
+
+    @cached_property
+    def constraint_solutions(self) -> dict:
+        """Constraint solutions keyed by (ConstraintID, Intervention)"""
+
+        return index_first(((i['@ConstraintID'], i['@Intervention']), i)
+                           for i in convert_to_list(self.outputs['ConstraintSolution']))
+
+    # Solutions
+    @cached_property
+    def region_solutions(self) -> dict:
+        """Region solutions keyed by (RegionID, Intervention)"""
+
+        return index_first(((i['@RegionID'], i['@Intervention']), i)
+                           for i in convert_to_list(self.outputs['RegionSolution']))
+
+    @cached_property
+    def trader_solutions(self) -> dict:
+        """Trader solutions keyed by (TraderID, Intervention)"""
+
+        return index_first(((i['@TraderID'], i['@Intervention']), i)
+                           for i in convert_to_list(self.outputs['TraderSolution']))
+
+    @cached_property
+    def interconnector_solutions(self) -> dict:
+        """Interconnector solutions keyed by (InterconnectorID, Intervention)"""
+
+        return index_first(((i['@InterconnectorID'], i['@Intervention']), i)
+                           for i in convert_to_list(self.outputs['InterconnectorSolution']))
+
+    @cached_property
+    def period_solutions(self) -> dict:
+        """Period solutions keyed by Intervention"""
+
+        return index_first((i['@Intervention'], i) for i in convert_to_list(self.outputs['PeriodSolution']))
+
+
+class IndexedCasefile(dict):
+    """
+    NEMDE casefile with a CasefileIndex attached. Behaves as the casefile
+    dictionary, so it can be passed to any function expecting a casefile.
+    Functions in nemde.core.casefile.lookup use the index when passed an
+    IndexedCasefile, replacing a scan of the collection with a dictionary
+    lookup. Indexes are built the first time each collection is accessed, so
+    the casefile should not be modified once lookups have been made.
+
+    Parameters
+    ----------
+    data : dict
+        NEMDE casefile
+    """
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.index = data.index if isinstance(data, IndexedCasefile) else CasefileIndex(data)
+
+
+def get_casefile_index(data) -> CasefileIndex:
+    """Index casefile - returns input if already indexed"""
+
+    if isinstance(data, CasefileIndex):
+        return data
+
+    if isinstance(data, IndexedCasefile):
+        return data.index
+
+    return CasefileIndex(data)
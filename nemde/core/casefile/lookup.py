@@ -1,15 +1,151 @@
 """
-Lookup attribute values in casefile dictionary
+Lookup attribute values in casefile dictionary. Collections are scanned for
+each lookup unless the casefile is wrapped in an IndexedCasefile, in which
+case lookups read from indexes that are built once per casefile.
 """
 
 from nemde.errors import CasefileLookupError, CasefileRunModeError
 from nemde.core.casefile.utils import convert_to_list
+from nemde.core.casefile.index import IndexedCasefile
+
+
+def get_indexed(collection, key) -> list:
+    """Get element matching key in indexed collection - empty list if key not found"""
+
+    return [collection[key]] if key in collection else []
+
+
+def get_regions(data, region_id) -> list:
+    """Get regions to search - only the matching element if casefile is indexed"""
+
+    if isinstance(data, IndexedCasefile):
+        return get_indexed(data.index.regions, region_id)
+
+    return (data.get('NEMSPDCaseFile').get('NemSpdInputs')
+            .get('RegionCollection').get('Region'))
+
+
+def get_region_periods(data, region_id) -> list:
+    """Get region periods to search - only the matching element if casefile is indexed"""
+
+    if isinstance(data, IndexedCasefile):
+        return get_indexed(data.index.region_periods, region_id)
+
+    return (data.get('NEMSPDCaseFile').get('NemSpdInputs')
+            .get('PeriodCollection').get('Period')
+            .get('RegionPeriodCollection').get('RegionPeriod'))
+
+
+def get_region_solutions(data, region_id, intervention) -> list:
+    """Get region solutions to search - only the matching element if casefile is indexed"""
+
+    if isinstance(data, IndexedCasefile):
+        return get_indexed(data.index.region_solutions, (region_id, intervention))
+
+    return data.get('NEMSPDCaseFile').get('NemSpdOutputs').get('RegionSolution')
+
+
+def get_traders(data, trader_id) -> list:
+    """Get traders to search - only the matching element if casefile is indexed"""
+
+    if isinstance(data, IndexedCasefile):
+        return get_indexed(data.index.traders, trader_id)
+
+    return (data.get('NEMSPDCaseFile').get('NemSpdInputs')
+            .get('TraderCollection').get('Trader'))
+
+
+def get_trader_periods(data, trader_id) -> list:
+    """Get trader periods to search - only the matching element if casefile is indexed"""
+
+    if isinstance(data, IndexedCasefile):
+        return get_indexed(data.index.trader_periods, trader_id)
+
+    return (data.get('NEMSPDCaseFile').get('NemSpdInputs')
+            .get('PeriodCollection').get('Period')
+            .get('TraderPeriodCollection').get('TraderPeriod'))
+
+
+def get_trader_solutions(data, trader_id, intervention) -> list:
+    """Get trader solutions to search - only the matching element if casefile is indexed"""
+
+    if isinstance(data, IndexedCasefile):
+        return get_indexed(data.index.trader_solutions, (trader_id, intervention))
+
+    return (data.get('NEMSPDCaseFile').get('NemSpdOutputs')
+            .get('TraderSolution'))
+
+
+def get_interconnectors(data, interconnector_id) -> list:
+    """Get interconnectors to search - only the matching element if casefile is indexed"""
+
+    if isinstance(data, IndexedCasefile):
+        return get_indexed(data.index.interconnectors, interconnector_id)
+
+    return (data.get('NEMSPDCaseFile').get('NemSpdInputs')
+            .get('InterconnectorCollection').get('Interconnector'))
+
+
+def get_interconnector_periods(data, interconnector_id) -> list:
+    """Get interconnector periods to search - only the matching element if casefile is indexed"""
+
+    if isinstance(data, IndexedCasefile):
+        return get_indexed(data.index.interconnector_periods, interconnector_id)
+
+    return (data.get('NEMSPDCaseFile').get('NemSpdInputs')
+            .get('PeriodCollection').get('Period')
+            .get('InterconnectorPeriodCollection')
+            .get('InterconnectorPeriod'))
+
+
+def get_interconnector_solutions(data, interconnector_id, intervention) -> list:
+    """Get interconnector solutions to search - only the matching element if casefile is indexed"""
+
+    if isinstance(data, IndexedCasefile):
+        return get_indexed(data.index.interconnector_solutions, (interconnector_id, intervention))
+
+    return (data.get('NEMSPDCaseFile').get('NemSpdOutputs')
+            .get('InterconnectorSolution'))
+
+
+def get_generic_constraints(data, constraint_id) -> list:
+    """Get generic constraints to search - only the matching element if casefile is indexed"""
+
+    if isinstance(data, IndexedCasefile):
+        return get_indexed(data.index.generic_constraints, constraint_id)
+
+    return (data.get('NEMSPDCaseFile').get('NemSpdInputs')
+            .get('GenericConstraintCollection')
+            .get('GenericConstraint'))
+
+
+def get_generic_constraint_solutions(data, constraint_id, intervention) -> list:
+    """Get generic constraint solutions to search - only the matching element if casefile is indexed"""
+
+    if isinstance(data, IndexedCasefile):
+        return get_indexed(data.index.constraint_solutions, (constraint_id, intervention))
+
+    return (data.get('NEMSPDCaseFile').get('NemSpdOutputs')
+            .get('ConstraintSolution'))
+
+
+def get_period_solutions(data, intervention) -> list:
+    """Get period solutions to search - only the matching element if casefile is indexed"""
+
+    if isinstance(data, IndexedCasefile):
+        return get_indexed(data.index.period_solutions, intervention)
+
+    return (data.get('NEMSPDCaseFile').get('NemSpdOutputs')
+            .get('PeriodSolution'))
 
 
 def get_case_attribute(data, attribute, func):
     """Get case attribute"""
 
     try:
+        if isinstance(data, IndexedCasefile):
+            return func(data.index.case[attribute])
+
         return func(data['NEMSPDCaseFile']['NemSpdInputs']['Case'][attribute])
     except CasefileLookupError as e:
         return e
@@ -24,8 +160,7 @@ def get_case_solution(data):
 def get_region_collection_attribute(data, region_id, attribute, func):
     """Get region collection attribute"""
 
-    regions = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-               .get('RegionCollection').get('Region'))
+    regions = get_regions(data, region_id)
 
     for i in regions:
         if i['@RegionID'] == region_id:
@@ -37,8 +172,7 @@ def get_region_collection_attribute(data, region_id, attribute, func):
 def get_region_collection_initial_condition_attribute(data, region_id, attribute, func):
     """Get region initial condition attribute"""
 
-    regions = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-               .get('RegionCollection').get('Region'))
+    regions = get_regions(data, region_id)
 
     for i in regions:
         if i['@RegionID'] == region_id:
@@ -55,9 +189,7 @@ def get_region_collection_initial_condition_attribute(data, region_id, attribute
 def get_region_period_collection_attribute(data, region_id, attribute, func):
     """Get region period collection attribute"""
 
-    regions = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-               .get('PeriodCollection').get('Period')
-               .get('RegionPeriodCollection').get('RegionPeriod'))
+    regions = get_region_periods(data, region_id)
 
     for i in regions:
         if i['@RegionID'] == region_id:
@@ -69,7 +201,7 @@ def get_region_period_collection_attribute(data, region_id, attribute, func):
 def get_region_solution(data, region_id, intervention):
     """Extract region solution"""
 
-    regions = data.get('NEMSPDCaseFile').get('NemSpdOutputs').get('RegionSolution')
+    regions = get_region_solutions(data, region_id, intervention)
 
     for i in regions:
         if (i['@RegionID'] == region_id) and (i['@Intervention'] == intervention):
@@ -82,7 +214,7 @@ def get_region_solution(data, region_id, intervention):
 def get_region_solution_attribute(data, region_id, attribute, func, intervention):
     """Extract region solution attribute"""
 
-    regions = data.get('NEMSPDCaseFile').get('NemSpdOutputs').get('RegionSolution')
+    regions = get_region_solutions(data, region_id, intervention)
 
     for i in regions:
         if (i['@RegionID'] == region_id) and (i['@Intervention'] == intervention):
@@ -95,8 +227,7 @@ def get_region_solution_attribute(data, region_id, attribute, func, intervention
 def get_trader_collection_attribute(data, trader_id, attribute, func):
     """Get trader collection attribute"""
 
-    traders = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-               .get('TraderCollection').get('Trader'))
+    traders = get_traders(data, trader_id)
 
     for i in traders:
         if i['@TraderID'] == trader_id:
@@ -108,8 +239,7 @@ def get_trader_collection_attribute(data, trader_id, attribute, func):
 def get_trader_collection_initial_condition_attribute(data, trader_id, attribute, func):
     """Get trader initial condition attribute"""
 
-    traders = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-               .get('TraderCollection').get('Trader'))
+    traders = get_traders(data, trader_id)
 
     for i in traders:
         if i['@TraderID'] == trader_id:
@@ -125,9 +255,7 @@ def get_trader_collection_initial_condition_attribute(data, trader_id, attribute
 def get_trader_period_collection_attribute(data, trader_id, attribute, func):
     """Get trader period collection attribute"""
 
-    traders = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-               .get('PeriodCollection').get('Period')
-               .get('TraderPeriodCollection').get('TraderPeriod'))
+    traders = get_trader_periods(data, trader_id)
 
     for i in traders:
         if i['@TraderID'] == trader_id:
@@ -139,9 +267,7 @@ def get_trader_period_collection_attribute(data, trader_id, attribute, func):
 def get_trader_quantity_band_attribute(data, trader_id, trade_type, attribute, func):
     """Get trader quantity band attribute"""
 
-    traders = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-               .get('PeriodCollection').get('Period')
-               .get('TraderPeriodCollection').get('TraderPeriod'))
+    traders = get_trader_periods(data, trader_id)
 
     for i in traders:
         if i['@TraderID'] == trader_id:
@@ -156,8 +282,7 @@ def get_trader_quantity_band_attribute(data, trader_id, trade_type, attribute, f
 def get_trader_price_band_attribute(data, trader_id, trade_type, attribute, func):
     """Get trader price band attribute"""
 
-    traders = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-               .get('TraderCollection').get('Trader'))
+    traders = get_traders(data, trader_id)
 
     for i in traders:
         if i['@TraderID'] == trader_id:
@@ -177,8 +302,7 @@ def get_trader_price_band_attribute(data, trader_id, trade_type, attribute, func
 def get_trader_solution(data, trader_id, intervention):
     """Get trader solution"""
 
-    traders = (data.get('NEMSPDCaseFile').get('NemSpdOutputs')
-               .get('TraderSolution'))
+    traders = get_trader_solutions(data, trader_id, intervention)
 
     for i in traders:
         trader_id_matches = i['@TraderID'] == trader_id
@@ -193,8 +317,7 @@ def get_trader_solution(data, trader_id, intervention):
 def get_trader_solution_attribute(data, trader_id, attribute, func, intervention):
     """Get trader solution attribute"""
 
-    traders = (data.get('NEMSPDCaseFile').get('NemSpdOutputs')
-               .get('TraderSolution'))
+    traders = get_trader_solutions(data, trader_id, intervention)
 
     for i in traders:
         trader_id_matches = i['@TraderID'] == trader_id
@@ -209,8 +332,7 @@ def get_trader_solution_attribute(data, trader_id, attribute, func, intervention
 def get_interconnector_collection_attribute(data, interconnector_id, attribute, func):
     """Get interconnector collection attribute"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('InterconnectorCollection').get('Interconnector'))
+    interconnectors = get_interconnectors(data, interconnector_id)
 
     for i in interconnectors:
         if i['@InterconnectorID'] == interconnector_id:
@@ -223,8 +345,7 @@ def get_interconnector_collection_attribute(data, interconnector_id, attribute,
 def get_interconnector_collection_initial_condition_attribute(data, interconnector_id, attribute, func):
     """Get interconnector initial condition attribute"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('InterconnectorCollection').get('Interconnector'))
+    interconnectors = get_interconnectors(data, interconnector_id)
 
     for i in interconnectors:
         if i['@InterconnectorID'] == interconnector_id:
@@ -242,10 +363,7 @@ def get_interconnector_collection_initial_condition_attribute(data, interconnect
 def get_interconnector_period_collection_attribute(data, interconnector_id, attribute, func):
     """Get interconnector period collection attribute"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('PeriodCollection').get('Period')
-                       .get('InterconnectorPeriodCollection')
-                       .get('InterconnectorPeriod'))
+    interconnectors = get_interconnector_periods(data, interconnector_id)
 
     for i in interconnectors:
         if i['@InterconnectorID'] == interconnector_id:
@@ -258,8 +376,7 @@ def get_interconnector_period_collection_attribute(data, interconnector_id, attr
 def get_interconnector_loss_model_attribute(data, interconnector_id, attribute, func):
     """Get interconnector loss model attribute"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('InterconnectorCollection').get('Interconnector'))
+    interconnectors = get_interconnectors(data, interconnector_id)
 
     for i in interconnectors:
         if i['@InterconnectorID'] == interconnector_id:
@@ -271,8 +388,7 @@ def get_interconnector_loss_model_attribute(data, interconnector_id, attribute,
 def get_interconnector_loss_model_segments(data, interconnector_id) -> list:
     """Get segments corresponding to interconnector loss model"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('InterconnectorCollection').get('Interconnector'))
+    interconnectors = get_interconnectors(data, interconnector_id)
 
     # Container for loss model segments
     output = []
@@ -293,8 +409,7 @@ def get_interconnector_loss_model_segments(data, interconnector_id) -> list:
 def get_interconnector_solution(data, interconnector_id, intervention):
     """Extract interconnector solution"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdOutputs')
-                       .get('InterconnectorSolution'))
+    interconnectors = get_interconnector_solutions(data, interconnector_id, intervention)
 
     for i in interconnectors:
         interconnector_id_matches = i['@InterconnectorID'] == interconnector_id
@@ -310,8 +425,7 @@ def get_interconnector_solution(data, interconnector_id, intervention):
 def get_interconnector_solution_attribute(data, interconnector_id, attribute, func, intervention):
     """Get interconnector solution attribute"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdOutputs')
-                       .get('InterconnectorSolution'))
+    interconnectors = get_interconnector_solutions(data, interconnector_id, intervention)
 
     for i in interconnectors:
         interconnector_id_matches = i['@InterconnectorID'] == interconnector_id
@@ -327,9 +441,7 @@ def get_interconnector_solution_attribute(data, interconnector_id, attribute, fu
 def get_generic_constraint_collection_attribute(data, constraint_id, attribute, func):
     """Get generic constraint collection attribute"""
 
-    constraints = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                   .get('GenericConstraintCollection')
-                   .get('GenericConstraint'))
+    constraints = get_generic_constraints(data, constraint_id)
 
     for i in constraints:
         if i['@ConstraintID'] == constraint_id:
@@ -359,8 +471,7 @@ def get_generic_constraint_trk_collection_attribute(data, constraint_id, attribu
 def get_generic_constraint_solution(data, constraint_id, intervention):
     """Get generic constraint solution attribute"""
 
-    constraints = (data.get('NEMSPDCaseFile').get('NemSpdOutputs')
-                   .get('ConstraintSolution'))
+    constraints = get_generic_constraint_solutions(data, constraint_id, intervention)
 
     for i in constraints:
         contraint_id_matches = i['@ConstraintID'] == constraint_id
@@ -376,8 +487,7 @@ def get_generic_constraint_solution(data, constraint_id, intervention):
 def get_generic_constraint_solution_attribute(data, constraint_id, attribute, func, intervention):
     """Get generic constraint solution attribute"""
 
-    constraints = (data.get('NEMSPDCaseFile').get('NemSpdOutputs')
-                   .get('ConstraintSolution'))
+    constraints = get_generic_constraint_solutions(data, constraint_id, intervention)
 
     for i in constraints:
         contraint_id_matches = i['@ConstraintID'] == constraint_id
@@ -393,8 +503,7 @@ def get_generic_constraint_solution_attribute(data, constraint_id, attribute, fu
 def get_period_solution(data, intervention):
     """Get period solution attribute"""
 
-    period_solution = (data.get('NEMSPDCaseFile').get('NemSpdOutputs')
-                       .get('PeriodSolution'))
+    period_solution = get_period_solutions(data, intervention)
 
     for i in convert_to_list(period_solution):
         if i['@Intervention'] == intervention:
@@ -406,8 +515,7 @@ def get_period_solution(data, intervention):
 def get_period_solution_attribute(data, attribute, func, intervention):
     """Get period solution attribute"""
 
-    period_solution = (data.get('NEMSPDCaseFile').get('NemSpdOutputs')
-                       .get('PeriodSolution'))
+    period_solution = get_period_solutions(data, intervention)
 
     for i in convert_to_list(period_solution):
         if i['@Intervention'] == intervention:
@@ -12,6 +12,13 @@ from nemde.core.model.constructor import construct_model
 from nemde.core.model.algorithms import solve_model
 
 
+# Casefile sections required to construct model - NemSpdOutputs only used for constraint RHS
+MODEL_INPUT_SECTIONS = {
+    'NEMSPDCaseFile.NemSpdInputs': None,
+    'NEMSPDCaseFile.NemSpdOutputs.ConstraintSolution': ('@ConstraintID', '@Intervention', '@RHS'),
+}
+
+
 def clean_user_input(user_data):
     """Parse user data and set defaults if option not specified"""
 
@@ -69,7 +76,7 @@ def clean_user_input(user_data):
     return cleaned
 
 
-def run_model(user_data):
+def run_model(user_data, base_case=None):
     """
     Run model with user options
 
@@ -78,6 +85,10 @@ def run_model(user_data):
     user_data : dict
         Dictionary containing user supplied information
 
+    base_case : dict or None
+        Casefile corresponding to 'case_id' that has already been loaded (e.g.
+        by CasefilePrefetcher). Loaded using load_base_case if None.
+
     Returns
     -------
     Model solution
@@ -101,7 +112,15 @@ def run_model(user_data):
 
     # Use base casefile and apply user patches
     else:
-        base_case = load_base_case(case_id=case_id)
+        # Full casefile only required if returning the casefile or comparing solutions
+        if (solution_format == 'standard') and not return_casefile:
+            sections = MODEL_INPUT_SECTIONS
+        else:
+            sections = None
+
+        if base_case is None:
+            base_case = load_base_case(case_id=case_id, sections=sections)
+
         case_data = patch_casefile(casefile=base_case, updates=patches)
 
     # Construct serialized casefile and model object
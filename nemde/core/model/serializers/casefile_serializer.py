@@ -1,10 +1,16 @@
 """
-Convert case data into format that can be used to construct model instance
+Convert case data into format that can be used to construct model instance.
+
+Getters accept either a casefile dictionary or a CasefileIndex. construct_case
+indexes the casefile once and passes the index to each getter, so collections
+are traversed once per case rather than once per getter.
 """
 
+import numpy as np
+
 from nemde.core.casefile.lookup import convert_to_list, get_intervention_status
-from nemde.core.casefile.algorithms import get_parsed_interconnector_loss_model_segments
-from nemde.core.casefile.algorithms import get_interconnector_loss_estimate
+from nemde.core.casefile.index import get_casefile_index
+from nemde.core.casefile.algorithms import parse_loss_model_segments, get_loss_estimate
 from nemde.core.model.utils import fcas
 
 
@@ -38,92 +44,56 @@ def find(path, data):
 def get_region_index(data) -> list:
     """Get NEM region index"""
 
-    return [i['@RegionID'] for i in (data.get('NEMSPDCaseFile')
-                                     .get('NemSpdInputs')
-                                     .get('RegionCollection')
-                                     .get('Region'))]
+    return list(get_casefile_index(data).regions.keys())
 
 
 def get_trader_index(data) -> list:
     """Get trader index"""
 
-    return [i['@TraderID'] for i in (data.get('NEMSPDCaseFile')
-                                     .get('NemSpdInputs')
-                                     .get('PeriodCollection')
-                                     .get('Period')
-                                     .get('TraderPeriodCollection')
-                                     .get('TraderPeriod'))]
+    return list(get_casefile_index(data).trader_periods.keys())
 
 
 def get_trader_semi_dispatch_index(data) -> list:
     """Get index of semi-dispatchable plant"""
 
-    return [i['@TraderID'] for i in data.get('NEMSPDCaseFile')
-            .get('NemSpdInputs')
-            .get('TraderCollection')
-            .get('Trader')
-            if i['@SemiDispatch'] == '1']
+    return [k for k, v in get_casefile_index(data).traders.items() if v['@SemiDispatch'] == '1']
 
 
 def get_trader_offer_index(data) -> list:
     """Get trader offer index"""
 
-    return [(i['@TraderID'], j['@TradeType'])
-            for i in (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                      .get('PeriodCollection').get('Period')
-                      .get('TraderPeriodCollection').get('TraderPeriod'))
-            for j in convert_to_list(i.get('TradeCollection').get('Trade'))]
+    return list(get_casefile_index(data).trader_trades.keys())
 
 
 def get_trader_fcas_offer_index(data) -> list:
     """Get trader FCAS offers"""
 
-    return [(i['@TraderID'], j['@TradeType'])
-            for i in (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                      .get('PeriodCollection').get('Period')
-                      .get('TraderPeriodCollection').get('TraderPeriod'))
-            for j in convert_to_list(i.get('TradeCollection').get('Trade'))
-            if j['@TradeType'] not in ['ENOF', 'LDOF']]
+    return [i for i in get_casefile_index(data).trader_trades.keys() if i[1] not in ['ENOF', 'LDOF']]
 
 
 def get_trader_energy_offer_index(data) -> list:
     """Get trader energy offers"""
 
-    return [(i['@TraderID'], j['@TradeType'])
-            for i in (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                      .get('PeriodCollection').get('Period')
-                      .get('TraderPeriodCollection').get('TraderPeriod'))
-            for j in convert_to_list(i.get('TradeCollection').get('Trade'))
-            if j['@TradeType'] in ['ENOF', 'LDOF']]
+    return [i for i in get_casefile_index(data).trader_trades.keys() if i[1] in ['ENOF', 'LDOF']]
 
 
 def get_trader_fast_start_index(data) -> list:
     """Get fast start units"""
 
-    traders = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-               .get('TraderCollection').get('Trader'))
-
     # Fast start unit IDs
-    return [i['@TraderID'] for i in traders if i.get('@FastStart') == '1']
+    return [k for k, v in get_casefile_index(data).traders.items() if v.get('@FastStart') == '1']
 
 
 def get_generic_constraint_index(data) -> list:
     """Get generic constraint index"""
 
-    return [i['@ConstraintID'] for i in (data.get('NEMSPDCaseFile')
-                                         .get('NemSpdInputs')
-                                         .get('PeriodCollection')
-                                         .get('Period')
-                                         .get('GenericConstraintPeriodCollection')
-                                         .get('GenericConstraintPeriod'))]
+    return list(get_casefile_index(data).generic_constraint_periods.keys())
 
 
 def get_generic_constraint_trader_variable_index(data) -> list:
     """Get all trader variables within generic constraints"""
 
-    constraints = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                   .get('GenericConstraintCollection')
-                   .get('GenericConstraint'))
+    constraints = get_casefile_index(data).generic_constraints.values()
 
     # Container for all trader variables
     trader_variables = []
@@ -144,9 +114,7 @@ def get_generic_constraint_trader_variable_index(data) -> list:
 def get_generic_constraint_interconnector_variable_index(data) -> list:
     """Get all interconnector variables within generic constraints"""
 
-    constraints = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                   .get('GenericConstraintCollection')
-                   .get('GenericConstraint'))
+    constraints = get_casefile_index(data).generic_constraints.values()
 
     # Container for all interconnector variables
     interconnector_variables = []
@@ -167,9 +135,7 @@ def get_generic_constraint_interconnector_variable_index(data) -> list:
 def get_generic_constraint_region_variable_index(data) -> list:
     """Get generic constraint region variable indices"""
 
-    constraints = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                   .get('GenericConstraintCollection')
-                   .get('GenericConstraint'))
+    constraints = get_casefile_index(data).generic_constraints.values()
 
     # Container for all region variables
     region_variables = []
@@ -190,224 +156,111 @@ def get_generic_constraint_region_variable_index(data) -> list:
 def get_mnsp_index(data) -> list:
     """Get MNSP index"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('PeriodCollection').get('Period')
-                       .get('InterconnectorPeriodCollection')
-                       .get('InterconnectorPeriod'))
-
     # Only retain MNSPs
-    return [i['@InterconnectorID'] for i in interconnectors if i['@MNSP'] == '1']
+    return [k for k, v in get_casefile_index(data).interconnector_periods.items() if v['@MNSP'] == '1']
 
 
 def get_mnsp_offer_index(data) -> list:
     """Get MNSP offer index"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('PeriodCollection').get('Period')
-                       .get('InterconnectorPeriodCollection')
-                       .get('InterconnectorPeriod'))
-
-    # Container for offer index
-    offer_index = []
-    for i in interconnectors:
-        # Non-MNSP interconnectors do not have an MNSPOfferCollection attribute
-        if i.get('MNSPOfferCollection') is None:
-            continue
-
-        # Extract InterconnectorID and RegionID for each offer entry
-        for j in i.get('MNSPOfferCollection').get('MNSPOffer'):
-            offer_index.append((i['@InterconnectorID'], j['@RegionID']))
-
-    return offer_index
+    # Non-MNSP interconnectors do not have an MNSPOfferCollection attribute so are not indexed
+    return list(get_casefile_index(data).mnsp_offers.keys())
 
 
 def get_interconnector_index(data) -> list:
     """Get interconnector index"""
 
-    return [i['@InterconnectorID'] for i in (data.get('NEMSPDCaseFile')
-                                             .get('NemSpdInputs')
-                                             .get('PeriodCollection')
-                                             .get('Period')
-                                             .get('InterconnectorPeriodCollection')
-                                             .get('InterconnectorPeriod'))]
+    return list(get_casefile_index(data).interconnector_periods.keys())
 
 
 def get_interconnector_loss_model_breakpoint_index(data) -> list:
     """Get interconnector loss model breakpoint index"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('InterconnectorCollection')
-                       .get('Interconnector'))
+    segments = get_casefile_index(data).interconnector_loss_model_segments
 
-    # Container for indices
-    values = []
-    for i in interconnectors:
-        # Loss model segments
-        segments = i.get('LossModelCollection').get(
-            'LossModel').get('SegmentCollection').get('Segment')
-        for j in range(len(segments) + 1):
-            # Append index to container
-            values.append((i['@InterconnectorID'], j))
-
-    return values
+    return [(k, j) for k, v in segments.items() for j in range(len(v) + 1)]
 
 
 def get_interconnector_loss_model_interval_index(data) -> list:
     """Get interconnector loss model interval index"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('InterconnectorCollection')
-                       .get('Interconnector'))
+    segments = get_casefile_index(data).interconnector_loss_model_segments
 
-    # Container for indices
-    values = []
-    for i in interconnectors:
-        # Loss model segments
-        segments = i.get('LossModelCollection').get(
-            'LossModel').get('SegmentCollection').get('Segment')
-        for j in range(len(segments)):
-            # Append index to container
-            values.append((i['@InterconnectorID'], j))
-
-    return values
+    return [(k, j) for k, v in segments.items() for j in range(len(v))]
 
 
 def get_trader_price_bands(data) -> dict:
-    """Trader price bands"""
-
-    traders = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-               .get('TraderCollection').get('Trader'))
-
-    # Container for all price bands
-    price_bands = {}
-    for i in traders:
-        # All trade types for a given trader
-        trade_types = (i.get('TradePriceStructureCollection')
-                       .get('TradePriceStructure')
-                       .get('TradeTypePriceStructureCollection')
-                       .get('TradeTypePriceStructure'))
+    """Trader price bands - offers without a price structure are excluded"""
 
-        for j in convert_to_list(trade_types):
-            # Price bands
-            for k in range(1, 11):
-                key = (i['@TraderID'], j['@TradeType'], k)
-                price_bands[key] = float(j.get(f'@PriceBand{k}'))
+    offers = get_casefile_index(data).trader_offers
+    rows, bands = np.nonzero(~np.isnan(offers['price_bands']))
+    prices = offers['price_bands'][rows, bands].tolist()
 
-    return price_bands
+    return {(*offers['index'][i], j + 1): k for i, j, k in zip(rows.tolist(), bands.tolist(), prices)}
 
 
 def get_trader_quantity_bands(data) -> dict:
     """Get trader quantity bands"""
 
-    traders = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-               .get('PeriodCollection').get('Period')
-               .get('TraderPeriodCollection').get('TraderPeriod'))
-
-    # Container for quantity bands
-    quantity_bands = {}
-    for i in traders:
-        for j in convert_to_list(i.get('TradeCollection').get('Trade')):
-            # Quantity bands
-            for k in range(1, 11):
-                key = (i['@TraderID'], j['@TradeType'], k)
-                quantity_bands[key] = float(j[f'@BandAvail{k}'])
-
-    return quantity_bands
+    return dict(get_casefile_index(data).trader_quantity_bands)
 
 
 def get_trader_initial_condition_attribute(data, attribute, func) -> dict:
     """Get trader initial MW"""
 
-    traders = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-               .get('TraderCollection').get('Trader'))
-
-    # Container for initial MW data
-    values = {}
-    for i in traders:
-        # Initial conditions
-        for j in i.get('TraderInitialConditionCollection').get('TraderInitialCondition'):
-            # Check matching attribute and extract value
-            if j.get('@InitialConditionID') == attribute:
-                values[i.get('@TraderID')] = func(j.get('@Value'))
-
-    return values
+    return {k: func(v[attribute]) for k, v in get_casefile_index(data).trader_initial_conditions.items()
+            if attribute in v}
 
 
 def get_trader_period_attribute(data, attribute, func) -> dict:
     """Get trader period attribute"""
 
-    return {i['@TraderID']: func(i[attribute])
-            for i in (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                      .get('PeriodCollection').get('Period')
-                      .get('TraderPeriodCollection').get('TraderPeriod'))
-            if i.get(attribute) is not None}
+    return {k: func(v[attribute]) for k, v in get_casefile_index(data).trader_periods.items()
+            if v.get(attribute) is not None}
 
 
 def get_trader_collection_attribute(data, attribute, func) -> dict:
     """Get trader collection attribute"""
 
-    return {i['@TraderID']: func(i[attribute]) for i in (data.get('NEMSPDCaseFile')
-                                                         .get('NemSpdInputs')
-                                                         .get('TraderCollection')
-                                                         .get('Trader'))}
+    return {k: func(v[attribute]) for k, v in get_casefile_index(data).traders.items()}
 
 
 def get_trader_period_trade_attribute(data, attribute, func) -> dict:
     """Get trader quantity band attribute"""
 
-    return {(i['@TraderID'], j['@TradeType']): func(j[attribute])
-            for i in (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                      .get('PeriodCollection').get('Period')
-                      .get('TraderPeriodCollection').get('TraderPeriod'))
-            for j in convert_to_list(i.get('TradeCollection').get('Trade'))
-            if j.get(attribute) is not None}
+    return {k: func(v[attribute]) for k, v in get_casefile_index(data).trader_trades.items()
+            if v.get(attribute) is not None}
 
 
 def get_trader_fast_start_attribute(data, attribute, func) -> dict:
     """Get trader fast start attribute"""
 
-    traders = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-               .get('TraderCollection').get('Trader'))
-
     # Fast start traders
-    fast_start_traders = get_trader_fast_start_index(data)
+    traders = [v for v in get_casefile_index(data).traders.values() if v.get('@FastStart') == '1']
 
     # CurrentModeTime and CurrentMode may be missing for some traders (seem to
     # be fast-start units). Set to 0 if missing.
     if attribute == '@CurrentModeTime':
         return {i['@TraderID']: func(i.get(attribute))
                 if i.get(attribute) is not None else 0.0
-                for i in traders if i['@TraderID'] in fast_start_traders}
+                for i in traders}
 
     if attribute == '@CurrentMode':
         return {i['@TraderID']: func(i.get(attribute))
                 if i.get(attribute) is not None else 0
-                for i in traders if i['@TraderID'] in fast_start_traders}
+                for i in traders}
 
     else:
         return {i['@TraderID']: func(i.get(attribute))
                 if i.get(attribute) is not None else i.get(attribute)
-                for i in traders if i['@TraderID'] in fast_start_traders}
+                for i in traders}
 
 
 def get_interconnector_collection_attribute(data, attribute, func) -> dict:
     """Get interconnector collection attribute"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('InterconnectorCollection')
-                       .get('Interconnector'))
-
-    # Container for extract values
-    values = {}
-    for i in interconnectors:
-        initial_conditions = (i.get('InterconnectorInitialConditionCollection')
-                              .get('InterconnectorInitialCondition'))
-
-        for j in initial_conditions:
-            if j['@InitialConditionID'] == attribute:
-                values[i['@InterconnectorID']] = func(j['@Value'])
-
-    return values
+    return {k: func(v[attribute]) for k, v in get_casefile_index(data).interconnector_initial_conditions.items()
+            if attribute in v}
 
 
 def get_interconnector_period_collection_attribute(data, attribute, func) -> dict:
@@ -416,7 +269,7 @@ def get_interconnector_period_collection_attribute(data, attribute, func) -> dic
 
     Parameters
     ----------
-    data : dict
+    data : dict or CasefileIndex
         NEMDE case file dictionary
 
     attribute : str
@@ -431,17 +284,7 @@ def get_interconnector_period_collection_attribute(data, attribute, func) -> dic
         Dictionary of extracted interconnector period collection attributes
     """
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('PeriodCollection').get('Period')
-                       .get('InterconnectorPeriodCollection')
-                       .get('InterconnectorPeriod'))
-
-    # Container for extracted values
-    values = {}
-    for i in interconnectors:
-        values[i['@InterconnectorID']] = func(i[attribute])
-
-    return values
+    return {k: func(v[attribute]) for k, v in get_casefile_index(data).interconnector_periods.items()}
 
 
 def get_interconnector_loss_model_attribute(data, attribute, func) -> dict:
@@ -450,7 +293,7 @@ def get_interconnector_loss_model_attribute(data, attribute, func) -> dict:
 
     Parameters
     ----------
-    data : dict
+    data : dict or CasefileIndex
         NEMDE case file dictionary
 
     attribute : str
@@ -460,152 +303,63 @@ def get_interconnector_loss_model_attribute(data, attribute, func) -> dict:
         Function used to parse attribute values e.g. convert to float or string
     """
 
-    return {i['@InterconnectorID']: func(i.get('LossModelCollection').get('LossModel')[attribute])
-            for i in (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                      .get('InterconnectorCollection').get('Interconnector'))}
+    return {k: func(v[attribute]) for k, v in get_casefile_index(data).interconnector_loss_models.items()}
 
 
 def get_interconnector_loss_model_segments(data, interconnector_id) -> list:
     """Get segments corresponding to interconnector loss model"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('InterconnectorCollection')
-                       .get('Interconnector'))
-
-    # Container for loss model segments
-    segments = []
-    for i in interconnectors:
-        if i['@InterconnectorID'] == interconnector_id:
-            loss_model_segments = (i.get('LossModelCollection')
-                                   .get('LossModel').get('SegmentCollection')
-                                   .get('Segment'))
-
-            for segment in loss_model_segments:
-                s = {j: int(k) if j == '@Limit' else float(k) for j, k in segment.items()}
-                segments.append(s)
+    segments = get_casefile_index(data).interconnector_loss_model_segments.get(interconnector_id, [])
 
-    return segments
+    return [dict(i) for i in segments]
 
 
 def get_interconnector_loss_model_segment_attribute(data, attribute, func) -> dict:
     """Get interconnector loss model segment collection"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('InterconnectorCollection').get('Interconnector'))
+    loss_models = get_casefile_index(data).interconnector_loss_models
 
-    # Container for values
-    values = {}
-    for i in interconnectors:
-        segment_attributes = (i.get('LossModelCollection').get('LossModel')
-                              .get('SegmentCollection').get('Segment'))
-
-        for j, k in enumerate(segment_attributes):
-            # Extract loss model segment attribute
-            values[(i['@InterconnectorID'], j)] = func(k[attribute])
-
-    return values
+    # Extract loss model segment attribute
+    return {(k, j): func(s[attribute]) for k, v in loss_models.items()
+            for j, s in enumerate(v['SegmentCollection']['Segment'])}
 
 
 def get_standardised_interconnector_loss_model_segments(data) -> dict:
     """Use breakpoints and segment factors to construct a new start-end representation for the MLF curve"""
 
-    return {i: get_parsed_interconnector_loss_model_segments(data, i)
-            for i in get_interconnector_index(data)}
+    index = get_casefile_index(data)
+    lower_limit = get_interconnector_loss_model_attribute(index, '@LossLowerLimit', float)
+
+    return {i: parse_loss_model_segments(loss_lower_limit=lower_limit[i],
+                                         segments=index.interconnector_loss_model_segments[i])
+            for i in get_interconnector_index(index)}
 
 
 def get_mnsp_price_bands(data) -> dict:
     """Get MNSP price bands"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('InterconnectorCollection')
-                       .get('Interconnector'))
-
-    # Container for price band information
-    price_bands = {}
-    for i in interconnectors:
-        if i.get('MNSPPriceStructureCollection') is None:
-            continue
-
-        # MNSP price structure
-        price_structure = (i.get('MNSPPriceStructureCollection')
-                           .get('MNSPPriceStructure')
-                           .get('MNSPRegionPriceStructureCollection')
-                           .get('MNSPRegionPriceStructure'))
-
-        for j in price_structure:
-            for k in range(1, 11):
-                key = (i['@InterconnectorID'], j['@RegionID'], k)
-                price_bands[key] = float(j[f'@PriceBand{k}'])
-
-    return price_bands
+    return {(*k, b): float(v[f'@PriceBand{b}']) for k, v in get_casefile_index(data).mnsp_price_structures.items()
+            for b in range(1, 11)}
 
 
 def get_mnsp_quantity_bands(data) -> dict:
     """Get MNSP quantity bands"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('PeriodCollection').get('Period')
-                       .get('InterconnectorPeriodCollection')
-                       .get('InterconnectorPeriod'))
-
-    # Container for quantity band information
-    quantity_bands = {}
-    for i in interconnectors:
-        if i.get('MNSPOfferCollection') is None:
-            continue
-
-        # MNSP offers
-        offers = i.get('MNSPOfferCollection').get('MNSPOffer')
-        for j in offers:
-            for k in range(1, 11):
-                key = (i['@InterconnectorID'], j['@RegionID'], k)
-                quantity_bands[key] = float(j[f'@BandAvail{k}'])
-
-    return quantity_bands
+    return {(*k, b): float(v[f'@BandAvail{b}']) for k, v in get_casefile_index(data).mnsp_offers.items()
+            for b in range(1, 11)}
 
 
 def get_mnsp_offer_attribute(data, attribute) -> dict:
     """MNSP offer attribute"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('PeriodCollection').get('Period')
-                       .get('InterconnectorPeriodCollection')
-                       .get('InterconnectorPeriod'))
-
-    # Container for MNSP offer attributes
-    values = {}
-    for i in interconnectors:
-        if i.get('MNSPOfferCollection') is None:
-            continue
-
-        # MNSP offers
-        offers = i.get('MNSPOfferCollection').get('MNSPOffer')
-        for j in offers:
-            for k in range(1, 11):
-                key = (i['@InterconnectorID'], j['@RegionID'], k)
-                values[key] = float(j[f'@{attribute}'])
-
-    return values
+    return {(*k, b): float(v[f'@{attribute}']) for k, v in get_casefile_index(data).mnsp_offers.items()
+            for b in range(1, 11)}
 
 
 def get_mnsp_quantity_band_attribute(data, attribute, func) -> dict:
     """Get MNSP max available"""
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('PeriodCollection').get('Period')
-                       .get('InterconnectorPeriodCollection')
-                       .get('InterconnectorPeriod'))
-
-    # Container for max available data
-    max_available = {}
-    for i in interconnectors:
-        if i.get('MNSPOfferCollection') is None:
-            continue
-
-        for j in i.get('MNSPOfferCollection').get('MNSPOffer'):
-            max_available[(i['@InterconnectorID'], j['@RegionID'])] = func(j[attribute])
-
-    return max_available
+    return {k: func(v[attribute]) for k, v in get_casefile_index(data).mnsp_offers.items()}
 
 
 def get_mnsp_period_collection_attribute(data, attribute, func) -> dict:
@@ -614,7 +368,7 @@ def get_mnsp_period_collection_attribute(data, attribute, func) -> dict:
 
     Parameters
     ----------
-    data : dict
+    data : dict or CasefileIndex
         NEMDE case file dictionary
 
     attribute : str
@@ -629,21 +383,8 @@ def get_mnsp_period_collection_attribute(data, attribute, func) -> dict:
         MNSP period collection attribute
     """
 
-    interconnectors = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                       .get('PeriodCollection').get('Period')
-                       .get('InterconnectorPeriodCollection')
-                       .get('InterconnectorPeriod'))
-
-    # Container for extracted values
-    values = {}
-    for i in interconnectors:
-        if i['@MNSP'] != '1':
-            continue
-
-        # Append to container
-        values[i['@InterconnectorID']] = func(i[attribute])
-
-    return values
+    return {k: func(v[attribute]) for k, v in get_casefile_index(data).interconnector_periods.items()
+            if v['@MNSP'] == '1'}
 
 
 def get_region_initial_condition_attribute(data, attribute, func) -> dict:
@@ -652,7 +393,7 @@ def get_region_initial_condition_attribute(data, attribute, func) -> dict:
 
     Parameters
     ----------
-    data : dict
+    data : dict or CasefileIndex
         NEMDE case file dictionary
 
     attribute : str
@@ -667,29 +408,14 @@ def get_region_initial_condition_attribute(data, attribute, func) -> dict:
         Extract attribute values for each NEM region
     """
 
-    regions = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-               .get('RegionCollection').get('Region'))
-
-    # Container for extracted values
-    values = {}
-    for i in regions:
-        initial_conditions = (i.get('RegionInitialConditionCollection')
-                              .get('RegionInitialCondition'))
-
-        for j in initial_conditions:
-            if j['@InitialConditionID'] == attribute:
-                values[i['@RegionID']] = func(j['@Value'])
-
-    return values
+    return {k: func(v[attribute]) for k, v in get_casefile_index(data).region_initial_conditions.items()
+            if attribute in v}
 
 
 def get_region_period_collection_attribute(data, attribute, func) -> dict:
     """Get region period collection attribute"""
 
-    return {i['@RegionID']: func(i[attribute])
-            for i in (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                      .get('PeriodCollection').get('Period')
-                      .get('RegionPeriodCollection').get('RegionPeriod'))}
+    return {k: func(v[attribute]) for k, v in get_casefile_index(data).region_periods.items()}
 
 
 def get_generic_constraint_rhs(data, intervention) -> dict:
@@ -698,7 +424,7 @@ def get_generic_constraint_rhs(data, intervention) -> dict:
 
     Parameters
     ----------
-    data : dict
+    data : dict or CasefileIndex
         NEMDE case file dictionary
 
     intervention : str
@@ -710,17 +436,8 @@ def get_generic_constraint_rhs(data, intervention) -> dict:
         Dictionary with keys = ConstraintIDs, values = constraint RHS
     """
 
-    constraints = (data.get('NEMSPDCaseFile').get('NemSpdOutputs')
-                   .get('ConstraintSolution'))
-
-    # Container for constraint RHS terms
-    rhs = {}
-    for i in constraints:
-        # Check intervention flag
-        if i['@Intervention'] == intervention:
-            rhs[i['@ConstraintID']] = float(i['@RHS'])
-
-    return rhs
+    return {k[0]: float(v['@RHS']) for k, v in get_casefile_index(data).constraint_solutions.items()
+            if k[1] == intervention}
 
 
 def get_generic_constraint_collection_attribute(data, attribute, func) -> dict:
@@ -729,7 +446,7 @@ def get_generic_constraint_collection_attribute(data, attribute, func) -> dict:
 
     Parameters
     ----------
-    data : dict
+    data : dict or CasefileIndex
         NEMDE case file data
 
     attribute : str
@@ -744,20 +461,9 @@ def get_generic_constraint_collection_attribute(data, attribute, func) -> dict:
         Extracted generic constraint collection values
     """
 
-    constraints = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                   .get('GenericConstraintCollection')
-                   .get('GenericConstraint'))
-
-    # Container for extract values
-    values = {}
-    for i in constraints:
-        # Skip constraints with missing LHS factors
-        if i.get('LHSFactorCollection') is None:
-            continue
-
-        values[i['@ConstraintID']] = func(i[f'{attribute}'])
-
-    return values
+    # Skip constraints with missing LHS factors
+    return {k: func(v[attribute]) for k, v in get_casefile_index(data).generic_constraints.items()
+            if v.get('LHSFactorCollection') is not None}
 
 
 def parse_constraint(constraint_data):
@@ -788,18 +494,14 @@ def get_generic_constraint_lhs_terms(data) -> dict:
     Generic constraint LHS terms - if no LHS terms then constraint is skipped
     """
 
-    constraints = (data.get('NEMSPDCaseFile').get('NemSpdInputs')
-                   .get('GenericConstraintCollection')
-                   .get('GenericConstraint'))
-
-    return {i.get('@ConstraintID'): parse_constraint(i) for i in constraints
-            if i.get('LHSFactorCollection') is not None}
+    return {k: parse_constraint(v) for k, v in get_casefile_index(data).generic_constraints.items()
+            if v.get('LHSFactorCollection') is not None}
 
 
 def get_case_attribute(data, attribute, func):
     """Extract case attribute"""
 
-    return func(data.get('NEMSPDCaseFile').get('NemSpdInputs').get('Case')[attribute])
+    return func(get_casefile_index(data).case[attribute])
 
 
 def reorder_tuple(input_tuple) -> tuple:
@@ -811,51 +513,58 @@ def reorder_tuple(input_tuple) -> tuple:
         return tuple((input_tuple[0], input_tuple[1]))
 
 
-def get_price_tied_bands(data, trade_type):
+def get_price_tied_bands(data, trade_type, tolerance=1e-6):
     """
     Get price-tied generators and loads. 'trade_type'=ENOF for generators,
     'trade_type'=LDOF for loads.
-    """
-
-    # Price and quantity bands
-    price_bands = get_trader_price_bands(data)
-    quantity_bands = get_trader_quantity_bands(data)
-
-    # Generator energy offer price bands
-    filtered_price_bands = {k: v for k, v in price_bands.items() if k[1] == trade_type}
-
-    # Trader region
-    trader_region = get_trader_period_attribute(data, '@RegionID', str)
 
-    # Container for price tied bands
-    price_tied = []
-
-    # For each price band
-    for i, j in filtered_price_bands.items():
-        # Compare it to every other price band
-        for m, n in filtered_price_bands.items():
-            # Price bands must be in same region (also ignore the input trader - will of course match)
-            if (m == i) or (trader_region[i[0]] != trader_region[m[0]]):
-                continue
-
-            # Check if price difference less than threshold - append to container if so
-            if abs(j - n) < 1e-6:
-                if (quantity_bands[m[0], m[1], m[2]] != 0) and (quantity_bands[i[0], i[1], i[2]] != 0):
-                    price_tied.append((i, m))
-            # # Can break early if price > input price band - monotonically increase prices
-            # elif n > j:
-            #     break
-
-    # Re-order tuples, get unique price-tied combinations, and sort alphabetically
-    price_tied_reordered = [reorder_tuple(i) for i in price_tied]
-    price_tied_unique = list(set(price_tied_reordered))
-    price_tied_unique.sort()
-
-    # Flatten to produce one tuple for a given pair of price-tied generators
-    price_tied_flattened = [(i[0][0], i[0][1], i[0][2], i[1][0],
-                             i[1][1], i[1][2]) for i in price_tied_unique]
+    Bands with non-zero quantity are grouped by region and sorted by price.
+    Bands with prices differing by less than 'tolerance' are then adjacent,
+    so ties are found by pairing each band with the bands that follow it in
+    its region until the price difference exceeds the tolerance.
+    """
 
-    return price_tied_flattened
+    offers = get_casefile_index(data).trader_offers
+
+    # Energy offer price bands with non-zero quantity for traders assigned to a region
+    rows = (offers['trade_type'] == trade_type) & (offers['region_id'] != '')
+    mask = rows[:, None] & (offers['quantity_bands'] != 0) & ~np.isnan(offers['price_bands'])
+    offer, band = np.nonzero(mask)
+    price = offers['price_bands'][offer, band]
+    region = offers['region_id'][offer]
+
+    # Sort bands by region then price
+    order = np.lexsort((price, region))
+    offer, band, price, region = offer[order], band[order], price[order], region[order]
+
+    # Upper bound on position of last band that could be tied with each band - searched within each region
+    end = np.empty(len(price), dtype=int)
+    for region_id in np.unique(region):
+        start, stop = np.searchsorted(region, region_id, side='left'), np.searchsorted(region, region_id, side='right')
+        end[start:stop] = start + np.searchsorted(price[start:stop], price[start:stop] + 2 * tolerance, side='right')
+
+    # Candidate pairs (x, y) with x < y < end[x]. Prices are sorted, so the tied bands are a prefix of the candidates.
+    counts = end - np.arange(len(price)) - 1
+    x = np.repeat(np.arange(len(price)), counts)
+    y = x + 1 + np.arange(len(x)) - np.repeat(np.cumsum(counts) - counts, counts)
+    tied = (price[y] - price[x]) < tolerance
+    x, y = x[tied], y[tied]
+
+    # Order tuples alphabetically by trader (see reorder_tuple). Both orderings retained for the same trader.
+    trader_id = offers['trader_id'][offer]
+    swap = trader_id[x] > trader_id[y]
+    same = trader_id[x] == trader_id[y]
+    first, second = np.where(swap, y, x), np.where(swap, x, y)
+    first, second = np.concatenate([first, y[same]]), np.concatenate([second, x[same]])
+
+    # Sort pairs by position of (TraderID, TradeType, band) keys in alphabetical order
+    keys = [(*offers['index'][i], j + 1) for i, j in zip(offer.tolist(), band.tolist())]
+    rank = np.empty(len(keys), dtype=int)
+    rank[sorted(range(len(keys)), key=keys.__getitem__)] = np.arange(len(keys))
+    order = np.lexsort((rank[second], rank[first]))
+
+    # Flattened tuples for each pair of price-tied bands sorted alphabetically
+    return [keys[i] + keys[j] for i, j in zip(first[order].tolist(), second[order].tolist())]
 
 
 def get_trader_effective_initial_mw(data, mode):
@@ -865,14 +574,16 @@ def get_trader_effective_initial_mw(data, mode):
     should use InitialMW.
     """
 
+    index = get_casefile_index(data)
+
     # Get intervention flag
-    intervention_flag = get_case_attribute(data, '@Intervention', str)
+    intervention_flag = get_case_attribute(index, '@Intervention', str)
 
     # Use 'What If' if an intervention pricing period and run mode is 'pricing'
     if (intervention_flag == 'True') and (mode == 'pricing'):
-        return get_trader_initial_condition_attribute(data, 'WhatIfInitialMW', float)
+        return get_trader_initial_condition_attribute(index, 'WhatIfInitialMW', float)
     else:
-        return get_trader_initial_condition_attribute(data, 'InitialMW', float)
+        return get_trader_initial_condition_attribute(index, 'InitialMW', float)
 
 
 def get_interconnector_effective_initial_mw(data, mode):
@@ -882,30 +593,34 @@ def get_interconnector_effective_initial_mw(data, mode):
     should use InitialMW.
     """
 
+    index = get_casefile_index(data)
+
     # Get intervention flag
-    intervention_flag = get_case_attribute(data, '@Intervention', str)
+    intervention_flag = get_case_attribute(index, '@Intervention', str)
 
     # Use 'What If' if an intervention pricing period and run mode is 'pricing'
     if (intervention_flag == 'True') and (mode == 'pricing'):
-        return get_interconnector_collection_attribute(data, 'WhatIfInitialMW', float)
+        return get_interconnector_collection_attribute(index, 'WhatIfInitialMW', float)
     else:
-        return get_interconnector_collection_attribute(data, 'InitialMW', float)
+        return get_interconnector_collection_attribute(index, 'InitialMW', float)
 
 
 def get_mnsp_region_loss_indicator(data, mode) -> dict:
     """
-    Get region loss indicator. =1 if FromRegion and InitialMW >= 0, 
+    Get region loss indicator. =1 if FromRegion and InitialMW >= 0,
     or if ToRegion and InitialMW < 0, else =0
     """
 
+    index = get_casefile_index(data)
+
     # MNSP and region index
-    mnsp_index = get_mnsp_index(data)
-    region_index = get_region_index(data)
+    mnsp_index = get_mnsp_index(index)
+    region_index = get_region_index(index)
 
     # MNSP attributes # TODO: this needs to change if intervention pricing case is considered
-    initial_mw = get_interconnector_effective_initial_mw(data=data, mode=mode)
-    to_region = get_interconnector_period_collection_attribute(data, '@ToRegion', str)
-    from_region = get_interconnector_period_collection_attribute(data, '@FromRegion', str)
+    initial_mw = get_interconnector_effective_initial_mw(data=index, mode=mode)
+    to_region = get_interconnector_period_collection_attribute(index, '@ToRegion', str)
+    from_region = get_interconnector_period_collection_attribute(index, '@FromRegion', str)
 
     # Container for output
     out = {}
@@ -929,36 +644,38 @@ def get_mnsp_region_loss_indicator(data, mode) -> dict:
 def get_interconnector_initial_loss_estimate(data, mode) -> dict:
     """Get initial loss estimate for each interconnector"""
 
+    index = get_casefile_index(data)
+
     # Initial MW for all interconnectors
-    interconnectors = get_interconnector_index(data=data)
+    interconnectors = get_interconnector_index(data=index)
 
     # Depends on intervention pricing period status
-    initial_mw = get_interconnector_effective_initial_mw(data=data, mode=mode)
+    initial_mw = get_interconnector_effective_initial_mw(data=index, mode=mode)
+
+    # Parsed loss model segments for each interconnector
+    segments = get_standardised_interconnector_loss_model_segments(data=index)
 
-    return {i: get_interconnector_loss_estimate(
-            data=data, interconnector_id=i, flow=initial_mw[i])
-            for i in interconnectors}
+    return {i: get_loss_estimate(segments=segments[i], flow=initial_mw[i]) for i in interconnectors}
 
 
 def get_interconnector_loss_model_breakpoints_y(data) -> dict:
     """Get interconnector loss model breakpoints - y-coordinate (estimated loss)"""
 
+    index = get_casefile_index(data)
+
     # Get loss model segments
-    interconnectors = get_interconnector_index(data=data)
+    interconnectors = get_interconnector_index(data=index)
 
-    limit = get_interconnector_loss_model_segment_attribute(data, '@Limit', float)
-    lower_limit = get_interconnector_loss_model_attribute(data, '@LossLowerLimit', float)
-    # segments = get_standardised_interconnector_loss_model_segments(data=data)
+    limit = get_interconnector_loss_model_segment_attribute(index, '@Limit', float)
+    lower_limit = get_interconnector_loss_model_attribute(index, '@LossLowerLimit', float)
+    segments = get_standardised_interconnector_loss_model_segments(data=index)
 
     # Break point values - offset segment ID - first segment should be loss lower limit
-    values = {(i, s + 1):
-              get_interconnector_loss_estimate(data=data, interconnector_id=i, flow=v)
-              for (i, s), v in limit.items()}
+    values = {(i, s + 1): get_loss_estimate(segments=segments[i], flow=v) for (i, s), v in limit.items()}
 
     # Add loss lower limit with zero index (corresponds to first segment)
     for i in interconnectors:
-        values[(i, 0)] = get_interconnector_loss_estimate(
-            data=data, interconnector_id=i, flow=-lower_limit[i])
+        values[(i, 0)] = get_loss_estimate(segments=segments[i], flow=-lower_limit[i])
 
     return values
 
@@ -966,10 +683,12 @@ def get_interconnector_loss_model_breakpoints_y(data) -> dict:
 def get_interconnector_loss_model_breakpoints_x(data) -> dict:
     """Get interconnector loss model breakpoints - x-coordinate (power output)"""
 
+    index = get_casefile_index(data)
+
     # Get loss model segments and lower limits for each interconnector
-    limit = get_interconnector_loss_model_segment_attribute(data, '@Limit', float)
+    limit = get_interconnector_loss_model_segment_attribute(index, '@Limit', float)
     # limit = data['P_INTERCONNECTOR_LOSS_SEGMENT_LIMIT']
-    lower_limit = get_interconnector_loss_model_attribute(data, '@LossLowerLimit', float)
+    lower_limit = get_interconnector_loss_model_attribute(index, '@LossLowerLimit', float)
     # lower_limit = data['P_INTERCONNECTOR_LOSS_LOWER_LIMIT']
 
     # Container for break point values - offset segment ID - first segment should be loss lower limit
@@ -977,44 +696,49 @@ def get_interconnector_loss_model_breakpoints_x(data) -> dict:
               for (interconnector_id, segment_id), flow in limit.items()}
 
     # Add loss lower limit with zero index (corresponds to first segment)
-    for i in get_interconnector_index(data=data):
+    for i in get_interconnector_index(data=index):
         values[(i, 0)] = -lower_limit[i]
 
     return values
 
 
 def get_trader_fcas_info(data, mode) -> dict:
-    """Extract parameter used in FCAS availability calculations - convert to standard format"""
+    """
+    Extract parameter used in FCAS availability calculations - convert to
+    standard format. Scalar reference for get_trader_fcas_table.
+    """
+
+    index = get_casefile_index(data)
 
     # FCAS trade types
     fcas_trade_types = ['R6SE', 'R60S', 'R5MI', 'R5RE', 'L6SE', 'L60S', 'L5MI', 'L5RE']
 
     # Extract data used for FCAS calculations
-    trader_quantity_bands = get_trader_quantity_bands(data=data)
-    trader_type = get_trader_collection_attribute(data, '@TraderType', str)
-    max_avail = get_trader_period_trade_attribute(data, '@MaxAvail', float)
-    enablement_min = get_trader_period_trade_attribute(data, '@EnablementMin', float)
-    low_breakpoint = get_trader_period_trade_attribute(data, '@LowBreakpoint', float)
-    high_breakpoint = get_trader_period_trade_attribute(data, '@HighBreakpoint', float)
-    enablement_max = get_trader_period_trade_attribute(data, '@EnablementMax', float)
-    effective_initial_mw = get_trader_effective_initial_mw(data=data, mode=mode)
-    uigf = get_trader_period_attribute(data, '@UIGF', float)
-    hmw = get_trader_initial_condition_attribute(data, 'HMW', float)
-    lmw = get_trader_initial_condition_attribute(data, 'LMW', float)
-    agc_status = get_trader_initial_condition_attribute(data, 'AGCStatus', str)
+    trader_quantity_bands = index.trader_quantity_bands
+    trader_type = get_trader_collection_attribute(index, '@TraderType', str)
+    max_avail = get_trader_period_trade_attribute(index, '@MaxAvail', float)
+    enablement_min = get_trader_period_trade_attribute(index, '@EnablementMin', float)
+    low_breakpoint = get_trader_period_trade_attribute(index, '@LowBreakpoint', float)
+    high_breakpoint = get_trader_period_trade_attribute(index, '@HighBreakpoint', float)
+    enablement_max = get_trader_period_trade_attribute(index, '@EnablementMax', float)
+    effective_initial_mw = get_trader_effective_initial_mw(data=index, mode=mode)
+    uigf = get_trader_period_attribute(index, '@UIGF', float)
+    hmw = get_trader_initial_condition_attribute(index, 'HMW', float)
+    lmw = get_trader_initial_condition_attribute(index, 'LMW', float)
+    agc_status = get_trader_initial_condition_attribute(index, 'AGCStatus', str)
     scada_ramp_up_rate = get_trader_initial_condition_attribute(
-        data, 'SCADARampUpRate', float)
+        index, 'SCADARampUpRate', float)
     scada_ramp_dn_rate = get_trader_initial_condition_attribute(
-        data, 'SCADARampDnRate', float)
-    semi_dispatch = get_trader_collection_attribute(data, '@SemiDispatch', str)
+        index, 'SCADARampDnRate', float)
+    semi_dispatch = get_trader_collection_attribute(index, '@SemiDispatch', str)
 
     # Container for output
     out = {}
-    for trader_id, trade_type in get_trader_offer_index(data=data):
+    for trader_id, trade_type in get_trader_offer_index(data=index):
         if trade_type in fcas_trade_types:
             # Extract trader quantity bands for given service
-            quantity_bands = {k: v for k, v in trader_quantity_bands.items()
-                              if k[0] == trader_id and k[1] == trade_type}
+            quantity_bands = {(trader_id, trade_type, k): trader_quantity_bands[(trader_id, trade_type, k)]
+                              for k in range(1, 11)}
 
             # Energy offer trade type depends on whether trader is a generator or a load
             if trader_type[trader_id] == 'GENERATOR':
@@ -1050,20 +774,98 @@ def get_trader_fcas_info(data, mode) -> dict:
     return out
 
 
+def get_trader_fcas_table(data, mode) -> dict:
+    """
+    Get FCAS parameters as a columnar table with one row per (TraderID,
+    TradeType) FCAS offer. Columns are built from the trader offer table, so
+    offers are not assembled one at a time.
+
+    Parameters
+    ----------
+    data : dict
+        NEMDE casefile
+
+    mode : str
+        Run mode - 'target' or 'pricing'
+
+    Returns
+    -------
+    Dictionary mapping parameter names used in get_trader_fcas_info to
+    arrays. Missing numeric values are NaN. 'index' contains the
+    (TraderID, TradeType) tuple for each row, and 'quantity_bands' is an
+    array with shape (offers, 10).
+    """
+
+    index = get_casefile_index(data)
+
+    # FCAS offers in trader offer table
+    offers = index.trader_offers
+    mask = np.isin(offers['trade_type'], fcas.REGULATION_OFFERS + fcas.CONTINGENCY_OFFERS)
+    positions = np.flatnonzero(mask)
+
+    keys = [offers['index'][i] for i in positions]
+    trades = [index.trader_trades[k] for k in keys]
+
+    table = {
+        'index': keys,
+        'trader_id': offers['trader_id'][mask],
+        'trade_type': offers['trade_type'][mask],
+        'quantity_bands': offers['quantity_bands'][mask],
+    }
+
+    # Offer attributes
+    for column, attribute in [('enablement_min', '@EnablementMin'), ('low_breakpoint', '@LowBreakpoint'),
+                              ('high_breakpoint', '@HighBreakpoint'), ('enablement_max', '@EnablementMax'),
+                              ('max_avail', '@MaxAvail')]:
+        table[column] = np.array([i[attribute] for i in trades], dtype=float).reshape(-1)
+
+    # Trader attributes - looked up once per trader then broadcast to each offer
+    traders, inverse = np.unique(table['trader_id'], return_inverse=True)
+
+    trader_type = get_trader_collection_attribute(index, '@TraderType', str)
+    unexpected = [i for i in traders if trader_type[i] not in ['GENERATOR', 'LOAD', 'NORMALLY_ON_LOAD']]
+    if unexpected:
+        raise Exception('Unexpected trader type:', unexpected[0], trader_type[unexpected[0]])
+
+    float_attributes = {
+        'initial_mw': get_trader_effective_initial_mw(data=index, mode=mode),
+        'uigf': get_trader_period_attribute(index, '@UIGF', float),
+        'hmw': get_trader_initial_condition_attribute(index, 'HMW', float),
+        'lmw': get_trader_initial_condition_attribute(index, 'LMW', float),
+        'agc_ramp_up': get_trader_initial_condition_attribute(index, 'SCADARampUpRate', float),
+        'agc_ramp_dn': get_trader_initial_condition_attribute(index, 'SCADARampDnRate', float),
+    }
+
+    str_attributes = {
+        'agc_status': get_trader_initial_condition_attribute(index, 'AGCStatus', str),
+        'trader_type': trader_type,
+        'semi_dispatch': get_trader_collection_attribute(index, '@SemiDispatch', str),
+    }
+
+    for column, values in float_attributes.items():
+        table[column] = np.array([values.get(i, np.nan) for i in traders], dtype=float).reshape(-1)[inverse]
+
+    for column, values in str_attributes.items():
+        table[column] = np.array([str(values.get(i)) for i in traders], dtype=str).reshape(-1)[inverse]
+
+    # Energy offer MaxAvail - energy offer type depends on whether trader is a generator or a load
+    energy_keys = zip(table['trader_id'].tolist(), np.where(table['trader_type'] == 'GENERATOR', 'ENOF', 'LDOF').tolist())
+    energy_max_avail = get_trader_period_trade_attribute(index, '@MaxAvail', float)
+    table['energy_max_avail'] = np.array([energy_max_avail.get(k, np.nan) for k in energy_keys], dtype=float).reshape(-1)
+
+    return table
+
+
 def get_trader_fcas_availability_status(data, mode) -> dict:
-    """Get FCAS availability"""
+    """Get FCAS availability - computed for all FCAS offers at once"""
 
-    # Extract trade FCAS parameters into single dictionary to assist with availability calculations
-    fcas_info = get_trader_fcas_info(data=data, mode=mode)
+    # FCAS parameters with one row per offer
+    table = get_trader_fcas_table(data=data, mode=mode)
 
-    # Container for FCAS availability
-    fcas_status = {}
-    for (trader_id, trade_type), params in fcas_info.items():
-        # Get FCAS availability status
-        fcas_status[(trader_id, trade_type)
-                    ] = fcas.get_trader_fcas_availability_status(params)
+    # Get FCAS availability status
+    fcas_status = fcas.get_trader_fcas_availability_statuses(table)
 
-    return fcas_status
+    return dict(zip(table['index'], fcas_status.tolist()))
 
 
 def get_trader_energy_offer_ramp_rate(trader_id, ramp_rates):
@@ -1109,7 +911,8 @@ def get_trader_effective_ramp_rate(data, direction) -> dict:
     corresponding to their ramp rate.
     """
 
-    traders = get_trader_index(data=data)
+    index = get_casefile_index(data)
+    traders = get_trader_index(data=index)
 
     # Get attributes corresponding to ramp direction (up or down)
     if direction == 'up':
@@ -1123,10 +926,10 @@ def get_trader_effective_ramp_rate(data, direction) -> dict:
 
     # Extract ramp rates defined in trader offers and SCADA initial conditions
     offers = get_trader_period_trade_attribute(
-        data=data, attribute=offer_attribute, func=float)
+        data=index, attribute=offer_attribute, func=float)
 
     scada = get_trader_initial_condition_attribute(
-        data=data, attribute=scada_attribute, func=float)
+        data=index, attribute=scada_attribute, func=float)
 
     out = {}
     for i in traders:
@@ -1164,6 +967,9 @@ def construct_case(data, mode) -> dict:
     # Get intervention status
     intervention = get_intervention_status(data=data, mode=mode)
 
+    # Index casefile collections - shared by all getters
+    data = get_casefile_index(data)
+
     case = {
         'S_REGIONS': get_region_index(data),
         'S_TRADERS': get_trader_index(data),
@@ -5,6 +5,7 @@ Serializer used to extract solution from Pyomo model and convert to JSON
 import itertools
 
 from nemde.core.casefile import lookup
+from nemde.core.casefile.index import IndexedCasefile
 from nemde.io.casefile import load_base_case
 from nemde.core.model.serializers import casefile_serializer
 
@@ -581,6 +582,51 @@ def get_period_solution_comparison(model, casefile):
     return compare_solutions_list(dict_1=solution, dict_2=actual, keys=keys, info=info)
 
 
+# Element type and ID field for each solution comparison component
+COMPARISON_ELEMENTS = {
+    'PeriodSolution': ('period', None),
+    'RegionSolution': ('region', 'region_id'),
+    'TraderSolution': ('trader', 'trader_id'),
+    'InterconnectorSolution': ('interconnector', 'interconnector_id'),
+    'ConstraintSolution': ('constraint', 'constraint_id'),
+}
+
+
+def flatten_solution_comparison(comparison, **info):
+    """
+    Convert solution comparison to a list of rows with a common structure
+
+    Parameters
+    ----------
+    comparison : dict
+        Solution comparison returned by get_solution_comparison
+
+    info : dict
+        Additional fields included in each row e.g. run_id
+
+    Returns
+    -------
+    List of dictionaries with keys: case_id, intervention, element_type,
+    element_id, key, model, actual (and keys in 'info')
+    """
+
+    rows = []
+    for component, (element_type, id_field) in COMPARISON_ELEMENTS.items():
+        for i in comparison.get(component, []):
+            rows.append({
+                **info,
+                'case_id': i['case_id'],
+                'intervention': int(i['intervention']),
+                'element_type': element_type,
+                'element_id': None if id_field is None else i[id_field],
+                'key': i['key'],
+                'model': i['model'],
+                'actual': i['actual'],
+            })
+
+    return rows
+
+
 def get_solution(model):
     """Extract model solution solution"""
 
@@ -599,8 +645,8 @@ def get_solution(model):
 def get_solution_comparison(model):
     """Compare model solution to observed NEMDE solution"""
 
-    # Load casefile
-    casefile = load_base_case(case_id=model.P_CASE_ID.value)
+    # Load casefile - indexed as solutions are looked up for each trader, region, interconnector and constraint
+    casefile = IndexedCasefile(load_base_case(case_id=model.P_CASE_ID.value))
 
     # Solution components
     regions = [get_region_solution_comparison(model=model, region_id=i, casefile=casefile)
@@ -10,6 +10,9 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from nemde.core.casefile import lookup
+from nemde.core.casefile.index import IndexedCasefile
+
 
 def get_trader_fcas_trapezium(data, trader_id, trade_type) -> dict:
     """Get trader FCAS trapezium"""
@@ -398,6 +401,242 @@ def get_trader_fcas_availability_status(params) -> bool:
     return fcas_status
 
 
+# Vectorised calculations - inputs are columnar tables with one row per FCAS offer. Missing values are NaN.
+
+# Regulation and contingency FCAS offers
+REGULATION_OFFERS = ['R5RE', 'L5RE']
+CONTINGENCY_OFFERS = ['L6SE', 'L60S', 'L5MI', 'R6SE', 'R60S', 'R5MI']
+
+
+def get_trapezia_slopes(trapezia) -> tuple:
+    """Get slopes of trapezia LHS and RHS - NaN if side is vertical"""
+
+    lhs_width = trapezia['LowBreakpoint'] - trapezia['EnablementMin']
+    rhs_width = trapezia['EnablementMax'] - trapezia['HighBreakpoint']
+
+    lhs_slope = np.where(lhs_width != 0, trapezia['MaxAvail'] / lhs_width, np.nan)
+    rhs_slope = np.where(rhs_width != 0, -trapezia['MaxAvail'] / rhs_width, np.nan)
+
+    return lhs_slope, rhs_slope
+
+
+def get_new_breakpoints(slope, x_intercept, max_available) -> np.ndarray:
+    """Compute new breakpoints - original x-intercept returned if line is vertical or horizontal"""
+
+    y_intercept = -slope * x_intercept
+
+    return np.where(np.isnan(slope) | (slope == 0), x_intercept, (max_available - y_intercept) / slope)
+
+
+def get_intersections(slope_1, x_intercept_1, slope_2, x_intercept_2) -> tuple:
+    """
+    Get points of intersection between lines defined by slopes and
+    x-intercepts. Slopes are NaN if lines are vertical.
+
+    Returns
+    -------
+    Tuple of the form (intersects, y) where 'intersects' is True if lines
+    intersect and 'y' is the y-coordinate of the intersection
+    """
+
+    y_intercept_1 = -slope_1 * x_intercept_1
+    y_intercept_2 = -slope_2 * x_intercept_2
+
+    defined_1, defined_2 = ~np.isnan(slope_1), ~np.isnan(slope_2)
+
+    # Both slopes are defined (lines are not both horizontal)
+    case_1 = defined_1 & defined_2 & ~((slope_1 == 0) & (slope_2 == 0))
+    x_1 = (y_intercept_2 - y_intercept_1) / (slope_1 - slope_2)
+
+    # Line 1's slope is undefined, line 2's slope is defined
+    case_2 = ~defined_1 & defined_2
+
+    # Line 1's slope is defined, line 2's slope is undefined
+    case_3 = defined_1 & ~defined_2
+
+    y = np.select([case_1, case_2, case_3], [
+        (slope_1 * x_1) + y_intercept_1,
+        (slope_2 * x_intercept_1) + y_intercept_2,
+        (slope_1 * x_intercept_2) + y_intercept_1,
+    ], default=np.nan)
+
+    return case_1 | case_2 | case_3, y
+
+
+def get_scaled_trapezia_agc_enablement_limit_lhs(trapezia, agc_enablement_min) -> dict:
+    """Scale FCAS trapezia based on lower AGC enablement limits"""
+
+    # No scaling applied if AGC limit is 0 or absent, or trapezium enablement min is more restrictive
+    scale = ~np.isnan(agc_enablement_min) & (agc_enablement_min != 0) & (agc_enablement_min > trapezia['EnablementMin'])
+
+    lhs_slope, rhs_slope = get_trapezia_slopes(trapezia)
+
+    # Intersection between LHS line with new EnablementMin and RHS line with original EnablementMax
+    intersects, y = get_intersections(lhs_slope, agc_enablement_min, rhs_slope, trapezia['EnablementMax'])
+
+    # Update max available if required
+    max_avail = np.where(intersects & (y < trapezia['MaxAvail']), np.maximum(0, y), trapezia['MaxAvail'])
+
+    return {
+        'EnablementMin': np.where(scale, agc_enablement_min, trapezia['EnablementMin']),
+        'LowBreakpoint': np.where(scale, get_new_breakpoints(lhs_slope, agc_enablement_min, max_avail),
+                                  trapezia['LowBreakpoint']),
+        'HighBreakpoint': np.where(scale, get_new_breakpoints(rhs_slope, trapezia['EnablementMax'], max_avail),
+                                   trapezia['HighBreakpoint']),
+        'EnablementMax': trapezia['EnablementMax'],
+        'MaxAvail': np.where(scale, max_avail, trapezia['MaxAvail']),
+    }
+
+
+def get_scaled_trapezia_agc_enablement_limit_rhs(trapezia, agc_enablement_max) -> dict:
+    """Scale FCAS trapezia based on upper AGC enablement limits"""
+
+    # No scaling applied if AGC limit is 0 or absent, or trapezium enablement max is more restrictive
+    scale = ~np.isnan(agc_enablement_max) & (agc_enablement_max != 0) & (agc_enablement_max < trapezia['EnablementMax'])
+
+    lhs_slope, rhs_slope = get_trapezia_slopes(trapezia)
+
+    # Intersection between LHS line with original EnablementMin and RHS line with new EnablementMax
+    intersects, y = get_intersections(lhs_slope, trapezia['EnablementMin'], rhs_slope, agc_enablement_max)
+
+    # Update max available if required
+    max_avail = np.where(intersects & (y < trapezia['MaxAvail']), np.maximum(0, y), trapezia['MaxAvail'])
+
+    return {
+        'EnablementMin': trapezia['EnablementMin'],
+        'LowBreakpoint': np.where(scale, get_new_breakpoints(lhs_slope, trapezia['EnablementMin'], max_avail),
+                                  trapezia['LowBreakpoint']),
+        'HighBreakpoint': np.where(scale, get_new_breakpoints(rhs_slope, agc_enablement_max, max_avail),
+                                   trapezia['HighBreakpoint']),
+        'EnablementMax': np.where(scale, agc_enablement_max, trapezia['EnablementMax']),
+        'MaxAvail': np.where(scale, max_avail, trapezia['MaxAvail']),
+    }
+
+
+def get_scaled_trapezia_agc_ramp_rate(trapezia, scada_ramp_rate) -> dict:
+    """Scale FCAS trapezia based on AGC ramp rates"""
+
+    # No scaling applied if ramp rate is 0 or absent
+    scale = ~np.isnan(scada_ramp_rate) & (scada_ramp_rate != 0)
+
+    # Max available
+    max_available = np.minimum(trapezia['MaxAvail'], scada_ramp_rate / 12)
+    reduced = scale & (max_available < trapezia['MaxAvail'])
+
+    # Breakpoints are only updated if trapezium sides are not vertical
+    lhs_width = trapezia['LowBreakpoint'] - trapezia['EnablementMin']
+    rhs_width = trapezia['EnablementMax'] - trapezia['HighBreakpoint']
+
+    low_breakpoint = get_new_breakpoints(trapezia['MaxAvail'] / lhs_width, trapezia['EnablementMin'], max_available)
+    high_breakpoint = get_new_breakpoints(-trapezia['MaxAvail'] / rhs_width, trapezia['EnablementMax'], max_available)
+
+    return {
+        'EnablementMin': trapezia['EnablementMin'],
+        'LowBreakpoint': np.where(reduced & (lhs_width != 0), low_breakpoint, trapezia['LowBreakpoint']),
+        'HighBreakpoint': np.where(reduced & (rhs_width != 0), high_breakpoint, trapezia['HighBreakpoint']),
+        'EnablementMax': trapezia['EnablementMax'],
+        'MaxAvail': np.where(scale, max_available, trapezia['MaxAvail']),
+    }
+
+
+def get_trader_fcas_trapezia_scaled(table) -> dict:
+    """
+    Get scaled FCAS trapezia for all offers. Vectorised equivalent of
+    get_trader_fcas_trapezium_scaled.
+
+    Parameters
+    ----------
+    table : dict
+        Columnar FCAS offer table - arrays with one element per offer, using
+        the same keys as the parameters passed to get_trader_fcas_trapezium_scaled
+
+    Returns
+    -------
+    Dictionary of arrays with keys 'EnablementMin', 'LowBreakpoint',
+    'HighBreakpoint', 'EnablementMax', and 'MaxAvail'
+    """
+
+    trapezia = {
+        'EnablementMin': table['enablement_min'],
+        'EnablementMax': table['enablement_max'],
+        'HighBreakpoint': table['high_breakpoint'],
+        'LowBreakpoint': table['low_breakpoint'],
+        'MaxAvail': table['max_avail'],
+    }
+
+    trade_type = table['trade_type']
+    trader_type = table['trader_type']
+    regulation = np.isin(trade_type, REGULATION_OFFERS)
+    contingency = np.isin(trade_type, CONTINGENCY_OFFERS)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # UIGF scaling applied to contingency offers for semi-dispatchable plant
+        semi_dispatch_contingency = (table['semi_dispatch'] == '1') & contingency
+        trapezia = get_scaled_trapezia_agc_enablement_limit_rhs(
+            trapezia, np.where(semi_dispatch_contingency, table['uigf'], np.nan))
+
+        # AGC enablement limits applied to regulation offers
+        trapezia = get_scaled_trapezia_agc_enablement_limit_lhs(trapezia, np.where(regulation, table['lmw'], np.nan))
+        trapezia = get_scaled_trapezia_agc_enablement_limit_rhs(trapezia, np.where(regulation, table['hmw'], np.nan))
+
+        # AGC ramp rate - increasing generation or reducing load increases frequency
+        generator = trader_type == 'GENERATOR'
+        load = np.isin(trader_type, ['LOAD', 'NORMALLY_ON_LOAD'])
+
+        if np.any(regulation & ~generator & ~load):
+            row = np.flatnonzero(regulation & ~generator & ~load)[0]
+            raise Exception(f"Unexpected trade type: {table['trader_id'][row]} {trade_type[row]}")
+
+        ramp_up = (generator & (trade_type == 'R5RE')) | (load & (trade_type == 'L5RE'))
+        ramp_rate = np.where(ramp_up, table['agc_ramp_up'], table['agc_ramp_dn'])
+        trapezia = get_scaled_trapezia_agc_ramp_rate(trapezia, np.where(regulation, ramp_rate, np.nan))
+
+        # Scale by UIGF - same procedure as scaling for AGC enablement max
+        trapezia = get_scaled_trapezia_agc_enablement_limit_rhs(trapezia, np.where(regulation, table['uigf'], np.nan))
+
+    return trapezia
+
+
+def get_trader_fcas_availability_statuses(table) -> np.ndarray:
+    """
+    Get FCAS availability status for all offers. Vectorised equivalent of
+    get_trader_fcas_availability_status.
+
+    Parameters
+    ----------
+    table : dict
+        Columnar FCAS offer table. See get_trader_fcas_trapezia_scaled.
+
+    Returns
+    -------
+    Boolean array with one element per offer
+    """
+
+    # Scaled FCAS trapezia
+    trapezia = get_trader_fcas_trapezia_scaled(table)
+
+    # Max availability condition
+    cond_1 = trapezia['MaxAvail'] > 0
+
+    # At least one quantity band for the service must have positive value
+    cond_2 = table['quantity_bands'].max(axis=1) > 0
+
+    # Energy offer must be greater than service enablement min - True if no energy offer
+    energy_max_avail = np.where(table['semi_dispatch'] == '1', table['uigf'], table['energy_max_avail'])
+    cond_3 = np.isnan(energy_max_avail) | (energy_max_avail >= trapezia['EnablementMin'])
+
+    # Enablement max must be greater than 0
+    cond_4 = trapezia['EnablementMax'] >= 0
+
+    # Unit must be operating between enablement min and enablement max
+    cond_5 = (trapezia['EnablementMin'] <= table['initial_mw']) & (table['initial_mw'] <= trapezia['EnablementMax'])
+
+    # AGC must be enabled for regulation FCAS
+    cond_6 = ~np.isin(table['trade_type'], REGULATION_OFFERS) | (table['agc_status'] == '1')
+
+    return cond_1 & cond_2 & cond_3 & cond_4 & cond_5 & cond_6
+
+
 def get_generator_effective_regulation_raise_max_available(data, trader_id) -> float:
     """Get effective R5RE max available"""
 
@@ -1309,8 +1548,8 @@ def check_fcas_availability_sample(data_dir, observed, trade_type, n=5) -> pd.Da
         # Case data in json format
         data_json = loaders.load_dispatch_interval_json(data_dir, 2019, 10, day, interval)
 
-        # Get NEMDE model data as a Python dictionary
-        data = json.loads(data_json)
+        # Get NEMDE model data as a Python dictionary - indexed as offers are checked individually
+        data = IndexedCasefile(json.loads(data_json))
 
         # Dispatch interval
         dispatch_interval = f'{2019}{10:02}{day:02}{interval:03}'
@@ -1443,8 +1682,8 @@ def check_fcas_availability_status_sample(data_dir, n=5):
         # Case data in json format
         data_json = loaders.load_dispatch_interval_json(data_dir, 2019, 10, day, interval)
 
-        # Get NEMDE model data as a Python dictionary
-        case_data = json.loads(data_json)
+        # Get NEMDE model data as a Python dictionary - indexed as offers are checked individually
+        case_data = IndexedCasefile(json.loads(data_json))
 
         # Check FCAS availability for dispatch interval - find all generators for which a difference exists
         _, _, difference = check_fcas_availability_status(case_data)
@@ -45,3 +45,22 @@ class CasefileOptionsError(ValueError):
     """
     Raised when user defined options are set incorrectly
     """
+
+
+class CasefileStoreError(ValueError):
+    """
+    Raised if a stored casefile has an unrecognised format or version
+    """
+
+
+class CodecError(ValueError):
+    """
+    Raised if compression codec is not recognised or not installed
+    """
+
+
+class DatabaseLoadError(ValueError):
+    """
+    Raised if loading rows into the database produces warnings other than
+    skipped duplicate keys e.g. truncated or converted values
+    """
@@ -0,0 +1,203 @@
+"""
+Read-through cache for parsed casefiles
+"""
+
+import os
+import hashlib
+import threading
+import collections
+
+from nemde.io import store
+from nemde.errors import CasefileStoreError
+
+
+class CasefileCache:
+    """
+    Cache parsed casefiles in memory and (optionally) on disk
+
+    Casefiles are held in memory as serialized blobs, so each load returns an
+    independent copy that can be modified by the caller. Casefiles written to
+    the cache directory use the casefile store format.
+
+    Parameters
+    ----------
+    max_items : int
+        Max number of casefiles held in memory. Set to 0 to disable in-memory
+        caching.
+
+    cache_dir : str or None
+        Directory used to persist cached casefiles. Disk cache is disabled
+        if None.
+
+    max_bytes : int
+        Max total size of casefiles in cache directory. Least recently used
+        casefiles are removed once this size is exceeded.
+    """
+
+    def __init__(self, max_items=8, cache_dir=None, max_bytes=2 * 1024 ** 3):
+        self.max_items = max_items
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_path(self, key):
+        """Path to cached casefile in cache directory"""
+
+        return os.path.join(self.cache_dir, f'{key}.casefile')
+
+    def get(self, key):
+        """
+        Get casefile from cache
+
+        Parameters
+        ----------
+        key : str
+            Cache key
+
+        Returns
+        -------
+        Casefile as a dictionary or None if casefile not in cache
+        """
+
+        with self._lock:
+            blob = self._items.get(key)
+            if blob is not None:
+                self._items.move_to_end(key)
+
+        if blob is not None:
+            return store.loads(blob)
+
+        if self.cache_dir is None:
+            return None
+
+        path = self.get_path(key)
+        try:
+            with open(path, 'rb') as f:
+                blob = f.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            casefile = store.loads(blob)
+        except CasefileStoreError:
+            return None
+
+        # Update modification time so eviction removes least recently used casefiles
+        os.utime(path)
+        self._set_item(key, blob)
+
+        return casefile
+
+    def set(self, key, casefile, persist=True):
+        """
+        Add casefile to cache
+
+        Parameters
+        ----------
+        key : str
+            Cache key
+
+        casefile : dict
+            Parsed casefile
+
+        persist : bool
+            Write casefile to cache directory (if cache directory specified)
+        """
+
+        blob = store.dumps(casefile)
+        self._set_item(key, blob)
+
+        if persist and (self.cache_dir is not None):
+            self._write(key, blob)
+
+    def clear(self):
+        """Remove all casefiles held in memory"""
+
+        with self._lock:
+            self._items.clear()
+
+    def _set_item(self, key, blob):
+        """Add serialized casefile to in-memory cache"""
+
+        if self.max_items <= 0:
+            return
+
+        with self._lock:
+            self._items[key] = blob
+            self._items.move_to_end(key)
+
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def _write(self, key, blob):
+        """Write serialized casefile to cache directory and evict old casefiles"""
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        path = self.get_path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(blob)
+
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        """Remove least recently used casefiles until cache directory is within size limit"""
+
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.casefile'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+            total -= size
+
+
+def get_cache_key(case_id, sections=None):
+    """Cache key for a casefile - includes a digest of retained sections if specified"""
+
+    if sections is None:
+        return case_id
+
+    digest = hashlib.sha1(repr(sorted((k, None if v is None else sorted(v))
+                                      for k, v in sections.items())).encode('utf-8')).hexdigest()
+
+    return f'{case_id}-{digest[:10]}'
+
+
+_casefile_cache = None
+_casefile_cache_lock = threading.Lock()
+
+
+def get_casefile_cache():
+    """
+    Get casefile cache shared within the process. Configured using
+    CASEFILE_CACHE_SIZE (max casefiles held in memory), CASEFILE_CACHE_DIR
+    (disk cache directory) and CASEFILE_CACHE_MAX_BYTES (max disk cache size)
+    environment variables.
+    """
+
+    global _casefile_cache
+
+    # Lock ensures threads loading casefiles at the same time (e.g. prefetching) share a single cache
+    with _casefile_cache_lock:
+        if _casefile_cache is None:
+            _casefile_cache = CasefileCache(
+                max_items=int(os.environ.get('CASEFILE_CACHE_SIZE', 8)),
+                cache_dir=os.environ.get('CASEFILE_CACHE_DIR') or None,
+                max_bytes=int(os.environ.get('CASEFILE_CACHE_MAX_BYTES', 2 * 1024 ** 3)))
+
+    return _casefile_cache
@@ -4,13 +4,288 @@ Load NEMDE casefile
 
 import os
 import io
-import zlib
+import re
 import zipfile
+import datetime
+import threading
+import collections
 
-import xmltodict
+from nemde.io import codec
+from nemde.io import store
+from nemde.io.cache import get_casefile_cache, get_cache_key
+from nemde.io.parser import parse_casefile, filter_sections
+from nemde.io.database import queries
+from nemde.errors import CasefileNotFoundError, CasefileValueError
 
-from nemde.io.database.mysql import connect_to_database
-from nemde.errors import CasefileNotFoundError, CasefileQueryError, CasefileValueError
+
+class CasefileArchive:
+    """
+    Reader for monthly NEMDE casefile archives
+
+    Monthly archives contain a zip file for each day, which in turn contains a
+    casefile for each dispatch interval. The member index for each monthly
+    archive is built once, and recently used daily archives are kept in memory
+    so consecutive intervals can be read without decompressing the daily
+    archive again. Archives may be shared between threads - open archives and
+    the daily archive cache are guarded by a lock.
+
+    Parameters
+    ----------
+    data_dir : str
+        Path to directory containing NEMDE case file data
+
+    cache_size : int
+        Max number of daily archives to keep in memory
+    """
+
+    def __init__(self, data_dir, cache_size=2):
+        self.data_dir = data_dir
+        self.cache_size = cache_size
+
+        # Open monthly archives and daily archive member names keyed by (year, month)
+        self._archives = {}
+        self._members = {}
+
+        # Recently used daily archives keyed by (year, month, day)
+        self._days = collections.OrderedDict()
+
+        # Guards open archives and cached daily archives
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Close all open archives and clear cached daily archives. Archives are
+        opened again if the reader is used after being closed.
+        """
+
+        with self._lock:
+            for z in self._archives.values():
+                z.close()
+
+            self._days.clear()
+            self._archives.clear()
+            self._members.clear()
+
+    def _get_month_archive(self, year, month):
+        """Open monthly archive and index daily archive member names"""
+
+        with self._lock:
+            return self._open_month_archive(year=year, month=month)
+
+    def _open_month_archive(self, year, month):
+        """Open monthly archive if not already open - lock must be held"""
+
+        if (year, month) in self._archives:
+            return self._archives[(year, month)], self._members[(year, month)]
+
+        path = os.path.join(self.data_dir, f'NEMDE_{year}_{month:02}.zip')
+        if not os.path.isfile(path):
+            raise CasefileNotFoundError(f'Archive not found: {path}')
+
+        z_1 = zipfile.ZipFile(path)
+        names = set(z_1.namelist())
+
+        if f'NEMDE_{year}_{month:02}/NEMDE_Market_Data/' in names:
+            prefix = f'NEMDE_{year}_{month:02}/NEMDE_Market_Data/NEMDE_Files/'
+        elif f'{month:02}/' in names:
+            prefix = f'{month:02}/NEMDE_Market_Data/NEMDE_Files/'
+        else:
+            z_1.close()
+            raise Exception('Unexpected NEMDE directory structure')
+
+        # Daily archive member names keyed by day
+        pattern = re.compile(re.escape(prefix) + r'NemSpdOutputs_(\d{8})_loaded\.zip')
+        members = {}
+        for name in names:
+            match = pattern.fullmatch(name)
+            if match is not None:
+                members[int(match.group(1)[6:])] = name
+
+        self._archives[(year, month)] = z_1
+        self._members[(year, month)] = members
+
+        return z_1, members
+
+    def get_day_archive(self, year, month, day):
+        """
+        Get daily archive, reading it into memory if not already cached.
+        Daily archives are held in memory so evicted archives are not closed -
+        they remain readable by threads still using them.
+        """
+
+        key = (year, month, day)
+
+        with self._lock:
+            if key in self._days:
+                self._days.move_to_end(key)
+                return self._days[key]
+
+            z_1, members = self._open_month_archive(year=year, month=month)
+
+            try:
+                z_2_name = members[day]
+            except KeyError:
+                raise CasefileNotFoundError(f'Daily archive not found: {year}{month:02}{day:02}')
+
+            with z_1.open(z_2_name) as z_2:
+                z_3 = zipfile.ZipFile(io.BytesIO(z_2.read()))
+
+            # Evict least recently used daily archives
+            self._days[key] = z_3
+            while len(self._days) > self.cache_size:
+                self._days.popitem(last=False)
+
+            return z_3
+
+    def _read(self, z_3, name):
+        """Read member of daily archive - reads from a shared archive are serialised"""
+
+        with self._lock:
+            return z_3.read(name)
+
+    def load_xml(self, year, month, day, interval):
+        """
+        Load casefile for a given dispatch interval
+
+        Parameters
+        ----------
+        year : int
+            Dispatch interval year
+
+        month : int
+            Dispatch interval month
+
+        day : int
+            Dispatch interval day
+
+        interval : int
+            Dispatch interval ID [1, 288]
+
+        Returns
+        -------
+        Casefile as bytes
+        """
+
+        z_3 = self.get_day_archive(year=year, month=month, day=day)
+
+        try:
+            z_3_name = f'NEMSPDOutputs_{year}{month:02}{day:02}{interval:03}00.loaded'
+            return self._read(z_3, z_3_name)
+        except KeyError:
+            pass
+
+        try:
+            z_3_name = f'NEMSPDOutputs_{year}{month:02}{day:02}{interval:03}00_OCD.loaded'
+            return self._read(z_3, z_3_name)
+        except KeyError:
+            raise CasefileNotFoundError(f'Casefile not found: {year}{month:02}{day:02}{interval:03}')
+
+    def iter_day(self, year, month, day):
+        """
+        Iterate over all casefiles for a given day in interval order. The daily
+        archive is only opened once.
+
+        Parameters
+        ----------
+        year : int
+            Dispatch interval year
+
+        month : int
+            Dispatch interval month
+
+        day : int
+            Dispatch interval day
+
+        Returns
+        -------
+        Generator yielding (case_id, casefile) tuples. Casefiles are bytes.
+        """
+
+        z_3 = self.get_day_archive(year=year, month=month, day=day)
+
+        # Map intervals to member names - use '_OCD' files only if no standard file exists
+        pattern = re.compile(rf'NEMSPDOutputs_{year}{month:02}{day:02}(\d{{3}})00(_OCD)?\.loaded')
+        members = {}
+        for name in z_3.namelist():
+            match = pattern.fullmatch(name)
+            if match is None:
+                continue
+
+            interval = int(match.group(1))
+            if (interval not in members) or (match.group(2) is None):
+                members[interval] = name
+
+        for interval in sorted(members.keys()):
+            yield f'{year}{month:02}{day:02}{interval:03}', self._read(z_3, members[interval])
+
+    def iter_month(self, year, month):
+        """Iterate over all casefiles for a given month in interval order"""
+
+        _, members = self._get_month_archive(year=year, month=month)
+
+        for day in sorted(members.keys()):
+            yield from self.iter_day(year=year, month=month, day=day)
+
+    def iter_range(self, start, end):
+        """
+        Iterate over casefiles between two case IDs (inclusive) in interval
+        order. Case IDs are strings with format 'YYYYMMDDIII'.
+        """
+
+        start_date = datetime.date(int(start[:4]), int(start[4:6]), int(start[6:8]))
+        end_date = datetime.date(int(end[:4]), int(end[4:6]), int(end[6:8]))
+
+        date = start_date
+        while date <= end_date:
+            _, members = self._get_month_archive(year=date.year, month=date.month)
+
+            if date.day in members:
+                for case_id, casefile in self.iter_day(year=date.year, month=date.month, day=date.day):
+                    if start <= case_id <= end:
+                        yield case_id, casefile
+
+            date += datetime.timedelta(days=1)
+
+
+# Archive readers shared across calls keyed by data directory. Least recently used readers are closed once the max
+# number of readers is exceeded.
+MAX_CASEFILE_ARCHIVES = 4
+_casefile_archives = collections.OrderedDict()
+_casefile_archives_lock = threading.Lock()
+
+
+def get_casefile_archive(data_dir):
+    """Get archive reader for a given data directory - reused across calls"""
+
+    with _casefile_archives_lock:
+        if data_dir in _casefile_archives:
+            _casefile_archives.move_to_end(data_dir)
+            return _casefile_archives[data_dir]
+
+        archive = CasefileArchive(data_dir=data_dir)
+        _casefile_archives[data_dir] = archive
+
+        while len(_casefile_archives) > MAX_CASEFILE_ARCHIVES:
+            _, evicted = _casefile_archives.popitem(last=False)
+            evicted.close()
+
+        return archive
+
+
+def close_casefile_archives():
+    """Close archive readers shared by load_xml_from_archive"""
+
+    with _casefile_archives_lock:
+        for archive in _casefile_archives.values():
+            archive.close()
+
+        _casefile_archives.clear()
 
 
 def load_xml_from_archive(data_dir, year, month, day, interval):
@@ -39,26 +314,34 @@ def load_xml_from_archive(data_dir, year, month, day, interval):
     File object corresponding to specified dispatch interval
     """
 
-    z_1_name = f'NEMDE_{year}_{month:02}.zip'
+    archive = get_casefile_archive(data_dir=data_dir)
 
-    with zipfile.ZipFile(os.path.join(data_dir, z_1_name)) as z_1:
-        if f'NEMDE_{year}_{month:02}/NEMDE_Market_Data/' in z_1.namelist():
-            z_2_name = f'NEMDE_{year}_{month:02}/NEMDE_Market_Data/NEMDE_Files/NemSpdOutputs_{year}{month:02}{day:02}_loaded.zip'
-        elif f'{month:02}/' in z_1.namelist():
-            z_2_name = f'{month:02}/NEMDE_Market_Data/NEMDE_Files/NemSpdOutputs_{year}{month:02}{day:02}_loaded.zip'
-        else:
-            raise Exception('Unexpected NEMDE directory structure')
+    return archive.load_xml(year=year, month=month, day=day, interval=interval)
+
+
+def iter_xml_from_archive(data_dir, start, end):
+    """
+    Iterate over casefiles between two case IDs in a single pass over the
+    archives
+
+    Parameters
+    ----------
+    data_dir : str
+        Path to directory containing NEMDE case file data
 
-        with z_1.open(z_2_name) as z_2:
-            z_2_data = io.BytesIO(z_2.read())
+    start : str
+        First case ID to load (inclusive). Format 'YYYYMMDDIII'.
 
-            with zipfile.ZipFile(z_2_data) as z_3:
-                try:
-                    z_3_name = f'NEMSPDOutputs_{year}{month:02}{day:02}{interval:03}00.loaded'
-                    return z_3.open(z_3_name).read()
-                except KeyError:
-                    z_3_name = f'NEMSPDOutputs_{year}{month:02}{day:02}{interval:03}00_OCD.loaded'
-                    return z_3.open(z_3_name).read()
+    end : str
+        Last case ID to load (inclusive). Format 'YYYYMMDDIII'.
+
+    Returns
+    -------
+    Generator yielding (case_id, casefile) tuples. Casefiles are bytes.
+    """
+
+    with CasefileArchive(data_dir=data_dir, cache_size=1) as archive:
+        yield from archive.iter_range(start=start, end=end)
 
 
 def load_xml_from_database(year, month, day, interval):
@@ -87,21 +370,20 @@ def load_xml_from_database(year, month, day, interval):
     schema = os.environ.get('MYSQL_SCHEMA')
     case_id = f'{year}{month:02}{day:02}{interval:03}'
 
-    # Connect to database and extract NEMDE casefile
-    conn, cur = connect_to_database()
-    sql = f"SELECT casefile FROM {schema}.casefiles WHERE case_id='{case_id}'"
-    cur.execute(sql)
-    result = cur.fetchall()
+    # Extract compressed NEMDE casefile
+    blob = queries.get_casefile(schema=schema, case_id=case_id)
 
-    # Check result set is expected length
-    if not result:
+    if blob is None:
         raise CasefileNotFoundError
 
-    if len(result) > 1:
-        raise CasefileQueryError
-
     # Extract casefile string from record
-    casefile = zlib.decompress(result[0].get('casefile')).decode('utf-8')
+    return decompress_casefile(blob)
+
+
+def decompress_casefile(blob):
+    """Convert compressed casefile stored in database to an XML string"""
+
+    casefile = codec.decompress(blob).decode('utf-8')
 
     if isinstance(casefile, str):
         return casefile
@@ -109,8 +391,69 @@ def load_xml_from_database(year, month, day, interval):
         raise CasefileValueError
 
 
-def load_base_case(case_id):
-    """Load case data as dictionary given case ID"""
+def iter_xml_from_database(case_ids=None, start=None, end=None):
+    """
+    Load many casefiles from the database using a single query. Either a
+    list of case IDs or a start and end case ID must be specified.
+
+    Parameters
+    ----------
+    case_ids : list or None
+        Case IDs to load. Case IDs missing from the database are skipped.
+
+    start : str or None
+        First case ID to load (inclusive)
+
+    end : str or None
+        Last case ID to load (inclusive)
+
+    Returns
+    -------
+    Generator yielding tuples of the form (case_id, casefile XML string)
+    ordered by case ID
+    """
+
+    schema = os.environ.get('MYSQL_SCHEMA')
+
+    for case_id, blob in queries.iter_casefiles(schema=schema, case_ids=case_ids, start=start, end=end):
+        yield case_id, decompress_casefile(blob)
+
+
+def load_base_case(case_id, sections=None):
+    """
+    Load case data as dictionary given case ID
+
+    Parameters
+    ----------
+    case_id : str
+        Case ID with format 'YYYYMMDDIII'
+
+    sections : dict or None
+        Only retain selected casefile sections. Keys are paths to elements
+        using dot notation, values are tuples of attributes to retain or None
+        to retain all attributes. E.g. {'NEMSPDCaseFile.NemSpdInputs': None}.
+        All sections are retained if None.
+
+    Returns
+    -------
+    Casefile as a dictionary
+    """
+
+    # Check casefiles that have recently been loaded
+    cache = get_casefile_cache()
+    key = get_cache_key(case_id=case_id, sections=sections)
+
+    casefile = cache.get(key)
+    if casefile is not None:
+        return casefile
+
+    # Use pre-parsed casefile if a casefile store is specified. Not cached - the store is read without parsing XML.
+    store_dir = os.environ.get('CASEFILE_STORE_DIR')
+    if store_dir:
+        try:
+            return filter_sections(store.load_casefile(store_dir=store_dir, case_id=case_id), sections)
+        except CasefileNotFoundError:
+            pass
 
     # Decompose case ID
     year, month, day, interval = (int(case_id[:4]), int(case_id[4:6]),
@@ -120,11 +463,41 @@ def load_base_case(case_id):
     # base = load_xml_from_archive(data_dir=os.getenv('CASEFILE_DIR'), year=year,
     #  month=month, day=day, interval=interval)
     base = load_xml_from_database(year=year, month=month, day=day, interval=interval)
+    casefile = parse_casefile(base, sections=sections)
+    cache.set(key, casefile)
+
+    return casefile
+
+
+def load_base_cases(case_ids=None, start=None, end=None, sections=None):
+    """
+    Load many casefiles from the database using a single query. Casefiles
+    are parsed as rows are received. The casefile cache and store used by
+    load_base_case are bypassed - bulk loads would otherwise evict recently
+    used casefiles from the cache, and each casefile is read once.
+
+    Parameters
+    ----------
+    case_ids : list or None
+        Case IDs to load. Case IDs missing from the database are skipped.
 
-    # Force some nodes to always have lists
-    force_list = ('Trade', 'TradeTypePriceStructure',)
+    start : str or None
+        First case ID to load (inclusive)
 
-    return xmltodict.parse(base, force_list=force_list)
+    end : str or None
+        Last case ID to load (inclusive)
+
+    sections : dict or None
+        Only retain selected casefile sections. See nemde.io.parser.parse_casefile.
+
+    Returns
+    -------
+    Generator yielding tuples of the form (case_id, casefile dictionary)
+    ordered by case ID
+    """
+
+    for case_id, xml in iter_xml_from_database(case_ids=case_ids, start=start, end=end):
+        yield case_id, parse_casefile(xml, sections=sections)
 
 
 def load_base_case_from_archive(case_id, data_dir):
@@ -138,7 +511,11 @@ def load_base_case_from_archive(case_id, data_dir):
     base = load_xml_from_archive(data_dir=data_dir, year=year,
                                  month=month, day=day, interval=interval)
 
-    # Force some nodes to always have lists
-    force_list = ('Trade', 'TradeTypePriceStructure',)
+    return parse_casefile(base)
+
+
+def iter_base_cases_from_archive(data_dir, start, end):
+    """Iterate over case data as dictionaries for case IDs between start and end (inclusive)"""
 
-    return xmltodict.parse(base, force_list=force_list)
+    for case_id, base in iter_xml_from_archive(data_dir=data_dir, start=start, end=end):
+        yield case_id, parse_casefile(base)
@@ -0,0 +1,134 @@
+"""
+Compress data saved to the database. Compressed data is prefixed with a
+header byte identifying the codec used, so blobs compressed with different
+codecs can be stored in the same column.
+
+Blobs saved before codec headers were introduced are raw zlib streams. These
+begin with 0x78 and are decompressed with zlib.
+"""
+
+import os
+import zlib
+import lzma
+import collections
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+from nemde.errors import CodecError
+
+
+# Codec header byte, compress function taking (data, level), and decompress function
+Codec = collections.namedtuple('Codec', ['header', 'compress', 'decompress'])
+
+# First byte of raw zlib streams (deflate with 32K window)
+ZLIB_LEGACY_HEADER = 0x78
+
+
+def _compress_zlib(data, level=None):
+    return zlib.compress(data, zlib.Z_DEFAULT_COMPRESSION if level is None else level)
+
+
+def _compress_lzma(data, level=None):
+    return lzma.compress(data, preset=level)
+
+
+def _compress_zstd(data, level=None):
+    return zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+
+
+def _decompress_zstd(data):
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def _compress_lz4(data, level=None):
+    return lz4.frame.compress(data, compression_level=0 if level is None else level)
+
+
+# Available codecs - zstd and lz4 are only available if installed
+CODECS = {
+    'zlib': Codec(header=0x01, compress=_compress_zlib, decompress=zlib.decompress),
+    'lzma': Codec(header=0x02, compress=_compress_lzma, decompress=lzma.decompress),
+}
+
+if zstandard is not None:
+    CODECS['zstd'] = Codec(header=0x03, compress=_compress_zstd, decompress=_decompress_zstd)
+
+if lz4 is not None:
+    CODECS['lz4'] = Codec(header=0x04, compress=_compress_lz4, decompress=lz4.frame.decompress)
+
+# Codecs keyed by header byte
+HEADERS = {v.header: v for v in CODECS.values()}
+
+
+def get_default_codec():
+    """Codec used if none specified - set using COMPRESSION_CODEC environment variable"""
+
+    return os.environ.get('COMPRESSION_CODEC') or 'zlib'
+
+
+def compress(data, codec=None, level=None) -> bytes:
+    """
+    Compress data and prefix with codec header
+
+    Parameters
+    ----------
+    data : bytes
+        Data to compress
+
+    codec : str or None
+        Name of codec (key in CODECS). Uses default codec if None.
+
+    level : int or None
+        Compression level. Uses codec's default level if None.
+
+    Returns
+    -------
+    Compressed data
+    """
+
+    name = get_default_codec() if codec is None else codec
+
+    try:
+        selected = CODECS[name]
+    except KeyError:
+        raise CodecError(f"Unrecognised codec: {name}. Must be one of {list(CODECS.keys())}")
+
+    return bytes([selected.header]) + selected.compress(data, level)
+
+
+def decompress(blob) -> bytes:
+    """
+    Decompress data using codec identified by header byte
+
+    Parameters
+    ----------
+    blob : bytes
+        Compressed data
+
+    Returns
+    -------
+    Decompressed data
+    """
+
+    if not blob:
+        raise CodecError('Cannot decompress empty blob')
+
+    header = blob[0]
+
+    if header == ZLIB_LEGACY_HEADER:
+        return zlib.decompress(blob)
+
+    try:
+        selected = HEADERS[header]
+    except KeyError:
+        raise CodecError(f'Unrecognised codec header: {header:#04x}. Codec may not be installed.')
+
+    return selected.decompress(blob[1:])
@@ -0,0 +1,107 @@
+"""
+Select database backend. Set DATABASE_BACKEND environment variable to 'mysql'
+(default) or 'sqlite'. Functions in this module are dispatched to the
+selected backend, so call sites do not depend on the backend used.
+"""
+
+import os
+import importlib
+
+
+# Modules implementing each backend
+BACKENDS = {
+    'mysql': 'nemde.io.database.mysql',
+    'sqlite': 'nemde.io.database.sqlite',
+}
+
+
+def get_backend_name():
+    """Name of selected database backend"""
+
+    return os.environ.get('DATABASE_BACKEND') or 'mysql'
+
+
+def get_backend(name=None):
+    """
+    Get module implementing database backend
+
+    Parameters
+    ----------
+    name : str or None
+        Name of backend. Uses DATABASE_BACKEND environment variable if None.
+
+    Returns
+    -------
+    Backend module
+    """
+
+    name = get_backend_name() if name is None else name
+
+    try:
+        return importlib.import_module(BACKENDS[name])
+    except KeyError:
+        raise ValueError(f"Unrecognised database backend: {name}. Must be one of {list(BACKENDS.keys())}")
+
+
+def get_connection(*args, **kwargs):
+    return get_backend().get_connection(*args, **kwargs)
+
+
+def initialise_tables(*args, **kwargs):
+    return get_backend().initialise_tables(*args, **kwargs)
+
+
+def upgrade_schema(*args, **kwargs):
+    return get_backend().upgrade_schema(*args, **kwargs)
+
+
+def post_entry(*args, **kwargs):
+    return get_backend().post_entry(*args, **kwargs)
+
+
+def post_entries(*args, **kwargs):
+    return get_backend().post_entries(*args, **kwargs)
+
+
+def load_entries(*args, **kwargs):
+    return get_backend().load_entries(*args, **kwargs)
+
+
+def run_query(*args, **kwargs):
+    return get_backend().run_query(*args, **kwargs)
+
+
+def stream_query(*args, **kwargs):
+    return get_backend().stream_query(*args, **kwargs)
+
+
+def get_casefile_validation_results(*args, **kwargs):
+    return get_backend().get_casefile_validation_results(*args, **kwargs)
+
+
+def get_test_run_validation_results(*args, **kwargs):
+    return get_backend().get_test_run_validation_results(*args, **kwargs)
+
+
+def iter_test_run_validation_results(*args, **kwargs):
+    return get_backend().iter_test_run_validation_results(*args, **kwargs)
+
+
+def get_largest_differences(*args, **kwargs):
+    return get_backend().get_largest_differences(*args, **kwargs)
+
+
+def get_upload_manifest(*args, **kwargs):
+    return get_backend().get_upload_manifest(*args, **kwargs)
+
+
+def save_upload_manifest(*args, **kwargs):
+    return get_backend().save_upload_manifest(*args, **kwargs)
+
+
+def get_most_recent_test_run_id(*args, **kwargs):
+    return get_backend().get_most_recent_test_run_id(*args, **kwargs)
+
+
+def get_most_recent_test_group_id(*args, **kwargs):
+    return get_backend().get_most_recent_test_group_id(*args, **kwargs)
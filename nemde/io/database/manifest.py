@@ -0,0 +1,112 @@
+"""
+Track casefiles uploaded to the database using a bitmap for each month. Bit
+(day - 1) * 288 + (interval - 1) is set once the casefile for that dispatch
+interval has been uploaded, so intervals remaining to be uploaded can be found
+without reading the casefiles table.
+"""
+
+import calendar
+
+from nemde.io.database import backend
+from nemde.io.database import queries
+
+
+# Dispatch intervals per day
+INTERVALS = 288
+
+
+def get_month_key(year, month):
+    """Key identifying manifest for a given month (e.g. '202104')"""
+
+    return f'{year}{month:02}'
+
+
+def get_bit_index(case_id):
+    """Position of bit corresponding to case ID"""
+
+    return (int(case_id[6:8]) - 1) * INTERVALS + int(case_id[8:]) - 1
+
+
+def create_bitmap(year, month):
+    """Empty bitmap for a given month"""
+
+    days = calendar.monthrange(year, month)[1]
+
+    return bytearray((days * INTERVALS + 7) // 8)
+
+
+def is_uploaded(bitmap, case_id):
+    """Check if bit for case ID is set"""
+
+    index = get_bit_index(case_id)
+
+    return bool(bitmap[index // 8] & (1 << (index % 8)))
+
+
+def set_uploaded(bitmap, case_ids):
+    """Set bits for case IDs. Bitmap is modified in place."""
+
+    for case_id in case_ids:
+        index = get_bit_index(case_id)
+        bitmap[index // 8] |= 1 << (index % 8)
+
+    return bitmap
+
+
+def get_missing_case_ids(bitmap, year, month):
+    """Sorted case IDs for a given month with bits that are not set"""
+
+    days = calendar.monthrange(year, month)[1]
+    case_ids = (f'{year}{month:02}{d:02}{i:03}' for d in range(1, days + 1) for i in range(1, INTERVALS + 1))
+
+    return [i for i in case_ids if not is_uploaded(bitmap=bitmap, case_id=i)]
+
+
+def build_manifest(schema, year, month):
+    """
+    Construct bitmap from casefiles in the database. Only casefiles for the
+    given month are read.
+    """
+
+    start, end = f'{year}{month:02}01001', f'{year}{month:02}31{INTERVALS}'
+    case_ids = queries.get_case_ids(schema=schema, start=start, end=end)
+
+    return set_uploaded(bitmap=create_bitmap(year=year, month=month), case_ids=case_ids)
+
+
+def load_manifest(schema, year, month):
+    """
+    Load bitmap for a given month. If no manifest has been saved the bitmap
+    is constructed from casefiles in the database and saved.
+
+    Parameters
+    ----------
+    schema : str
+        Name of database
+
+    year : int
+        Manifest year
+
+    month : int
+        Manifest month
+
+    Returns
+    -------
+    Bitmap as bytearray
+    """
+
+    bitmap = backend.get_upload_manifest(schema=schema, month=get_month_key(year, month))
+
+    if bitmap is not None:
+        return bytearray(bitmap)
+
+    bitmap = build_manifest(schema=schema, year=year, month=month)
+    save_manifest(schema=schema, year=year, month=month, bitmap=bitmap)
+
+    return bitmap
+
+
+def save_manifest(schema, year, month, bitmap):
+    """Save bitmap for a given month"""
+
+    backend.save_upload_manifest(schema=schema, month=get_month_key(year, month), bitmap=bitmap)
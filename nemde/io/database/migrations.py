@@ -0,0 +1,107 @@
+"""
+Versioned changes to database tables. Tables are created from CSV templates,
+with migrations used to add secondary indexes and evolve existing tables.
+
+Each migration is a tuple of the form (version, description, operations).
+Operations describe changes and are applied by each storage backend. Applying
+an operation must be idempotent so partially applied migrations can be re-run.
+"""
+
+import collections
+
+
+def index_exists(cur, schema, table, name):
+    """Check if index exists"""
+
+    sql = ("SELECT COUNT(*) AS count FROM information_schema.statistics "
+           "WHERE table_schema=%s AND table_name=%s AND index_name=%s")
+    cur.execute(sql, (schema, table, name))
+
+    return cur.fetchall()[0]['count'] > 0
+
+
+def column_exists(cur, schema, table, column):
+    """Check if column exists"""
+
+    sql = ("SELECT COUNT(*) AS count FROM information_schema.columns "
+           "WHERE table_schema=%s AND table_name=%s AND column_name=%s")
+    cur.execute(sql, (schema, table, column))
+
+    return cur.fetchall()[0]['count'] > 0
+
+
+# Operation adding a secondary index 'name' on 'columns' of 'table'
+AddIndex = collections.namedtuple('AddIndex', ['table', 'name', 'columns'])
+
+# Operation adding a column with a given definition e.g. 'VARCHAR(20)'
+AddColumn = collections.namedtuple('AddColumn', ['table', 'column', 'definition'])
+
+# Operation changing the definition of an existing column
+ModifyColumn = collections.namedtuple('ModifyColumn', ['table', 'column', 'definition'])
+
+
+def apply_operation(cur, schema, operation):
+    """
+    Apply migration operation to MySQL database. Operations are skipped if
+    they have already been applied.
+
+    Parameters
+    ----------
+    cur : MySQLdb.cursors.DictCursor
+        Database cursor
+
+    schema : str
+        Name of database
+
+    operation : AddIndex, AddColumn or ModifyColumn
+        Operation to apply
+    """
+
+    if isinstance(operation, AddIndex):
+        if not index_exists(cur=cur, schema=schema, table=operation.table, name=operation.name):
+            columns_sql = ', '.join(f'`{c}`' for c in operation.columns)
+            cur.execute(f"CREATE INDEX {operation.name} ON {schema}.{operation.table} ({columns_sql})")
+
+    elif isinstance(operation, AddColumn):
+        if not column_exists(cur=cur, schema=schema, table=operation.table, column=operation.column):
+            cur.execute(f"ALTER TABLE {schema}.{operation.table} ADD COLUMN `{operation.column}` {operation.definition}")
+
+    elif isinstance(operation, ModifyColumn):
+        cur.execute(f"ALTER TABLE {schema}.{operation.table} MODIFY COLUMN `{operation.column}` {operation.definition}")
+
+    else:
+        raise ValueError(f'Unrecognised migration operation: {operation}')
+
+
+# Migrations applied in order of version. Never modify or remove a migration
+# once released - add a new migration instead.
+MIGRATIONS = [
+    (1, 'Index results by test group and run', [
+        AddIndex(table='results', name='idx_results_group_id_case_id', columns=['group_id', 'case_id']),
+        AddIndex(table='results', name='idx_results_run_id', columns=['run_id']),
+    ]),
+    (2, 'Index comparisons by test group and case', [
+        AddIndex(table='comparisons', name='idx_comparisons_group_id_key', columns=['group_id', 'key']),
+        AddIndex(table='comparisons', name='idx_comparisons_case_id', columns=['case_id']),
+    ]),
+    (3, 'Widen comparisons element ID to hold generic constraint IDs', [
+        ModifyColumn(table='comparisons', column='element_id', definition='VARCHAR(100)'),
+    ]),
+]
+
+
+def get_pending_migrations(applied):
+    """
+    Get migrations that have not been applied
+
+    Parameters
+    ----------
+    applied : set
+        Versions of migrations that have already been applied
+
+    Returns
+    -------
+    List of migrations sorted by version
+    """
+
+    return [i for i in sorted(MIGRATIONS, key=lambda x: x[0]) if i[0] not in applied]
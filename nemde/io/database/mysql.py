@@ -1,12 +1,29 @@
-"""Manage MYSQL database connection"""
+"""
+Manage MYSQL database connection. SQL is built by the queries module and
+shared with the SQLite module.
+"""
 
 import os
+import re
 import csv
 import time
 import json
+import tempfile
+import functools
+import threading
+import contextlib
 
 import MySQLdb
-from MySQLdb.cursors import DictCursor
+from MySQLdb.cursors import DictCursor, SSDictCursor
+
+from nemde.io.database import queries
+from nemde.io.database import migrations
+from nemde.io.database.utils import post_batches
+from nemde.errors import DatabaseLoadError
+
+
+# MySQL error code for duplicate key - reported as a warning for rows skipped by LOAD DATA ... IGNORE
+DUPLICATE_KEY_ERROR = 1062
 
 
 def get_database_credentials():
@@ -22,34 +39,249 @@ def get_database_credentials():
     return credentials
 
 
-def connect_to_database():
-    """Connect to MySQL database"""
+def connect(**kwargs):
+    """Open connection to MySQL database - retries if server is unavailable"""
 
     credentials = get_database_credentials()
 
     # MySQL connection object
     attempts = 1
-    while attempts <= 5:
+    while True:
         try:
-            conn = MySQLdb.connect(cursorclass=DictCursor, charset='utf8', **credentials)
-            break
+            return MySQLdb.connect(cursorclass=DictCursor, charset='utf8', **credentials, **kwargs)
         except MySQLdb.OperationalError as e:
             print(e)
+            if attempts >= 5:
+                raise
+
             time.sleep(attempts * 5)
 
         attempts += 1
 
-    # Cursor
-    cur = conn.cursor()
 
-    return conn, cur
+class ConnectionPool:
+    """
+    Thread-safe pool of database connections
+
+    Connections are checked for liveness if idle for longer than
+    'ping_interval' seconds. Connections inherited from a parent process
+    after a fork are discarded without being closed, as closing them would
+    also close the parent's connections.
+
+    Parameters
+    ----------
+    max_size : int
+        Max number of connections checked out at the same time
+
+    connect : function
+        Function used to open new connections
+
+    ping_interval : float
+        Idle time (seconds) after which connections are pinged before reuse
+
+    timeout : float or None
+        Max time (seconds) to wait for a connection. Wait indefinitely if None.
+    """
+
+    def __init__(self, max_size=4, connect=connect, ping_interval=30, timeout=None):
+        self.max_size = max_size
+        self.connect = connect
+        self.ping_interval = ping_interval
+        self.timeout = timeout
+
+        # Connections inherited from a parent process - references kept so they are never closed
+        self._inherited = []
+        self._reset()
+
+    def _reset(self):
+        """Initialise pool state for the current process"""
+
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+
+        # Idle connections and the time they were returned to the pool
+        self._idle = []
+
+    def after_fork(self):
+        """Discard connections inherited from parent process"""
+
+        self._inherited.extend(conn for conn, _ in self._idle)
+        self._reset()
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self.after_fork()
+
+    def _open(self):
+        conn = self.connect()
+        conn.autocommit(True)
+
+        return conn
+
+    def _is_alive(self, conn):
+        try:
+            conn.ping()
+            return True
+        except MySQLdb.Error:
+            return False
+
+    def acquire(self):
+        """Check out a connection from the pool"""
+
+        self._check_pid()
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f'No database connection available after {self.timeout}s')
+
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    conn, released = self._idle.pop()
+
+                if (time.monotonic() - released < self.ping_interval) or self._is_alive(conn):
+                    return conn
+
+                self._close(conn)
+
+            return self._open()
+
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn, discard=False):
+        """
+        Return connection to the pool
+
+        Parameters
+        ----------
+        conn : MySQLdb.Connection
+            Connection checked out using 'acquire'
+
+        discard : bool
+            Close connection instead of returning it to the pool
+        """
+
+        # Connection checked out before a fork - do not return it to this process's pool
+        if self._pid != os.getpid():
+            self._check_pid()
+            return
+
+        if discard:
+            self._close(conn)
+        else:
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+
+        self._slots.release()
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except MySQLdb.Error:
+            pass
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Check out connection - returned to the pool on exit, or discarded if an error occurs"""
+
+        conn = self.acquire()
+
+        try:
+            yield conn
+        except BaseException as e:
+            # Connection may be unusable after an operational error
+            discard = isinstance(e, MySQLdb.OperationalError)
+            if not discard:
+                try:
+                    conn.rollback()
+                except MySQLdb.Error:
+                    discard = True
+
+            self.release(conn, discard=discard)
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        """Close idle connections"""
 
+        self._check_pid()
 
-def close_connection(conn, cur):
-    """Close database connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
 
-    cur.close()
-    conn.close()
+        for conn, _ in idle:
+            self._close(conn)
+
+
+# Pools keyed by whether connections allow LOAD DATA LOCAL INFILE
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(local_infile=False):
+    """
+    Get connection pool shared within the process. Size set by MYSQL_POOL_SIZE
+    environment variable. Connections allowing LOAD DATA LOCAL INFILE are kept
+    in a separate pool, so other queries never use them.
+    """
+
+    # Lock ensures threads requesting a pool for the first time share a single pool
+    with _pools_lock:
+        pool = _pools.get(local_infile)
+
+        if pool is None:
+            pool = ConnectionPool(max_size=int(os.environ.get('MYSQL_POOL_SIZE', 4)),
+                                  connect=functools.partial(connect, local_infile=1) if local_infile else connect)
+            _pools[local_infile] = pool
+
+    return pool
+
+
+def _after_fork():
+    global _pools_lock
+
+    # Lock may have been held by another thread when the process forked
+    _pools_lock = threading.Lock()
+
+    for pool in _pools.values():
+        pool.after_fork()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+@contextlib.contextmanager
+def get_connection(cursorclass=None, schema=None, local_infile=False):
+    """
+    Check out connection from the pool and create a cursor
+
+    Parameters
+    ----------
+    cursorclass : class or None
+        Cursor class e.g. SSDictCursor. Uses DictCursor if None.
+
+    schema : str or None
+        Included for consistency with SQLite module - ignored
+
+    local_infile : bool
+        Use connection that allows LOAD DATA LOCAL INFILE
+
+    Returns
+    -------
+    Context manager yielding tuple of the form (connection, cursor)
+    """
+
+    with get_connection_pool(local_infile=local_infile).connection() as conn:
+        cur = conn.cursor() if cursorclass is None else conn.cursor(cursorclass)
+        try:
+            yield conn, cur
+        finally:
+            cur.close()
 
 
 def create_table(schema, table):
@@ -79,16 +311,15 @@ def create_table(schema, table):
     # SQL to construct column name component of MySQL syntax
     columns_sql = ', '.join([' '.join(c) for c in columns])
     sql_create_table = f"""CREATE TABLE IF NOT EXISTS {schema}.{table} ({columns_sql}, PRIMARY KEY (row_id))"""
-    conn, cur = connect_to_database()
 
-    # Create positions database if it doesn't already exist
-    sql_create_database = f"""CREATE DATABASE IF NOT EXISTS {schema}"""
-    cur.execute(sql_create_database)
-    conn.commit()
+    with get_connection() as (conn, cur):
+        # Create positions database if it doesn't already exist
+        sql_create_database = f"""CREATE DATABASE IF NOT EXISTS {schema}"""
+        cur.execute(sql_create_database)
+        conn.commit()
 
-    # Execute SQL statement then close database connection
-    cur.execute(sql_create_table)
-    close_connection(conn, cur)
+        # Execute SQL statement
+        cur.execute(sql_create_table)
 
 
 def initialise_tables(schema):
@@ -102,10 +333,62 @@ def initialise_tables(schema):
     """
 
     # Create tables
-    tables = ['results', 'casefiles', 'reports', 'test_run_info']
+    tables = ['results', 'casefiles', 'reports', 'test_run_info', 'comparisons', 'upload_manifest']
     for t in tables:
         create_table(schema, t)
 
+    # Add indexes and apply other changes to tables
+    upgrade_schema(schema=schema)
+
+
+def upgrade_schema(schema, verbose=True):
+    """
+    Apply pending migrations. Safe to run multiple times - migrations that
+    have been recorded in the 'schema_migrations' table are skipped, and a
+    lock prevents migrations being applied by several processes at once.
+
+    Parameters
+    ----------
+    schema : str
+        Name of database
+
+    verbose : bool
+        Print migrations as they are applied
+
+    Returns
+    -------
+    List of migration versions applied
+    """
+
+    create_table(schema, 'schema_migrations')
+
+    applied_versions = []
+    with get_connection() as (conn, cur):
+        cur.execute("SELECT GET_LOCK(%s, 300) AS acquired", (f'{schema}.schema_migrations',))
+        if not cur.fetchall()[0]['acquired']:
+            raise TimeoutError('Could not acquire schema migration lock')
+
+        try:
+            cur.execute(queries.get_statement('applied_migrations', schema))
+            applied = {i['version'] for i in cur.fetchall()}
+
+            for version, description, operations in migrations.get_pending_migrations(applied=applied):
+                for operation in operations:
+                    migrations.apply_operation(cur=cur, schema=schema, operation=operation)
+
+                cur.execute(queries.get_statement('record_migration', schema), (version, description, time.time()))
+                conn.commit()
+
+                applied_versions.append(version)
+                if verbose:
+                    print(f'Applied migration {version}: {description}')
+
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (f'{schema}.schema_migrations',))
+            cur.fetchall()
+
+    return applied_versions
+
 
 def post_entry(schema, table, entry):
     """
@@ -123,66 +406,267 @@ def post_entry(schema, table, entry):
         Data to post
     """
 
-    # Connect to MySQL database
-    conn, cur = connect_to_database()
-
     # Column names and values corresponding to those columns
     columns, values = zip(*entry.items())
 
-    # Columns components of SQL query
-    sql_columns = ', '.join(columns)
-
-    # Values placeholder
-    sql_values_placeholder = ', '.join(len(columns) * ['%s'])
-
     # SQL used to insert record into database table
-    sql = f'INSERT INTO {schema}.{table} ({sql_columns}) VALUES ({sql_values_placeholder})'
+    sql = queries.get_insert_statement(schema, table, columns)
 
     # Execute query and insert record into database
-    cur.execute(sql, values)
-    conn.commit()
+    with get_connection() as (conn, cur):
+        cur.execute(sql, values)
+        conn.commit()
+
+
+def post_entries(schema, table, entries, batch_size=100, ignore=False, verbose=True):
+    """
+    Record many entries in MySQL database. Entries are inserted in batches
+    using a single transaction per batch.
+
+    Parameters
+    ----------
+    schema : str
+        Name of database
+
+    table : str
+        Database table name
+
+    entries : iterable
+        Dictionaries with data to post. All entries must have the same keys.
+
+    batch_size : int
+        Max number of entries inserted per transaction
+
+    ignore : bool
+        Skip entries that violate unique constraints (uses INSERT IGNORE)
+
+    verbose : bool
+        Print insert rate after each batch
+
+    Returns
+    -------
+    Number of entries posted
+    """
+
+    def post(batch):
+        columns = tuple(batch[0].keys())
+        sql = queries.get_insert_statement(schema, table, columns, ignore=ignore)
+
+        with get_connection() as (conn, cur):
+            cur.execute('START TRANSACTION')
+            cur.executemany(sql, [tuple(i[c] for c in columns) for i in batch])
+            conn.commit()
+
+    return post_batches(table=table, entries=entries, post=post, batch_size=batch_size, verbose=verbose)
+
+
+def format_infile_value(value):
+    """Format value for tab delimited file read using LOAD DATA INFILE - bytes are hex encoded"""
+
+    if value is None:
+        return r'\N'
+
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def check_load_warnings(conn, cur):
+    """
+    Raise error if LOAD DATA produced warnings other than duplicate keys.
+    Rows skipped because of duplicate keys each produce one warning, so other
+    warnings (e.g. truncated or converted values) are detected by comparing
+    the number of warnings with the number of skipped rows.
+    """
+
+    info = dict(re.findall(r'(\w+): (\d+)', conn.info() or ''))
+    if int(info.get('Warnings', 0)) <= int(info.get('Skipped', 0)):
+        return
+
+    cur.execute('SHOW WARNINGS')
+    messages = [f"{i['Level']} {i['Code']}: {i['Message']}" for i in cur.fetchall()
+                if i['Code'] != DUPLICATE_KEY_ERROR]
+
+    raise DatabaseLoadError(f'Warnings loading data ({info}): {messages}')
+
+
+def load_entries(schema, table, entries, batch_size=1000, ignore=False, verbose=True):
+    """
+    Record many entries in MySQL database using LOAD DATA LOCAL INFILE. Faster
+    than post_entries for large uploads. Requires local_infile to be enabled
+    on the MySQL server. Each batch is loaded in a transaction that is rolled
+    back if values are truncated or converted when loaded.
+
+    Parameters
+    ----------
+    schema : str
+        Name of database
+
+    table : str
+        Database table name
 
-    # Close database connection
-    close_connection(conn, cur)
+    entries : iterable
+        Dictionaries with data to post. All entries must have the same keys.
 
+    batch_size : int
+        Max number of entries loaded per statement
 
-def run_query(sql):
-    """Run SQL query"""
+    ignore : bool
+        Skip entries that violate unique constraints
 
-    conn, cur = connect_to_database()
-    cur.execute(sql)
-    conn.commit()
-    results = cur.fetchall()
-    close_connection(conn=conn, cur=cur)
+    verbose : bool
+        Print insert rate after each batch
+
+    Returns
+    -------
+    Number of entries posted
+    """
+
+    def load(batch):
+        columns = list(batch[0].keys())
+
+        # Binary columns are hex encoded in file and decoded when loaded
+        binary = {c for c in columns if isinstance(batch[0][c], (bytes, bytearray))}
+        sql_columns = ', '.join(f'@{c}' if c in binary else f'`{c}`' for c in columns)
+        sql_set = ', '.join(f'`{c}` = UNHEX(@{c})' for c in columns if c in binary)
+
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.tsv', delete=False) as f:
+            for entry in batch:
+                f.write('\t'.join(format_infile_value(entry[c]) for c in columns) + '\n')
+
+        try:
+            sql_ignore = ' IGNORE' if ignore else ''
+            sql = (f"LOAD DATA LOCAL INFILE '{f.name}'{sql_ignore} INTO TABLE {schema}.{table} "
+                   f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({sql_columns})"
+                   + (f' SET {sql_set}' if sql_set else ''))
+
+            with get_connection(local_infile=True) as (conn, cur):
+                cur.execute('START TRANSACTION')
+                cur.execute(sql)
+                check_load_warnings(conn=conn, cur=cur)
+                conn.commit()
+        finally:
+            os.remove(f.name)
+
+    return post_batches(table=table, entries=entries, post=load, batch_size=batch_size, verbose=verbose,
+                        action='Loaded')
+
+
+def run_query(sql, params=None, schema=None):
+    """
+    Run SQL query. Values in 'params' are substituted for '%s' placeholders.
+    'schema' is included for consistency with SQLite module - ignored.
+    """
+
+    with get_connection() as (conn, cur):
+        cur.execute(sql, params)
+        conn.commit()
+        results = cur.fetchall()
 
     return results
 
 
+def stream_query(sql, params=None, schema=None):
+    """
+    Run SQL query using a server-side cursor. Rows are yielded as they are
+    received rather than loading the full result set into memory. If the
+    generator is closed before all rows are read the connection is
+    discarded, as returning it to the pool would require reading the
+    remaining rows.
+
+    Parameters
+    ----------
+    sql : str
+        SQL query
+
+    params : tuple or None
+        Query parameters
+
+    schema : str or None
+        Included for consistency with SQLite module - ignored
+
+    Returns
+    -------
+    Generator yielding rows as dictionaries
+    """
+
+    pool = get_connection_pool()
+    conn = pool.acquire()
+    finished = False
+
+    try:
+        cur = conn.cursor(SSDictCursor)
+        cur.execute(sql, params)
+        for row in cur:
+            yield row
+
+        cur.close()
+        finished = True
+    finally:
+        pool.release(conn, discard=not finished)
+
+
 def get_casefile_validation_results(schema, table, run_id, case_id):
     """Extract results for a given casefile for a given validation test run"""
 
-    conn, cur = connect_to_database()
-    sql = f"SELECT * FROM {schema}.{table} WHERE run_id='{run_id}' AND case_id='{case_id}'"
-    cur.execute(sql)
+    sql = queries.get_statement('case_results', schema, table)
 
-    return cur.fetchall()[0]
+    return run_query(sql=sql, params=(run_id, case_id))[0]
 
 
 def get_test_run_validation_results(schema, table, group_id):
     """Extract all results for a given validation test run"""
 
-    conn, cur = connect_to_database()
-    sql = f"SELECT * FROM {schema}.{table} WHERE group_id='{group_id}'"
-    cur.execute(sql)
+    sql = queries.get_statement('group_results', schema, table)
+
+    return run_query(sql=sql, params=(group_id,))
+
+
+def iter_test_run_validation_results(schema, table, group_id):
+    """
+    Extract results for a given validation test run using a server-side
+    cursor. Results are yielded one at a time ordered by case ID, so the full
+    result set is never held in memory.
+    """
+
+    sql = queries.get_statement('group_results_ordered', schema, table)
+
+    yield from stream_query(sql=sql, params=(group_id,))
+
+
+def get_largest_differences(schema, group_id, key, limit=20):
+    """
+    Get comparisons with the largest absolute difference between model and
+    NEMDE solutions for a given key (e.g. '@EnergyPrice') and test group
+    """
+
+    sql = queries.get_statement('largest_differences', schema)
+
+    return run_query(sql=sql, params=(group_id, key, limit))
+
+
+def get_upload_manifest(schema, month):
+    """Get bitmap of uploaded casefiles for a given month (e.g. '202104') - returns None if no manifest exists"""
+
+    results = run_query(sql=queries.get_statement('upload_manifest', schema), params=(month,))
+
+    return results[0]['bitmap'] if results else None
+
+
+def save_upload_manifest(schema, month, bitmap):
+    """Save bitmap of uploaded casefiles for a given month - replaces existing manifest"""
+
+    sql = queries.get_statement('save_upload_manifest', schema)
 
-    return cur.fetchall()
+    run_query(sql=sql, params=(month, bytes(bitmap), time.time()))
 
 
 def get_most_recent_test_run_id(schema, table):
     """Get most recent test run ID"""
 
-    sql = f"SELECT run_id FROM {schema}.results ORDER BY row_id DESC LIMIT 1"
-    result = run_query(sql=sql)
+    result = run_query(sql=queries.get_statement('latest_run_id', schema, table))
 
     return result[0]['run_id']
 
@@ -190,7 +674,6 @@ def get_most_recent_test_run_id(schema, table):
 def get_most_recent_test_group_id(schema, table):
     """Get most recent test group ID"""
 
-    sql = f"SELECT group_id FROM {schema}.results ORDER BY row_id DESC LIMIT 1"
-    result = run_query(sql=sql)
+    result = run_query(sql=queries.get_statement('latest_group_id', schema, table))
 
     return result[0]['group_id']
@@ -0,0 +1,231 @@
+"""
+Parameterised queries for common lookups. Values are always passed as query
+parameters, and schema and table names are checked before being included in
+SQL, so lookups are safe to use with untrusted input.
+
+SQL strings are constructed once and cached. Identical SQL strings are sent
+for each lookup, so statements are reused by drivers that cache prepared
+statements per connection (e.g. SQLite).
+"""
+
+import re
+import json
+import functools
+
+from nemde.io.database import backend
+from nemde.errors import CasefileQueryError
+
+
+# Valid schema and table names
+IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Statements with placeholders for schema and table names. Values use '%s' placeholders.
+STATEMENTS = {
+    'casefile': "SELECT casefile FROM {schema}.casefiles WHERE case_id=%s",
+    'casefiles_between': "SELECT case_id, casefile FROM {schema}.casefiles "
+                         "WHERE case_id BETWEEN %s AND %s ORDER BY case_id",
+    'casefiles_in': "SELECT case_id, casefile FROM {schema}.casefiles "
+                    "WHERE case_id IN ({placeholders}) ORDER BY case_id",
+    'case_ids_between': "SELECT case_id FROM {schema}.casefiles WHERE case_id BETWEEN %s AND %s ORDER BY case_id",
+    'case_results': "SELECT * FROM {schema}.{table} WHERE run_id=%s AND case_id=%s",
+    'group_results': "SELECT * FROM {schema}.{table} WHERE group_id=%s",
+    'group_results_ordered': "SELECT * FROM {schema}.{table} WHERE group_id=%s ORDER BY case_id, row_id",
+    'group_case_ids': "SELECT case_id FROM {schema}.{table} WHERE group_id=%s",
+    'test_run_info': "SELECT * FROM {schema}.test_run_info WHERE group_id=%s",
+    'latest_test_run_info': "SELECT * FROM {schema}.test_run_info ORDER BY row_id DESC LIMIT 1",
+    'latest_run_id': "SELECT run_id FROM {schema}.{table} ORDER BY row_id DESC LIMIT 1",
+    'latest_group_id': "SELECT group_id FROM {schema}.{table} ORDER BY row_id DESC LIMIT 1",
+    'largest_differences': "SELECT *, ABS(model - actual) AS abs_difference FROM {schema}.comparisons "
+                           "WHERE group_id=%s AND `key`=%s ORDER BY abs_difference DESC LIMIT %s",
+    'upload_manifest': "SELECT bitmap FROM {schema}.upload_manifest WHERE month=%s",
+    'save_upload_manifest': "REPLACE INTO {schema}.upload_manifest (month, bitmap, updated_timestamp) "
+                            "VALUES (%s, %s, %s)",
+    'applied_migrations': "SELECT version FROM {schema}.schema_migrations",
+    'record_migration': "INSERT INTO {schema}.schema_migrations (version, description, applied_timestamp) "
+                        "VALUES (%s, %s, %s)",
+}
+
+
+def check_identifier(name):
+    """Check schema or table name can be safely included in SQL"""
+
+    if not isinstance(name, str) or not IDENTIFIER.match(name):
+        raise ValueError(f'Invalid identifier: {name!r}')
+
+    return name
+
+
+def check_schema(schema):
+    """Check schema name can be safely included in SQL - schema is usually set by MYSQL_SCHEMA environment variable"""
+
+    if schema is None:
+        raise ValueError('Database schema not specified - set MYSQL_SCHEMA environment variable')
+
+    return check_identifier(schema)
+
+
+@functools.lru_cache(maxsize=512)
+def get_statement(name, schema, table='results', n_params=None):
+    """
+    Get SQL for a statement
+
+    Parameters
+    ----------
+    name : str
+        Statement name (key in STATEMENTS)
+
+    schema : str
+        Name of database
+
+    table : str
+        Table name - only used by statements that query several tables
+
+    n_params : int or None
+        Number of values in 'IN' clause - only used by statements with a
+        variable number of parameters
+
+    Returns
+    -------
+    SQL with '%s' placeholders for values
+    """
+
+    placeholders = ', '.join((n_params or 0) * ['%s'])
+
+    return STATEMENTS[name].format(schema=check_schema(schema), table=check_identifier(table),
+                                   placeholders=placeholders)
+
+
+@functools.lru_cache(maxsize=512)
+def get_insert_statement(schema, table, columns, ignore=False):
+    """
+    Get SQL inserting a row into a table
+
+    Parameters
+    ----------
+    schema : str
+        Name of database
+
+    table : str
+        Table name
+
+    columns : tuple
+        Column names in the order values will be passed
+
+    ignore : bool
+        Skip rows that violate unique constraints (uses INSERT IGNORE)
+
+    Returns
+    -------
+    SQL with '%s' placeholders for values
+    """
+
+    sql_columns = ', '.join(f'`{c}`' for c in columns)
+    sql_values_placeholder = ', '.join(len(columns) * ['%s'])
+    sql_insert = 'INSERT IGNORE' if ignore else 'INSERT'
+
+    return (f'{sql_insert} INTO {check_schema(schema)}.{check_identifier(table)} '
+            f'({sql_columns}) VALUES ({sql_values_placeholder})')
+
+
+def get_casefile(schema, case_id) -> bytes:
+    """
+    Get compressed casefile
+
+    Parameters
+    ----------
+    schema : str
+        Name of database
+
+    case_id : str
+        Case ID with format 'YYYYMMDDIII'
+
+    Returns
+    -------
+    Compressed casefile or None if casefile is not in the database
+    """
+
+    results = backend.run_query(sql=get_statement('casefile', schema), params=(case_id,), schema=schema)
+
+    if len(results) > 1:
+        raise CasefileQueryError(f'Multiple casefiles found for case ID: {case_id}')
+
+    return results[0]['casefile'] if results else None
+
+
+def iter_casefiles(schema, case_ids=None, start=None, end=None):
+    """
+    Stream compressed casefiles ordered by case ID. Either a list of case IDs
+    or a start and end case ID (inclusive) must be specified.
+
+    Returns
+    -------
+    Generator yielding tuples of the form (case_id, compressed casefile)
+    """
+
+    if case_ids is not None:
+        case_ids = tuple(case_ids)
+        if not case_ids:
+            return
+
+        sql = get_statement('casefiles_in', schema, n_params=len(case_ids))
+        params = case_ids
+    elif (start is not None) and (end is not None):
+        sql = get_statement('casefiles_between', schema)
+        params = (start, end)
+    else:
+        raise ValueError('Must specify case_ids or start and end')
+
+    for row in backend.stream_query(sql=sql, params=params, schema=schema):
+        yield row['case_id'], row['casefile']
+
+
+def get_case_ids(schema, start, end) -> list:
+    """Get IDs of casefiles in the database between start and end case IDs (inclusive)"""
+
+    results = backend.run_query(sql=get_statement('case_ids_between', schema), params=(start, end), schema=schema)
+
+    return [i['case_id'] for i in results]
+
+
+def get_group_results(schema, group_id, table='results') -> list:
+    """Get results for a given test group"""
+
+    return backend.run_query(sql=get_statement('group_results', schema, table), params=(group_id,), schema=schema)
+
+
+def get_test_run_info(schema, group_id=None) -> dict:
+    """Get info for a test group, or the most recent test group if group_id is None. Returns None if not found."""
+
+    if group_id is None:
+        results = backend.run_query(sql=get_statement('latest_test_run_info', schema), schema=schema)
+    else:
+        results = backend.run_query(sql=get_statement('test_run_info', schema), params=(group_id,), schema=schema)
+
+    return results[0] if results else None
+
+
+def get_remaining_case_ids(schema, group_id) -> list:
+    """
+    Get case IDs in a test group's parameters for which results have not been
+    recorded
+
+    Parameters
+    ----------
+    schema : str
+        Name of database
+
+    group_id : str
+        Test group ID
+
+    Returns
+    -------
+    Sorted list of case IDs
+    """
+
+    info = get_test_run_info(schema=schema, group_id=group_id)
+    case_ids = json.loads(info['parameters'])['case_ids']
+
+    results = backend.run_query(sql=get_statement('group_case_ids', schema), params=(group_id,), schema=schema)
+    completed = {i['case_id'] for i in results}
+
+    return sorted(set(case_ids) - completed)
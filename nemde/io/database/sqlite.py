@@ -0,0 +1,423 @@
+"""
+Manage SQLite database connection. Provides the same interface as the MySQL
+module so it can be used for single-node runs without a MySQL server.
+
+Each schema is stored in a separate file within SQLITE_DIR and attached to
+connections, so SQL referring to tables as {schema}.{table} is unchanged.
+SQL written for MySQL is adapted by replacing '%s' placeholders with '?' and
+'INSERT IGNORE' with 'INSERT OR IGNORE', so SQL is shared with the MySQL
+module and only connection handling and table definitions differ.
+"""
+
+import os
+import csv
+import time
+import sqlite3
+import functools
+import threading
+import contextlib
+
+from nemde.io.database import queries
+from nemde.io.database import migrations
+from nemde.io.database.utils import post_batches
+
+
+def get_database_dir():
+    """Directory containing SQLite database files - set using SQLITE_DIR environment variable"""
+
+    default = os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir, os.path.pardir, 'database')
+
+    return os.environ.get('SQLITE_DIR') or default
+
+
+def get_database_path(schema):
+    """Path to database file for a given schema"""
+
+    return os.path.join(get_database_dir(), f'{schema}.sqlite')
+
+
+@functools.lru_cache(maxsize=512)
+def convert_sql(sql):
+    """Adapt SQL written for MySQL. Converted SQL is cached so identical statements reuse prepared statements."""
+
+    return sql.replace('%s', '?').replace('INSERT IGNORE', 'INSERT OR IGNORE')
+
+
+def dict_factory(cursor, row):
+    """Represent rows as dictionaries - consistent with MySQL DictCursor"""
+
+    return {k[0]: v for k, v in zip(cursor.description, row)}
+
+
+def attach_schema(conn, schema):
+    """Attach database file for schema to connection if not already attached"""
+
+    attached = {i['name'] for i in conn.execute('PRAGMA database_list').fetchall()}
+    if schema in attached:
+        return
+
+    os.makedirs(get_database_dir(), exist_ok=True)
+    conn.execute('ATTACH DATABASE ? AS ' + schema, (get_database_path(schema),))
+
+    # Write-ahead logging allows reads while other processes write
+    conn.execute(f'PRAGMA {schema}.journal_mode=WAL')
+    conn.execute(f'PRAGMA {schema}.synchronous=NORMAL')
+
+
+def connect():
+    """Open connection to SQLite database and attach schema specified by MYSQL_SCHEMA"""
+
+    conn = sqlite3.connect(':memory:', timeout=60, cached_statements=256)
+    conn.row_factory = dict_factory
+
+    schema = os.environ.get('MYSQL_SCHEMA')
+    if schema:
+        attach_schema(conn=conn, schema=schema)
+
+    return conn
+
+
+# Connections are not shared between threads or processes
+_local = threading.local()
+
+
+def get_thread_connection():
+    """Get connection for the current thread, opening a new connection if required"""
+
+    conn = getattr(_local, 'conn', None)
+    if (conn is None) or (_local.pid != os.getpid()):
+        conn = connect()
+        _local.conn, _local.pid, _local.attached = conn, os.getpid(), set()
+
+    return conn
+
+
+def close_thread_connection():
+    """Close connection used by the current thread"""
+
+    conn = getattr(_local, 'conn', None)
+    if (conn is not None) and (_local.pid == os.getpid()):
+        conn.close()
+
+    _local.conn = None
+
+
+@contextlib.contextmanager
+def get_connection(cursorclass=None, schema=None):
+    """
+    Get connection and create a cursor. Changes are rolled back if an error
+    occurs.
+
+    Parameters
+    ----------
+    cursorclass : None
+        Included for consistency with MySQL module - ignored
+
+    schema : str or None
+        Database file to attach to the connection, if not already attached
+
+    Returns
+    -------
+    Context manager yielding tuple of the form (connection, cursor)
+    """
+
+    conn = get_thread_connection()
+    if (schema is not None) and (schema not in _local.attached):
+        attach_schema(conn=conn, schema=schema)
+        _local.attached.add(schema)
+
+    cur = conn.cursor()
+
+    try:
+        yield conn, cur
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def create_table(schema, table):
+    """
+    Create SQL table based on template.
+
+    Parameters
+    ----------
+    schema : str
+        Name of database schema in which table should be created
+
+    table : str
+        Name of table. Note this must correspond with the CSV template.
+    """
+
+    with open(os.path.join(os.path.dirname(__file__), 'mysql_tables', f'{table}.csv'), newline='') as f:
+        columns = [row for row in csv.reader(f, delimiter=',')]
+
+    # Auto-incrementing primary key must be declared inline
+    columns_sql = ', '.join('row_id INTEGER PRIMARY KEY AUTOINCREMENT' if c[0] == 'row_id' else ' '.join(c)
+                            for c in columns)
+
+    with get_connection(schema=schema) as (conn, cur):
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {schema}.{table} ({columns_sql})")
+        conn.commit()
+
+
+def initialise_tables(schema):
+    """
+    Initialise database tables
+
+    Parameters
+    ----------
+    schema : str
+        Name of database
+    """
+
+    tables = ['results', 'casefiles', 'reports', 'test_run_info', 'comparisons', 'upload_manifest']
+    for t in tables:
+        create_table(schema, t)
+
+    upgrade_schema(schema=schema)
+
+
+def apply_operation(cur, schema, operation):
+    """Apply migration operation - skipped if already applied"""
+
+    if isinstance(operation, migrations.AddIndex):
+        columns_sql = ', '.join(f'`{c}`' for c in operation.columns)
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {schema}.{operation.name} ON {operation.table} ({columns_sql})")
+
+    elif isinstance(operation, migrations.AddColumn):
+        columns = {i['name'] for i in cur.execute(f'PRAGMA {schema}.table_info({operation.table})').fetchall()}
+        if operation.column not in columns:
+            cur.execute(f"ALTER TABLE {schema}.{operation.table} ADD COLUMN `{operation.column}` {operation.definition}")
+
+    # SQLite does not enforce VARCHAR lengths so column definitions do not need to be changed
+    elif isinstance(operation, migrations.ModifyColumn):
+        pass
+
+    else:
+        raise ValueError(f'Unrecognised migration operation: {operation}')
+
+
+def upgrade_schema(schema, verbose=True):
+    """
+    Apply pending migrations. Safe to run multiple times - migrations that
+    have been recorded in the 'schema_migrations' table are skipped.
+
+    Parameters
+    ----------
+    schema : str
+        Name of database
+
+    verbose : bool
+        Print migrations as they are applied
+
+    Returns
+    -------
+    List of migration versions applied
+    """
+
+    create_table(schema, 'schema_migrations')
+
+    applied_versions = []
+    with get_connection(schema=schema) as (conn, cur):
+        # Write lock prevents migrations being applied by several processes at once
+        conn.commit()
+        cur.execute('BEGIN IMMEDIATE')
+
+        cur.execute(convert_sql(queries.get_statement('applied_migrations', schema)))
+        applied = {i['version'] for i in cur.fetchall()}
+
+        for version, description, operations in migrations.get_pending_migrations(applied=applied):
+            for operation in operations:
+                apply_operation(cur=cur, schema=schema, operation=operation)
+
+            cur.execute(convert_sql(queries.get_statement('record_migration', schema)),
+                        (version, description, time.time()))
+
+            applied_versions.append(version)
+            if verbose:
+                print(f'Applied migration {version}: {description}')
+
+        conn.commit()
+
+    return applied_versions
+
+
+def post_entry(schema, table, entry):
+    """
+    Record entry in database
+
+    Parameters
+    ----------
+    schema : str
+        Name of database
+
+    table : str
+        Database table name
+
+    entry : dict
+        Data to post
+    """
+
+    columns, values = zip(*entry.items())
+    sql = convert_sql(queries.get_insert_statement(schema, table, columns))
+
+    with get_connection(schema=schema) as (conn, cur):
+        cur.execute(sql, values)
+        conn.commit()
+
+
+def post_entries(schema, table, entries, batch_size=100, ignore=False, verbose=True):
+    """
+    Record many entries in database. Entries are inserted in batches using a
+    single transaction per batch.
+
+    Parameters
+    ----------
+    schema : str
+        Name of database
+
+    table : str
+        Database table name
+
+    entries : iterable
+        Dictionaries with data to post. All entries must have the same keys.
+
+    batch_size : int
+        Max number of entries inserted per transaction
+
+    ignore : bool
+        Skip entries that violate unique constraints
+
+    verbose : bool
+        Print insert rate after each batch
+
+    Returns
+    -------
+    Number of entries posted
+    """
+
+    def post(batch):
+        columns = tuple(batch[0].keys())
+        sql = convert_sql(queries.get_insert_statement(schema, table, columns, ignore=ignore))
+
+        with get_connection(schema=schema) as (conn, cur):
+            cur.executemany(sql, [tuple(i[c] for c in columns) for i in batch])
+            conn.commit()
+
+    return post_batches(table=table, entries=entries, post=post, batch_size=batch_size, verbose=verbose)
+
+
+def load_entries(schema, table, entries, batch_size=1000, ignore=False, verbose=True):
+    """Record many entries in database - equivalent to post_entries for SQLite"""
+
+    return post_entries(schema=schema, table=table, entries=entries, batch_size=batch_size,
+                        ignore=ignore, verbose=verbose)
+
+
+def run_query(sql, params=None, schema=None):
+    """
+    Run SQL query. Values in 'params' are substituted for '%s' placeholders.
+    The database file for 'schema' is attached if specified.
+    """
+
+    with get_connection(schema=schema) as (conn, cur):
+        cur.execute(convert_sql(sql), params or ())
+        results = cur.fetchall()
+        conn.commit()
+
+    return results
+
+
+def stream_query(sql, params=None, schema=None):
+    """
+    Run SQL query, yielding rows as they are read
+
+    Parameters
+    ----------
+    sql : str
+        SQL query
+
+    params : tuple or None
+        Query parameters
+
+    schema : str or None
+        Database file to attach before running query
+
+    Returns
+    -------
+    Generator yielding rows as dictionaries
+    """
+
+    with get_connection(schema=schema) as (conn, cur):
+        cur.execute(convert_sql(sql), params or ())
+        for row in cur:
+            yield row
+
+
+def get_casefile_validation_results(schema, table, run_id, case_id):
+    """Extract results for a given casefile for a given validation test run"""
+
+    sql = queries.get_statement('case_results', schema, table)
+
+    return run_query(sql=sql, params=(run_id, case_id), schema=schema)[0]
+
+
+def get_test_run_validation_results(schema, table, group_id):
+    """Extract all results for a given validation test run"""
+
+    sql = queries.get_statement('group_results', schema, table)
+
+    return run_query(sql=sql, params=(group_id,), schema=schema)
+
+
+def iter_test_run_validation_results(schema, table, group_id):
+    """Extract results for a given validation test run one at a time ordered by case ID"""
+
+    sql = queries.get_statement('group_results_ordered', schema, table)
+
+    yield from stream_query(sql=sql, params=(group_id,), schema=schema)
+
+
+def get_largest_differences(schema, group_id, key, limit=20):
+    """
+    Get comparisons with the largest absolute difference between model and
+    NEMDE solutions for a given key (e.g. '@EnergyPrice') and test group
+    """
+
+    sql = queries.get_statement('largest_differences', schema)
+
+    return run_query(sql=sql, params=(group_id, key, limit), schema=schema)
+
+
+def get_upload_manifest(schema, month):
+    """Get bitmap of uploaded casefiles for a given month (e.g. '202104') - returns None if no manifest exists"""
+
+    results = run_query(sql=queries.get_statement('upload_manifest', schema), params=(month,), schema=schema)
+
+    return results[0]['bitmap'] if results else None
+
+
+def save_upload_manifest(schema, month, bitmap):
+    """Save bitmap of uploaded casefiles for a given month - replaces existing manifest"""
+
+    sql = queries.get_statement('save_upload_manifest', schema)
+
+    run_query(sql=sql, params=(month, bytes(bitmap), time.time()), schema=schema)
+
+
+def get_most_recent_test_run_id(schema, table):
+    """Get most recent test run ID"""
+
+    result = run_query(sql=queries.get_statement('latest_run_id', schema, table), schema=schema)
+
+    return result[0]['run_id']
+
+
+def get_most_recent_test_group_id(schema, table):
+    """Get most recent test group ID"""
+
+    result = run_query(sql=queries.get_statement('latest_group_id', schema, table), schema=schema)
+
+    return result[0]['group_id']
@@ -0,0 +1,59 @@
+"""Utilities shared by database backends"""
+
+import time
+
+
+def get_batches(entries, batch_size):
+    """Group entries into lists with at most 'batch_size' elements"""
+
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def post_batches(table, entries, post, batch_size, verbose=True, action='Posted'):
+    """
+    Post entries in batches
+
+    Parameters
+    ----------
+    table : str
+        Database table name - used in progress messages
+
+    entries : iterable
+        Dictionaries with data to post
+
+    post : function
+        Function posting a list of entries
+
+    batch_size : int
+        Max number of entries passed to 'post'
+
+    verbose : bool
+        Print insert rate after each batch
+
+    action : str
+        Verb used in progress messages
+
+    Returns
+    -------
+    Number of entries posted
+    """
+
+    start = time.perf_counter()
+    total = 0
+
+    for batch in get_batches(entries, batch_size=batch_size):
+        post(batch)
+
+        total += len(batch)
+        if verbose:
+            print(f'{action} {total} rows to {table} ({total / (time.perf_counter() - start):.1f} rows/s)')
+
+    return total
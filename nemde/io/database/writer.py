@@ -0,0 +1,284 @@
+"""
+Write entries to the database in a background thread. Entries are saved to a
+local spool directory before being queued, and spool files are only removed
+once entries have been committed, so entries are not lost if the process
+exits before they are written. Entries are written at least once - an entry
+may be written twice if the process exits after committing an entry but
+before its spool file is removed.
+
+If a batch cannot be written the error is raised by the next call to flush
+or close. Entries remain spooled and writes continue to be retried in the
+background, so later entries are still accepted and written once the
+database is available.
+"""
+
+import os
+import uuid
+import time
+import queue
+import fcntl
+import pickle
+import logging
+import threading
+import collections
+
+from nemde.io.database import backend
+
+
+logger = logging.getLogger(__name__)
+
+
+def write_spool_file(path, table, entries):
+    """Write entries to spool file - file is synced to disk before it is visible"""
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump((table, entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+
+
+def read_spool_file(path):
+    """Read spool file - returns tuple of the form (table, entries)"""
+
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+class ResultWriter:
+    """
+    Queue entries and write them to the database in batches using a
+    background thread. Batches are written once 'batch_size' entries are
+    queued or 'flush_interval' seconds have elapsed.
+
+    Parameters
+    ----------
+    schema : str
+        Name of database
+
+    spool_dir : str
+        Directory in which queued entries are saved. Each writer uses a
+        separate subdirectory.
+
+    batch_size : int
+        Max number of queued writes flushed in a single batch
+
+    flush_interval : float
+        Max time (seconds) entries are queued before being written
+
+    recover : bool
+        Queue entries left in the spool directory by writers that exited
+        before writing them
+    """
+
+    def __init__(self, schema, spool_dir, batch_size=50, flush_interval=5.0, recover=True):
+        self.schema = schema
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # Directory for this writer - locked while writer is active
+        self.writer_dir = os.path.join(spool_dir, f'{os.getpid()}-{uuid.uuid4().hex}')
+        os.makedirs(self.writer_dir)
+        self._lock_file = open(os.path.join(self.writer_dir, '.lock'), 'w')
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        self._counter = 0
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self.error = None
+
+        if recover:
+            self.recover()
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, table, entries):
+        """
+        Queue entries to be written to the database
+
+        Parameters
+        ----------
+        table : str
+            Database table name
+
+        entries : dict or list
+            Entry or list of entries to write. All entries must have the same keys.
+        """
+
+        if isinstance(entries, dict):
+            entries = [entries]
+
+        self._counter += 1
+        path = os.path.join(self.writer_dir, f'{time.time_ns()}-{self._counter:08}.entry')
+        write_spool_file(path=path, table=table, entries=entries)
+
+        self._queue.put(path)
+
+    def recover(self):
+        """Claim spool files left by writers that are no longer active"""
+
+        recovered = 0
+        for name in sorted(os.listdir(self.spool_dir)):
+            directory = os.path.join(self.spool_dir, name)
+            if (directory == self.writer_dir) or not os.path.isdir(directory):
+                continue
+
+            # Skip directories belonging to active writers
+            try:
+                lock_file = open(os.path.join(directory, '.lock'), 'a')
+            except FileNotFoundError:
+                continue
+
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                continue
+
+            try:
+                for filename in sorted(os.listdir(directory)):
+                    if not filename.endswith('.entry'):
+                        continue
+
+                    path = os.path.join(self.writer_dir, f'recovered-{name}-{filename}')
+                    os.replace(os.path.join(directory, filename), path)
+                    self._queue.put(path)
+                    recovered += 1
+
+                for filename in os.listdir(directory):
+                    os.remove(os.path.join(directory, filename))
+
+                os.rmdir(directory)
+            finally:
+                lock_file.close()
+
+        if recovered:
+            logger.info('Recovered %s spooled writes', recovered)
+
+        return recovered
+
+    def _get_batch(self):
+        """Get spool files to write - waits until batch is full, flush interval elapses, or writer is closed"""
+
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+
+            try:
+                batch.append(self._queue.get(timeout=min(timeout, 0.1)))
+            except queue.Empty:
+                if self._stop.is_set():
+                    break
+
+        return batch
+
+    def _flush(self, paths):
+        """
+        Write entries in spool files to database. Each table is written in a
+        single transaction, and spool files for a table are removed once its
+        entries are committed, so tables that have been written are not
+        written again if a later table fails. Every table is attempted, so a
+        table that cannot be written does not hold back other tables - the
+        first error is raised once all tables have been attempted.
+        """
+
+        entries = collections.defaultdict(list)
+        table_paths = collections.defaultdict(list)
+        for path in paths:
+            table, table_entries = read_spool_file(path)
+            entries[table].extend(table_entries)
+            table_paths[table].append(path)
+
+        error = None
+        for table, table_entries in entries.items():
+            try:
+                backend.post_entries(schema=self.schema, table=table, entries=table_entries,
+                                     batch_size=max(len(table_entries), 1), verbose=False)
+            except Exception as e:
+                error = e if error is None else error
+                continue
+
+            for path in table_paths[table]:
+                os.remove(path)
+
+        if error is not None:
+            raise error
+
+    def _run(self):
+        """Write queued entries until writer is closed and queue is empty"""
+
+        pending = []
+        while not (self._stop.is_set() and self._queue.empty() and not pending):
+            pending.extend(self._get_batch())
+            if not pending:
+                continue
+
+            try:
+                self._flush(pending)
+                pending = []
+                self.error = None
+            except Exception as e:
+                # Entries that were not committed remain spooled - retry after a delay unless closing
+                logger.exception('Failed to write entries')
+                self.error = e
+                pending = [i for i in pending if os.path.exists(i)]
+                if self._stop.is_set():
+                    return
+
+                time.sleep(self.flush_interval)
+
+    def raise_error(self):
+        """Raise error encountered when last writing entries to the database"""
+
+        if self.error is not None:
+            raise self.error
+
+    def flush(self, timeout=None):
+        """
+        Wait until all queued entries have been written. Returns False if
+        'timeout' seconds elapse first, and raises the error encountered if
+        entries could not be written.
+        """
+
+        start = time.monotonic()
+        while self.pending() > 0:
+            self.raise_error()
+            if (timeout is not None) and (time.monotonic() - start > timeout):
+                return False
+            time.sleep(0.05)
+
+        return True
+
+    def pending(self):
+        """Number of writes that have not been committed"""
+
+        return len([i for i in os.listdir(self.writer_dir) if i.endswith('.entry')])
+
+    def close(self):
+        """Write remaining entries and stop background thread"""
+
+        self._stop.set()
+        self._thread.join()
+
+        # Remove writer directory if all entries were written, else leave it to be recovered
+        if self.pending() == 0:
+            os.remove(os.path.join(self.writer_dir, '.lock'))
+            self._lock_file.close()
+            os.rmdir(self.writer_dir)
+        else:
+            self._lock_file.close()
+            self.raise_error()
@@ -0,0 +1,125 @@
+"""
+Structural differences between parsed casefiles. Consecutive dispatch
+intervals share most of their content, so a casefile can be stored as the
+changes required to reconstruct it from the previous interval's casefile.
+"""
+
+# Operations used to describe changes
+SET = 0
+DICT = 1
+LIST = 2
+
+# Returned if two values are identical
+NO_CHANGE = None
+
+
+def get_delta(old, new):
+    """
+    Get changes required to construct 'new' from 'old'
+
+    Parameters
+    ----------
+    old : dict, list, or str
+        Previous value (e.g. previous interval's casefile)
+
+    new : dict, list, or str
+        Current value
+
+    Returns
+    -------
+    Delta as nested tuples, or None if values are identical. Deltas have one
+    of the following forms:
+        (SET, value) - replace old value
+        (DICT, changes, removed, order) - update keys, where 'changes' maps
+            keys to deltas, 'removed' lists keys to delete, and 'order' is the
+            list of keys if key order differs (else None)
+        (LIST, changes) - update elements of equal length lists, where
+            'changes' maps indices to deltas
+    """
+
+    if (type(old) is dict) and (type(new) is dict):
+        changes = {}
+        for k, v in new.items():
+            if k in old:
+                delta = get_delta(old[k], v)
+                if delta is not NO_CHANGE:
+                    changes[k] = delta
+            else:
+                changes[k] = (SET, v)
+
+        removed = [k for k in old.keys() if k not in new]
+
+        # Keys are retained in place with new keys appended - record order if this differs
+        keys = [k for k in old.keys() if k in new] + [k for k in new.keys() if k not in old]
+        order = None if keys == list(new.keys()) else list(new.keys())
+
+        if (not changes) and (not removed) and (order is None):
+            return NO_CHANGE
+
+        return (DICT, changes, removed, order)
+
+    if (type(old) is list) and (type(new) is list) and (len(old) == len(new)):
+        changes = {}
+        for i, (x, y) in enumerate(zip(old, new)):
+            delta = get_delta(x, y)
+            if delta is not NO_CHANGE:
+                changes[i] = delta
+
+        if not changes:
+            return NO_CHANGE
+
+        return (LIST, changes)
+
+    if (type(old) is type(new)) and (old == new):
+        return NO_CHANGE
+
+    return (SET, new)
+
+
+def apply_delta(old, delta):
+    """
+    Construct new value by applying delta to old value. The old value is not
+    modified, however unchanged elements are shared between the old and new
+    values.
+
+    Parameters
+    ----------
+    old : dict, list, or str
+        Value used as the basis for the delta
+
+    delta : tuple or None
+        Delta returned by get_delta
+
+    Returns
+    -------
+    New value
+    """
+
+    if delta is NO_CHANGE:
+        return old
+
+    operation = delta[0]
+
+    if operation == SET:
+        return delta[1]
+
+    if operation == DICT:
+        _, changes, removed, order = delta
+
+        new = {k: v for k, v in old.items() if k not in removed} if removed else dict(old)
+        for k, v in changes.items():
+            new[k] = apply_delta(old.get(k), v)
+
+        if order is not None:
+            new = {k: new[k] for k in order}
+
+        return new
+
+    if operation == LIST:
+        new = list(old)
+        for i, v in delta[1].items():
+            new[i] = apply_delta(old[i], v)
+
+        return new
+
+    raise ValueError(f'Unrecognised delta operation: {operation}')
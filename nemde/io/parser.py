@@ -0,0 +1,333 @@
+"""
+Convert NEMDE casefile XML to a dictionary
+"""
+
+from xml.parsers import expat
+
+import xmltodict
+
+
+# Nodes that should always be represented as lists
+FORCE_LIST = ('Trade', 'TradeTypePriceStructure',)
+
+
+class CasefileHandler:
+    """
+    Expat handler used to construct casefile dictionary. Output has the same
+    structure as xmltodict.parse with default options: attributes are prefixed
+    with '@', text is assigned to '#text' if the element also has attributes,
+    and repeated elements are collected into lists.
+    """
+
+    def __init__(self, force_list=FORCE_LIST):
+        self.force_list = frozenset(force_list)
+
+        # Prefixed attribute names keyed by element attribute names - reusing
+        # the same key objects reduces memory and the size of pickled casefiles
+        self.attribute_names = {}
+
+        self.stack = []
+        self.item = None
+        self.data = []
+
+    def start_element(self, name, attrs):
+        self.stack.append((self.item, self.data))
+
+        # Attributes are a flat list [name_1, value_1, name_2, value_2, ...]
+        if attrs:
+            names = tuple(attrs[0::2])
+            try:
+                keys = self.attribute_names[names]
+            except KeyError:
+                keys = self.attribute_names[names] = tuple('@' + i for i in names)
+
+            self.item = dict(zip(keys, attrs[1::2]))
+        else:
+            self.item = None
+
+        self.data = []
+
+    def end_element(self, name):
+        data = ''.join(self.data).strip() or None if self.data else None
+        item = self.item
+        self.item, self.data = self.stack.pop()
+
+        if item is not None:
+            if data:
+                item['#text'] = data
+        else:
+            item = data
+
+        if self.item is None:
+            self.item = {}
+
+        # Collect repeated elements into a list
+        parent = self.item
+        if name in parent:
+            value = parent[name]
+            if isinstance(value, list):
+                value.append(item)
+            else:
+                parent[name] = [value, item]
+        elif name in self.force_list:
+            parent[name] = [item]
+        else:
+            parent[name] = item
+
+    def characters(self, data):
+        self.data.append(data)
+
+
+class CasefileSectionHandler(CasefileHandler):
+    """
+    Expat handler that only retains selected casefile sections. Elements
+    outside of the selected sections are skipped without being converted.
+
+    Parameters
+    ----------
+    sections : dict
+        Keys are paths to retained elements using dot notation e.g.
+        'NEMSPDCaseFile.NemSpdInputs'. Values are tuples of attributes to
+        retain for the element (e.g. ('@ConstraintID', '@RHS')), or None to
+        retain all attributes.
+
+    force_list : tuple
+        Names of nodes that should always be represented as lists
+    """
+
+    def __init__(self, sections, force_list=FORCE_LIST):
+        super().__init__(force_list=force_list)
+        self.sections, self.prefixes = get_section_paths(sections)
+
+        # Path to current element if an ancestor of a retained section
+        self.path = ()
+
+        # Depth within skipped and retained elements
+        self.skip_depth = 0
+        self.keep_depth = 0
+
+    def start_element(self, name, attrs):
+        if self.skip_depth:
+            self.skip_depth += 1
+            return
+
+        if self.keep_depth:
+            self.keep_depth += 1
+            return super().start_element(name, attrs)
+
+        path = self.path + (name,)
+
+        if path in self.sections:
+            attributes = self.sections[path]
+            if attributes is not None:
+                attrs = [j for i in range(0, len(attrs), 2) if f'@{attrs[i]}' in attributes
+                         for j in attrs[i:i + 2]]
+
+            self.keep_depth = 1
+            return super().start_element(name, attrs)
+
+        if path in self.prefixes:
+            self.path = path
+            return super().start_element(name, attrs)
+
+        self.skip_depth = 1
+
+    def end_element(self, name):
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return
+
+        if self.keep_depth:
+            self.keep_depth -= 1
+        else:
+            self.path = self.path[:-1]
+
+        super().end_element(name)
+
+    def characters(self, data):
+        if not self.skip_depth:
+            self.data.append(data)
+
+
+def get_section_paths(sections):
+    """
+    Split section paths into retained elements and their ancestors
+
+    Parameters
+    ----------
+    sections : dict
+        Paths to retained elements using dot notation mapped to tuples of
+        retained attributes (or None to retain all attributes)
+
+    Returns
+    -------
+    paths : dict
+        Retained element paths as tuples mapped to retained attributes
+
+    prefixes : set
+        Paths to ancestors of retained elements
+    """
+
+    paths = {tuple(k.split('.')): (None if v is None else frozenset(v)) for k, v in sections.items()}
+    prefixes = {k[:i] for k in paths.keys() for i in range(1, len(k))}
+
+    return paths, prefixes
+
+
+def get_element_value(item):
+    """Represent element following xmltodict conventions after removing keys"""
+
+    if not item:
+        return None
+
+    if list(item.keys()) == ['#text']:
+        return item['#text']
+
+    return item
+
+
+def filter_element(value, path, paths, prefixes):
+    """Filter parsed element (or list of elements) given retained section paths"""
+
+    if isinstance(value, list):
+        return [filter_element(i, path, paths, prefixes) for i in value]
+
+    if path in paths:
+        attributes = paths[path]
+        if (attributes is None) or not isinstance(value, dict):
+            return value
+
+        return get_element_value({k: v for k, v in value.items()
+                                  if (not k.startswith('@')) or (k in attributes)})
+
+    if not isinstance(value, dict):
+        return value
+
+    # Retain attributes and text of ancestors, and children that are retained sections or ancestors
+    item = {}
+    for k, v in value.items():
+        child = path + (k,)
+        if k.startswith('@') or (k == '#text'):
+            item[k] = v
+        elif (child in paths) or (child in prefixes):
+            item[k] = filter_element(v, child, paths, prefixes)
+
+    return get_element_value(item)
+
+
+def filter_sections(casefile, sections):
+    """
+    Only retain selected sections of a parsed casefile
+
+    Parameters
+    ----------
+    casefile : dict
+        Parsed casefile
+
+    sections : dict or None
+        Paths to retained elements mapped to retained attributes. See
+        CasefileSectionHandler. If None the input casefile is returned.
+
+    Returns
+    -------
+    Casefile only containing selected sections
+    """
+
+    if sections is None:
+        return casefile
+
+    paths, prefixes = get_section_paths(sections)
+
+    return {k: filter_element(v, (k,), paths, prefixes) for k, v in casefile.items()
+            if ((k,) in paths) or ((k,) in prefixes)} or None
+
+
+def parse_with_expat(xml, force_list=FORCE_LIST, sections=None):
+    """
+    Parse casefile using expat handler
+
+    Parameters
+    ----------
+    xml : str or bytes
+        NEMDE casefile XML
+
+    force_list : tuple
+        Names of nodes that should always be represented as lists
+
+    sections : dict or None
+        Only retain selected sections. See CasefileSectionHandler. All
+        sections are retained if None.
+
+    Returns
+    -------
+    Casefile as a dictionary
+    """
+
+    # Follow xmltodict conventions for string inputs
+    if isinstance(xml, str):
+        xml = xml.encode('utf-8')
+        encoding = 'utf-8'
+    else:
+        encoding = None
+
+    if sections is None:
+        handler = CasefileHandler(force_list=force_list)
+    else:
+        handler = CasefileSectionHandler(sections=sections, force_list=force_list)
+
+    parser = expat.ParserCreate(encoding, None)
+    parser.ordered_attributes = True
+    parser.buffer_text = True
+    parser.StartElementHandler = handler.start_element
+    parser.EndElementHandler = handler.end_element
+    parser.CharacterDataHandler = handler.characters
+
+    # Do not expand entities
+    parser.DefaultHandler = lambda x: None
+    parser.ExternalEntityRefHandler = lambda *x: 1
+
+    parser.Parse(xml, True)
+
+    return handler.item
+
+
+def parse_with_xmltodict(xml, force_list=FORCE_LIST, sections=None):
+    """Parse casefile using xmltodict"""
+
+    return filter_sections(xmltodict.parse(xml, force_list=force_list), sections)
+
+
+# Available parser backends
+PARSERS = {
+    'expat': parse_with_expat,
+    'xmltodict': parse_with_xmltodict,
+}
+
+
+def parse_casefile(xml, backend='expat', sections=None):
+    """
+    Convert casefile XML to a dictionary
+
+    Parameters
+    ----------
+    xml : str or bytes
+        NEMDE casefile XML
+
+    backend : str
+        Parser used to convert XML. Either 'expat' or 'xmltodict'.
+
+    sections : dict or None
+        Only retain selected sections e.g. {'NEMSPDCaseFile.NemSpdInputs': None}.
+        All sections are retained if None.
+
+    Returns
+    -------
+    Casefile as a dictionary
+    """
+
+    try:
+        parser = PARSERS[backend]
+    except KeyError:
+        raise ValueError(f"Unrecognised parser backend: {backend}. Must be one of {list(PARSERS.keys())}")
+
+    return parser(xml, force_list=FORCE_LIST, sections=sections)
@@ -0,0 +1,120 @@
+"""
+Load casefiles in a background thread so loading and parsing upcoming
+casefiles overlaps with solving the current case
+"""
+
+import queue
+import threading
+
+from nemde.io.casefile import load_base_case
+
+
+# Placeholder added to queue once all casefiles have been loaded
+_DONE = object()
+
+
+class CasefilePrefetcher:
+    """
+    Iterate over casefiles while upcoming casefiles are loaded in a
+    background thread. Solver runs in a separate process, so the loader
+    thread is not blocked while the model is solved.
+
+    Parameters
+    ----------
+    case_ids : iterable
+        Case IDs to load
+
+    depth : int
+        Max number of casefiles loaded ahead of the casefile being processed
+
+    sections : dict or None
+        Only retain selected casefile sections. See nemde.io.parser.parse_casefile.
+
+    loader : function
+        Function used to load casefiles. Must accept 'case_id' and 'sections'
+        keyword arguments.
+
+    Examples
+    --------
+    >>> with CasefilePrefetcher(case_ids=['20210401001', '20210401002']) as casefiles:
+    ...     for case_id, casefile in casefiles:
+    ...         run_model(user_data={'case_id': case_id}, base_case=casefile)
+    """
+
+    def __init__(self, case_ids, depth=2, sections=None, loader=load_base_case):
+        self.case_ids = case_ids
+        self.sections = sections
+        self.loader = loader
+
+        self._queue = queue.Queue(maxsize=max(depth, 1))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+
+            if item is _DONE:
+                return
+
+            case_id, casefile, error = item
+            if error is not None:
+                self.close()
+                raise error
+
+            yield case_id, casefile
+
+    def _put(self, item):
+        """Add item to queue - returns False if prefetcher is closed while waiting"""
+
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+
+        return False
+
+    def _run(self):
+        """Load casefiles and add them to queue"""
+
+        for case_id in self.case_ids:
+            if self._stop.is_set():
+                return
+
+            try:
+                casefile = self.loader(case_id=case_id, sections=self.sections)
+                item = (case_id, casefile, None)
+            except Exception as e:
+                item = (case_id, None, e)
+
+            if not self._put(item):
+                return
+
+            # Stop loading once an error has been passed to the consumer
+            if item[2] is not None:
+                return
+
+        self._put(_DONE)
+
+    def close(self):
+        """Stop loading casefiles and wait for the background thread to finish"""
+
+        self._stop.set()
+
+        # Unblock loader if waiting on a full queue
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+        self._thread.join()
@@ -0,0 +1,331 @@
+"""
+Store casefiles that have already been converted to dictionaries. Loading a
+stored casefile avoids parsing the casefile XML.
+
+Casefiles may be stored in full, or as a delta describing changes relative to
+the previous dispatch interval's casefile. Casefiles stored as deltas are
+reconstructed from the most recent casefile stored in full (keyframe).
+
+Stored casefiles are pickled, so stores should only be read if they were
+created locally.
+"""
+
+import os
+import pickle
+import datetime
+
+from nemde.io import codec
+from nemde.io.delta import get_delta, apply_delta
+from nemde.errors import CasefileNotFoundError, CasefileStoreError
+
+
+# Header identifying stored casefiles. Increment version if the format or
+# structure of parsed casefiles changes.
+MAGIC = b'NMDC'
+VERSION = 3
+
+# Previous versions that can still be read. Version 1 payloads are raw zlib
+# streams. Versions 1 and 2 only contain full casefiles.
+SUPPORTED_VERSIONS = (1, 2, 3)
+
+# Byte following version identifying if blob contains a full casefile or delta
+FULL = 0
+DELTA = 1
+
+
+def _dumps(kind, data, codec_name, level):
+    """Serialize full casefile or delta"""
+
+    payload = codec.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), codec=codec_name, level=level)
+
+    return MAGIC + bytes([VERSION, kind]) + payload
+
+
+def _loads(blob):
+    """Deserialize blob - returns tuple of the form (kind, casefile or delta)"""
+
+    if blob[:len(MAGIC)] != MAGIC:
+        raise CasefileStoreError('Unrecognised casefile format')
+
+    version = blob[len(MAGIC)]
+    if version not in SUPPORTED_VERSIONS:
+        raise CasefileStoreError(f'Unsupported casefile store version: {version}. Expected {VERSION}.')
+
+    if version < 3:
+        return FULL, pickle.loads(codec.decompress(blob[len(MAGIC) + 1:]))
+
+    kind = blob[len(MAGIC) + 1]
+    if kind not in (FULL, DELTA):
+        raise CasefileStoreError(f'Unrecognised casefile kind: {kind}')
+
+    return kind, pickle.loads(codec.decompress(blob[len(MAGIC) + 2:]))
+
+
+def dumps(casefile, codec_name='zlib', level=1) -> bytes:
+    """Serialize parsed casefile - fast compression settings are used by default"""
+
+    return _dumps(kind=FULL, data=casefile, codec_name=codec_name, level=level)
+
+
+def dumps_delta(delta, codec_name='zlib', level=1) -> bytes:
+    """Serialize delta between parsed casefile and previous interval's casefile"""
+
+    return _dumps(kind=DELTA, data=delta, codec_name=codec_name, level=level)
+
+
+def loads(blob):
+    """Deserialize parsed casefile stored in full"""
+
+    kind, data = _loads(blob)
+    if kind == DELTA:
+        raise CasefileStoreError('Casefile stored as delta - use load_casefile to reconstruct casefile')
+
+    return data
+
+
+def get_previous_case_id(case_id):
+    """Get case ID for the preceding dispatch interval"""
+
+    interval = int(case_id[8:])
+    if interval > 1:
+        return f'{case_id[:8]}{interval - 1:03}'
+
+    previous_day = datetime.datetime.strptime(case_id[:8], '%Y%m%d') - datetime.timedelta(days=1)
+
+    return f"{previous_day.strftime('%Y%m%d')}288"
+
+
+def get_next_case_id(case_id):
+    """Get case ID for the following dispatch interval"""
+
+    interval = int(case_id[8:])
+    if interval < 288:
+        return f'{case_id[:8]}{interval + 1:03}'
+
+    next_day = datetime.datetime.strptime(case_id[:8], '%Y%m%d') + datetime.timedelta(days=1)
+
+    return f"{next_day.strftime('%Y%m%d')}001"
+
+
+def is_keyframe(case_id, keyframe_interval):
+    """
+    Check if casefile should be stored in full. Keyframes are aligned to the
+    start of each day, so casefiles never depend on a previous day's casefile.
+
+    Parameters
+    ----------
+    case_id : str
+        Case ID with format 'YYYYMMDDIII'
+
+    keyframe_interval : int or None
+        Number of intervals between keyframes. All casefiles are keyframes
+        if None.
+    """
+
+    if keyframe_interval is None:
+        return True
+
+    return (int(case_id[8:]) - 1) % keyframe_interval == 0
+
+
+def get_store_path(store_dir, case_id):
+    """Get path to stored casefile - casefiles are grouped by month"""
+
+    return os.path.join(store_dir, case_id[:6], f'{case_id}.casefile')
+
+
+def has_casefile(store_dir, case_id) -> bool:
+    """Check if casefile exists in store"""
+
+    return os.path.isfile(get_store_path(store_dir=store_dir, case_id=case_id))
+
+
+def save_casefile(store_dir, case_id, casefile, previous=None):
+    """
+    Save parsed casefile to store
+
+    Parameters
+    ----------
+    store_dir : str
+        Root directory of casefile store
+
+    case_id : str
+        Case ID with format 'YYYYMMDDIII'
+
+    casefile : dict
+        Parsed casefile
+
+    previous : dict or None
+        Casefile for the preceding dispatch interval. If specified, the
+        casefile is stored as a delta relative to this casefile. The
+        preceding casefile must already be in the store, and must not be
+        modified once other casefiles depend on it.
+    """
+
+    if previous is None:
+        blob = dumps(casefile)
+    else:
+        blob = dumps_delta(get_delta(previous, casefile))
+
+    path = get_store_path(store_dir=store_dir, case_id=case_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Write to temporary file then rename so partially written files are never read
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(blob)
+
+    os.replace(tmp_path, path)
+
+
+def _read(store_dir, case_id):
+    """Read serialized casefile from store"""
+
+    try:
+        with open(get_store_path(store_dir=store_dir, case_id=case_id), 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        raise CasefileNotFoundError(f'Casefile not in store: {case_id}')
+
+
+def _read_kind(store_dir, case_id):
+    """Read header to check if casefile is stored in full or as a delta - None if casefile not in store"""
+
+    try:
+        with open(get_store_path(store_dir=store_dir, case_id=case_id), 'rb') as f:
+            header = f.read(len(MAGIC) + 2)
+    except FileNotFoundError:
+        return None
+
+    if header[:len(MAGIC)] != MAGIC:
+        raise CasefileStoreError('Unrecognised casefile format')
+
+    # Versions before 3 only contain full casefiles
+    return FULL if header[len(MAGIC)] < 3 else header[len(MAGIC) + 1]
+
+
+def get_dependent_case_ids(store_dir, case_id):
+    """
+    Get IDs of casefiles reconstructed using a given casefile i.e. following
+    casefiles stored as deltas, up to the next casefile stored in full. These
+    casefiles must also be rewritten if the casefile is overwritten.
+
+    Parameters
+    ----------
+    store_dir : str
+        Root directory of casefile store
+
+    case_id : str
+        Case ID with format 'YYYYMMDDIII'
+
+    Returns
+    -------
+    List of case IDs ordered by case ID
+    """
+
+    case_ids = []
+    current = get_next_case_id(case_id)
+
+    while _read_kind(store_dir=store_dir, case_id=current) == DELTA:
+        case_ids.append(current)
+        current = get_next_case_id(current)
+
+    return case_ids
+
+
+def load_casefile(store_dir, case_id):
+    """
+    Load parsed casefile from store. Casefiles stored as deltas are
+    reconstructed by reading each casefile back to the most recent keyframe,
+    so random access reads up to 'keyframe_interval' files. Reconstructed
+    casefiles are not cached as callers may modify the casefile returned -
+    use iter_casefiles for sequential access, which applies one delta per
+    casefile.
+
+    Parameters
+    ----------
+    store_dir : str
+        Root directory of casefile store
+
+    case_id : str
+        Case ID with format 'YYYYMMDDIII'
+
+    Returns
+    -------
+    Casefile as a dictionary
+    """
+
+    # Walk back to the most recent keyframe
+    deltas = []
+    current = case_id
+    kind, data = _loads(_read(store_dir=store_dir, case_id=current))
+
+    while kind == DELTA:
+        deltas.append(data)
+        current = get_previous_case_id(current)
+
+        try:
+            kind, data = _loads(_read(store_dir=store_dir, case_id=current))
+        except CasefileNotFoundError:
+            raise CasefileNotFoundError(f'Cannot reconstruct {case_id}: casefile not in store: {current}')
+
+    casefile = data
+    for delta in reversed(deltas):
+        casefile = apply_delta(casefile, delta)
+
+    return casefile
+
+
+def get_case_ids(store_dir, start, end):
+    """Get sorted case IDs in store between start and end case IDs (inclusive)"""
+
+    if not os.path.isdir(store_dir):
+        return []
+
+    months = sorted(i for i in os.listdir(store_dir) if start[:6] <= i <= end[:6])
+
+    case_ids = []
+    for month in months:
+        case_ids.extend(sorted(i[:-len('.casefile')] for i in os.listdir(os.path.join(store_dir, month))
+                               if i.endswith('.casefile') and (start <= i[:-len('.casefile')] <= end)))
+
+    return case_ids
+
+
+def iter_casefiles(store_dir, start, end):
+    """
+    Load casefiles in store between start and end case IDs (inclusive).
+    Casefiles stored as deltas are reconstructed from the previously yielded
+    casefile, so yielded casefiles share unchanged sections and must not be
+    modified.
+
+    Parameters
+    ----------
+    store_dir : str
+        Root directory of casefile store
+
+    start : str
+        First case ID to load (inclusive)
+
+    end : str
+        Last case ID to load (inclusive)
+
+    Returns
+    -------
+    Generator yielding tuples of the form (case_id, casefile)
+    """
+
+    previous_id, previous = None, None
+
+    for case_id in get_case_ids(store_dir=store_dir, start=start, end=end):
+        kind, data = _loads(_read(store_dir=store_dir, case_id=case_id))
+
+        if kind == FULL:
+            casefile = data
+        elif previous_id == get_previous_case_id(case_id):
+            casefile = apply_delta(previous, data)
+        else:
+            casefile = load_casefile(store_dir=store_dir, case_id=case_id)
+
+        yield case_id, casefile
+        previous_id, previous = case_id, casefile
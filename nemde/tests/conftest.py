@@ -0,0 +1,59 @@
+"""
+Load the casefile for the next validation test in a background thread while
+the model for the current test is solved. pytest-xdist workers each know the
+next test they will run, so only casefiles the worker will use are loaded.
+"""
+
+import concurrent.futures
+
+import pytest
+
+import context
+from nemde.io.casefile import load_base_case
+
+
+# Casefiles being loaded keyed by case ID
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+_casefiles = {}
+
+
+def get_validation_case_id(item):
+    """Get case ID for a validation test - None if item is not a validation test"""
+
+    if (item is None) or (item.get_closest_marker('validate') is None):
+        return None
+
+    callspec = getattr(item, 'callspec', None)
+
+    return None if callspec is None else callspec.params.get('case_id')
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """Start loading casefile for the next test before running the current test"""
+
+    # Drop casefiles not used by the current or next test e.g. if a test was skipped or deselected
+    current_id, next_id = get_validation_case_id(item), get_validation_case_id(nextitem)
+    for case_id in [i for i in _casefiles if i not in (current_id, next_id)]:
+        _casefiles.pop(case_id).cancel()
+
+    if (next_id is not None) and (next_id not in _casefiles):
+        _casefiles[next_id] = _executor.submit(load_base_case, case_id=next_id)
+
+    yield
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Stop loading casefiles once all tests have run"""
+
+    _casefiles.clear()
+    _executor.shutdown(wait=True, cancel_futures=True)
+
+
+@pytest.fixture
+def base_case(case_id):
+    """Casefile loaded while the previous test was running - None if it was not prefetched"""
+
+    future = _casefiles.pop(case_id, None)
+
+    return None if future is None else future.result()
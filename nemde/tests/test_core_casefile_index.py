@@ -0,0 +1,187 @@
+"""
+Test casefile index
+"""
+
+import numpy as np
+import pytest
+
+import context
+from nemde.errors import CasefileLookupError
+from nemde.core.casefile import lookup
+from nemde.core.casefile.index import CasefileIndex, IndexedCasefile, get_casefile_index
+from nemde.core.model.serializers import casefile_serializer
+
+
+@pytest.fixture
+def casefile():
+    trades = [dict({'@TradeType': t, '@MaxAvail': '100'}, **{f'@BandAvail{k}': str(k) for k in range(1, 11)})
+              for t in ['ENOF', 'R6SE']]
+    prices = [dict({'@TradeType': t}, **{f'@PriceBand{k}': str(10 * k) for k in range(1, 11)}) for t in ['ENOF', 'R6SE']]
+
+    return {'NEMSPDCaseFile': {'NemSpdInputs': {
+        'Case': {'@CaseID': '20210401001', '@Intervention': 'False'},
+        'RegionCollection': {'Region': [
+            {'@RegionID': 'SA1', 'RegionInitialConditionCollection': {
+                'RegionInitialCondition': {'@InitialConditionID': 'ADE', '@Value': '1.5'}}}]},
+        'TraderCollection': {'Trader': [
+            {'@TraderID': 'A', '@TraderType': 'GENERATOR', '@SemiDispatch': '1',
+             'TraderInitialConditionCollection': {'TraderInitialCondition': [
+                 {'@InitialConditionID': 'InitialMW', '@Value': '50'}]},
+             'TradePriceStructureCollection': {'TradePriceStructure': {'TradeTypePriceStructureCollection': {
+                 'TradeTypePriceStructure': prices}}}},
+            {'@TraderID': 'B', '@TraderType': 'LOAD', '@SemiDispatch': '0',
+             'TraderInitialConditionCollection': {'TraderInitialCondition': [
+                 {'@InitialConditionID': 'InitialMW', '@Value': '20'}]},
+             'TradePriceStructureCollection': {'TradePriceStructure': {'TradeTypePriceStructureCollection': {
+                 'TradeTypePriceStructure': prices[0]}}}}]},
+        'PeriodCollection': {'Period': {'TraderPeriodCollection': {'TraderPeriod': [
+            {'@TraderID': 'B', '@RegionID': 'SA1', 'TradeCollection': {'Trade': trades[0]}},
+            {'@TraderID': 'A', '@RegionID': 'SA1', '@UIGF': '80', 'TradeCollection': {'Trade': trades}}]}}},
+    }}}
+
+
+def test_casefile_index(casefile):
+    index = CasefileIndex(casefile)
+
+    # Collections keyed by ID in casefile order
+    assert list(index.traders.keys()) == ['A', 'B']
+    assert list(index.trader_periods.keys()) == ['B', 'A']
+    assert list(index.trader_trades.keys()) == [('B', 'ENOF'), ('A', 'ENOF'), ('A', 'R6SE')]
+    assert index.trader_initial_conditions['A'] == {'InitialMW': '50'}
+    assert index.region_initial_conditions['SA1'] == {'ADE': '1.5'}
+
+    # Bands are converted to floats
+    assert index.trader_offers['price_bands'][0, 2] == 30.0
+    assert index.trader_quantity_bands[('A', 'R6SE', 10)] == 10.0
+
+    # Collections are only traversed once
+    assert index.traders is index.traders
+    assert get_casefile_index(index) is index
+
+
+def test_casefile_index_trader_offers(casefile):
+    offers = CasefileIndex(casefile).trader_offers
+
+    # One row per offer in trader period order
+    assert offers['index'] == [('B', 'ENOF'), ('A', 'ENOF'), ('A', 'R6SE')]
+    assert offers['trader_id'].tolist() == ['B', 'A', 'A']
+    assert offers['trade_type'].tolist() == ['ENOF', 'ENOF', 'R6SE']
+    assert offers['region_id'].tolist() == ['SA1', 'SA1', 'SA1']
+
+    # Offers x bands matrices
+    assert offers['price_bands'].shape == offers['quantity_bands'].shape == (3, 10)
+    assert offers['price_bands'][1].tolist() == [10.0 * k for k in range(1, 11)]
+    assert offers['quantity_bands'][2].tolist() == [float(k) for k in range(1, 11)]
+
+
+def test_casefile_index_trader_offers_missing_price_structure(casefile):
+    # Remove R6SE price structure for trader A
+    structures = (casefile['NEMSPDCaseFile']['NemSpdInputs']['TraderCollection']['Trader'][0]
+                  ['TradePriceStructureCollection']['TradePriceStructure']['TradeTypePriceStructureCollection'])
+    structures['TradeTypePriceStructure'] = structures['TradeTypePriceStructure'][0]
+
+    offers = CasefileIndex(casefile).trader_offers
+    price_bands = casefile_serializer.get_trader_price_bands(casefile)
+
+    # Price bands are NaN for offers without a price structure and are excluded when serialized
+    assert np.isnan(offers['price_bands'][2]).all()
+    assert ('A', 'R6SE', 1) not in price_bands
+    assert price_bands[('A', 'ENOF', 1)] == 10.0
+
+
+def test_serializer_getters_accept_index(casefile):
+    index = CasefileIndex(casefile)
+
+    for getter in [casefile_serializer.get_trader_index, casefile_serializer.get_trader_offer_index,
+                   casefile_serializer.get_trader_fcas_offer_index, casefile_serializer.get_trader_price_bands,
+                   casefile_serializer.get_trader_semi_dispatch_index]:
+        assert getter(index) == getter(casefile)
+
+    assert casefile_serializer.get_trader_fcas_offer_index(index) == [('A', 'R6SE')]
+    assert casefile_serializer.get_trader_period_attribute(index, '@UIGF', float) == {'A': 80.0}
+    assert casefile_serializer.get_trader_initial_condition_attribute(casefile, 'InitialMW', float) == {
+        'A': 50.0, 'B': 20.0}
+    assert casefile_serializer.get_region_initial_condition_attribute(index, 'ADE', float) == {'SA1': 1.5}
+
+
+def test_indexed_casefile_lookup(casefile):
+    casefile['NEMSPDCaseFile']['NemSpdOutputs'] = {
+        'TraderSolution': [{'@TraderID': i, '@Intervention': j, '@EnergyTarget': f'{i}{j}'}
+                           for i in ['A', 'B'] for j in ['0', '1']],
+        'PeriodSolution': {'@Intervention': '0', '@TotalObjective': '100'}}
+
+    indexed = IndexedCasefile(casefile)
+
+    # Indexed casefile behaves as casefile dictionary
+    assert indexed == casefile
+    assert get_casefile_index(indexed) is indexed.index
+
+    lookups = [
+        (lookup.get_case_attribute, {'attribute': '@CaseID', 'func': str}),
+        (lookup.get_region_collection_initial_condition_attribute,
+         {'region_id': 'SA1', 'attribute': 'ADE', 'func': float}),
+        (lookup.get_trader_collection_attribute, {'trader_id': 'B', 'attribute': '@TraderType', 'func': str}),
+        (lookup.get_trader_collection_initial_condition_attribute,
+         {'trader_id': 'A', 'attribute': 'InitialMW', 'func': float}),
+        (lookup.get_trader_period_collection_attribute, {'trader_id': 'A', 'attribute': '@UIGF', 'func': float}),
+        (lookup.get_trader_quantity_band_attribute,
+         {'trader_id': 'A', 'trade_type': 'R6SE', 'attribute': '@BandAvail3', 'func': float}),
+        (lookup.get_trader_price_band_attribute,
+         {'trader_id': 'B', 'trade_type': 'ENOF', 'attribute': '@PriceBand2', 'func': float}),
+        (lookup.get_trader_solution_attribute,
+         {'trader_id': 'B', 'attribute': '@EnergyTarget', 'func': str, 'intervention': '1'}),
+        (lookup.get_period_solution_attribute, {'attribute': '@TotalObjective', 'func': float, 'intervention': '0'}),
+    ]
+
+    for func, kwargs in lookups:
+        assert func(indexed, **kwargs) == func(casefile, **kwargs)
+
+    assert lookup.get_trader_solution(indexed, 'A', '0') is lookup.get_trader_solution(casefile, 'A', '0')
+
+
+@pytest.mark.parametrize('func, kwargs', [
+    (lookup.get_trader_collection_attribute, {'trader_id': 'C', 'attribute': '@TraderType', 'func': str}),
+    (lookup.get_trader_collection_initial_condition_attribute,
+     {'trader_id': 'B', 'attribute': 'HMW', 'func': float}),
+    (lookup.get_trader_quantity_band_attribute,
+     {'trader_id': 'B', 'trade_type': 'R6SE', 'attribute': '@BandAvail3', 'func': float}),
+])
+def test_indexed_casefile_lookup_missing(casefile, func, kwargs):
+    for data in [casefile, IndexedCasefile(casefile)]:
+        with pytest.raises(CasefileLookupError):
+            func(data, **kwargs)
+
+
+def test_indexed_casefile_lookup_duplicate_id(casefile):
+    traders = casefile['NEMSPDCaseFile']['NemSpdInputs']['TraderCollection']['Trader']
+    traders.append(dict(traders[0], **{'@TraderType': 'LOAD'}))
+
+    # Indexed lookups return the first matching element, as a scan of the collection does
+    kwargs = {'trader_id': 'A', 'attribute': '@TraderType', 'func': str}
+    assert lookup.get_trader_collection_attribute(IndexedCasefile(casefile), **kwargs) == 'GENERATOR'
+    assert lookup.get_trader_collection_attribute(casefile, **kwargs) == 'GENERATOR'
+    assert lookup.get_traders(IndexedCasefile(casefile), 'A') == [traders[0]]
+
+
+def test_get_trader_fcas_table(casefile):
+    """Columnar FCAS table matches per-offer FCAS parameters"""
+
+    period = casefile['NEMSPDCaseFile']['NemSpdInputs']['PeriodCollection']['Period']
+    for trader in period['TraderPeriodCollection']['TraderPeriod']:
+        for trade in casefile_serializer.convert_to_list(trader['TradeCollection']['Trade']):
+            trade.update({'@EnablementMin': '0', '@LowBreakpoint': '10', '@HighBreakpoint': '90',
+                          '@EnablementMax': '100'})
+
+    table = casefile_serializer.get_trader_fcas_table(casefile, mode='target')
+    info = casefile_serializer.get_trader_fcas_info(casefile, mode='target')
+
+    assert table['index'] == list(info.keys()) == [('A', 'R6SE')]
+    assert table['quantity_bands'][0].tolist() == list(info[('A', 'R6SE')]['quantity_bands'].values())
+
+    for column, value in info[('A', 'R6SE')].items():
+        if column == 'quantity_bands':
+            continue
+        elif table[column].dtype.kind == 'f':
+            assert (np.isnan(table[column][0]) and value is None) or (table[column][0] == value), column
+        else:
+            assert table[column][0] == str(value), column
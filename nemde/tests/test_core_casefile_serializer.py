@@ -10,7 +10,7 @@ import xmltodict
 
 import context
 from nemde.io.casefile import load_base_case
-from nemde.core.model.serializers.casefile_serializer import construct_case
+from nemde.core.model.serializers.casefile_serializer import construct_case, get_price_tied_bands
 
 logger = logging.getLogger(__name__)
 
@@ -23,3 +23,40 @@ def test_casefile_serializer():
 
     serialized_casefile = construct_case(data=casefile, mode='target')
     logger.info(serialized_casefile)
+
+
+def get_price_band_casefile(offers):
+    """Casefile containing energy offers given (trader_id, region_id, prices, quantities)"""
+
+    traders = [{'@TraderID': i, 'TradePriceStructureCollection': {'TradePriceStructure': {
+        'TradeTypePriceStructureCollection': {'TradeTypePriceStructure': dict(
+            {'@TradeType': 'ENOF'}, **{f'@PriceBand{k + 1}': str(v) for k, v in enumerate(p)})}}}}
+        for i, _, p, _ in offers]
+
+    periods = [{'@TraderID': i, '@RegionID': r, 'TradeCollection': {'Trade': dict(
+        {'@TradeType': 'ENOF'}, **{f'@BandAvail{k + 1}': str(v) for k, v in enumerate(q)})}}
+        for i, r, _, q in offers]
+
+    return {'NEMSPDCaseFile': {'NemSpdInputs': {
+        'TraderCollection': {'Trader': traders},
+        'PeriodCollection': {'Period': {'TraderPeriodCollection': {'TraderPeriod': periods}}}}}}
+
+
+def test_get_price_tied_bands():
+    prices = [-1000, -1000] + list(range(1, 9))
+    casefile = get_price_band_casefile([
+        ('B', 'SA1', prices, [10] * 10),
+        ('A', 'SA1', [-1000 + 5e-7] + list(range(1, 10)), [10] + [0] * 9),
+        ('C', 'VIC1', prices, [10] * 10),
+    ])
+
+    # Ties only within region for bands with non-zero quantity - same trader ties retained in both orders
+    assert get_price_tied_bands(casefile, 'ENOF') == [
+        ('A', 'ENOF', 1, 'B', 'ENOF', 1),
+        ('A', 'ENOF', 1, 'B', 'ENOF', 2),
+        ('B', 'ENOF', 1, 'B', 'ENOF', 2),
+        ('B', 'ENOF', 2, 'B', 'ENOF', 1),
+        ('C', 'ENOF', 1, 'C', 'ENOF', 2),
+        ('C', 'ENOF', 2, 'C', 'ENOF', 1),
+    ]
+    assert get_price_tied_bands(casefile, 'LDOF') == []
@@ -2,7 +2,6 @@
 
 import os
 import uuid
-import zlib
 import json
 import time
 import logging
@@ -12,8 +11,12 @@ import pytest
 import numpy as np
 
 import context
-from nemde.io.database import mysql
+from nemde.io import codec
+from nemde.io.database import backend
+from nemde.io.database import queries
+from nemde.io.database.writer import ResultWriter
 from nemde.core.model.execution import run_model
+from nemde.core.model.serializers.solution_serializer import flatten_solution_comparison
 
 logger = logging.getLogger(__name__)
 
@@ -72,7 +75,7 @@ def record_new_test_run(schema, case_ids):
         'group_id': uuid.uuid4().hex,
         'parameters': json.dumps({'case_ids': case_ids})
     }
-    mysql.post_entry(schema=schema, table='test_run_info', entry=entry)
+    backend.post_entry(schema=schema, table='test_run_info', entry=entry)
 
     return entry
 
@@ -89,45 +92,7 @@ def get_most_recent_test_run_info(schema):
     identified by a 'group_id'.
     """
 
-    sql = f"SELECT * FROM {schema}.test_run_info ORDER BY row_id DESC LIMIT 1"
-    results = mysql.run_query(sql)
-
-    if results:
-        return results[0]
-    else:
-        return None
-
-
-def get_test_run_info(schema, group_id):
-    """Get run info"""
-
-    sql = f"SELECT * FROM {schema}.test_run_info WHERE group_id='{group_id}'"
-    results = mysql.run_query(sql)
-
-    if results:
-        return results[0]
-    else:
-        return None
-
-
-def get_remaining_casefile_ids(schema, group_id):
-    """Get remaining casefile IDs to test for a given test run"""
-
-    # Latest goup info
-    info = get_test_run_info(schema=schema, group_id=group_id)
-    group_id = info['group_id']
-    parameters = json.loads(info['parameters'])
-
-    # Complete casefile IDs
-    sql = f"SELECT case_id FROM {schema}.results WHERE group_id='{group_id}'"
-    results = mysql.run_query(sql)
-    completed = [i['case_id'] for i in results]
-
-    # Remaining casefile IDs for which tests must be run
-    remaining = list(set(parameters['case_ids']) - set(completed))
-    remaining.sort()
-
-    return remaining
+    return queries.get_test_run_info(schema=schema)
 
 
 @pytest.fixture
@@ -163,7 +128,7 @@ def get_casefile_ids():
     if info is None:
         return []
     else:
-        case_ids = get_remaining_casefile_ids(schema=schema, group_id=info['group_id'])
+        case_ids = queries.get_remaining_case_ids(schema=schema, group_id=info['group_id'])
         return case_ids
 
 
@@ -182,8 +147,20 @@ def group_id():
     return info['group_id']
 
 
+@pytest.fixture(scope='session')
+def result_writer():
+    """Write results to database in a background thread"""
+
+    spool_dir = os.environ.get('RESULT_SPOOL_DIR') or os.path.join(
+        os.path.dirname(__file__), os.path.pardir, os.path.pardir, 'reports', 'spool')
+    os.makedirs(spool_dir, exist_ok=True)
+
+    with ResultWriter(schema=os.environ['MYSQL_SCHEMA'], spool_dir=spool_dir) as writer:
+        yield writer
+
+
 @pytest.mark.validate
-def test_validate_model(case_id, testrun_uid, group_id):
+def test_validate_model(case_id, testrun_uid, group_id, result_writer, base_case):
     """Run model for a sample of case IDs"""
 
     user_data = {
@@ -195,12 +172,12 @@ def test_validate_model(case_id, testrun_uid, group_id):
         }
     }
 
-    # Run model and return solution
+    # Run model and return solution - casefile is loaded while the previous test runs (see conftest.py)
     # user_data_json = json.dumps(user_data)
-    solution = run_model(user_data=user_data)
+    solution = run_model(user_data=user_data, base_case=base_case)
 
     # Compress results before saving
-    results = zlib.compress(json.dumps(solution).encode('utf-8'))
+    results = codec.compress(json.dumps(solution).encode('utf-8'))
 
     # Entry to post to database
     entry = {
@@ -211,8 +188,12 @@ def test_validate_model(case_id, testrun_uid, group_id):
         'results': results
     }
 
-    # Post entry to database
-    mysql.post_entry(schema=os.environ['MYSQL_SCHEMA'], table='results', entry=entry)
+    # Queue entry to be posted to database
+    result_writer.write(table='results', entries=entry)
+
+    # Post individual comparisons so results can be queried without decompressing blobs
+    comparisons = flatten_solution_comparison(solution['output'], run_id=testrun_uid, group_id=group_id)
+    result_writer.write(table='comparisons', entries=comparisons)
 
     # Compute relative difference
     objective = [i for i in solution.get('output')['PeriodSolution']
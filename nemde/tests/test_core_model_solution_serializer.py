@@ -0,0 +1,23 @@
+"""
+Test solution serializer
+"""
+
+import context
+from nemde.core.model.serializers.solution_serializer import flatten_solution_comparison
+
+
+def test_flatten_solution_comparison():
+    comparison = {
+        'PeriodSolution': [{'case_id': '20210401001', 'intervention': '0', 'key': '@TotalObjective',
+                            'model': 1.0, 'actual': 2.0}],
+        'TraderSolution': [{'case_id': '20210401001', 'intervention': '1', 'trader_id': 'T1',
+                            'key': '@EnergyTarget', 'model': 3.0, 'actual': 4.0}],
+        'RegionSolution': [],
+    }
+
+    assert flatten_solution_comparison(comparison, group_id='g1') == [
+        {'group_id': 'g1', 'case_id': '20210401001', 'intervention': 0, 'element_type': 'period',
+         'element_id': None, 'key': '@TotalObjective', 'model': 1.0, 'actual': 2.0},
+        {'group_id': 'g1', 'case_id': '20210401001', 'intervention': 1, 'element_type': 'trader',
+         'element_id': 'T1', 'key': '@EnergyTarget', 'model': 3.0, 'actual': 4.0},
+    ]
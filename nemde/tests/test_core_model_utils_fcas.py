@@ -0,0 +1,87 @@
+"""
+Test vectorised FCAS availability calculations against scalar calculations
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+import context
+from nemde.core.model.utils import fcas
+
+
+def get_offer_params(rng, trader_id):
+    """Random FCAS offer parameters - includes vertical and flat trapezium sides, and missing values"""
+
+    trade_type = rng.choice(['R6SE', 'R60S', 'R5MI', 'R5RE', 'L6SE', 'L60S', 'L5MI', 'L5RE'])
+    trader_type = rng.choice(['GENERATOR', 'LOAD', 'NORMALLY_ON_LOAD'])
+
+    enablement_min = float(rng.choice([0, 10, 50]))
+    low_breakpoint = enablement_min + rng.choice([0, 10, 20])
+    enablement_max = low_breakpoint + rng.choice([0, 50, 100])
+    high_breakpoint = enablement_max - rng.choice([0, 10, 20]) if enablement_max > low_breakpoint else enablement_max
+
+    return {
+        'trader_id': trader_id,
+        'trade_type': trade_type,
+        'quantity_bands': {(trader_id, trade_type, k): float(rng.choice([0, 0, 5])) for k in range(1, 11)},
+        'energy_max_avail': rng.choice([None, 0.0, 30.0, 200.0]),
+        'enablement_min': enablement_min,
+        'low_breakpoint': low_breakpoint,
+        'high_breakpoint': high_breakpoint,
+        'enablement_max': enablement_max,
+        'max_avail': float(rng.choice([0, 5, 20, 100])),
+        'initial_mw': float(rng.choice([0, 30, 80, 150])),
+        'uigf': rng.choice([None, 0.0, 40.0, 90.0]),
+        'hmw': rng.choice([None, 0.0, 60.0, 200.0]),
+        'lmw': rng.choice([None, 0.0, 5.0, 20.0]),
+        'agc_status': rng.choice(['0', '1']),
+        'agc_ramp_up': rng.choice([None, 0.0, 60.0, 240.0]),
+        'agc_ramp_dn': rng.choice([None, 0.0, 60.0, 240.0]),
+        'trader_type': trader_type,
+        'semi_dispatch': rng.choice(['0', '1']),
+    }
+
+
+def get_table(offers):
+    """Convert offer parameters to columnar table"""
+
+    table = {i: np.array([np.nan if j[i] is None else j[i] for j in offers], dtype=float)
+             for i in ['energy_max_avail', 'enablement_min', 'low_breakpoint', 'high_breakpoint', 'enablement_max',
+                       'max_avail', 'initial_mw', 'uigf', 'hmw', 'lmw', 'agc_ramp_up', 'agc_ramp_dn']}
+    table.update({i: np.array([j[i] for j in offers], dtype=str)
+                  for i in ['trader_id', 'trade_type', 'agc_status', 'trader_type', 'semi_dispatch']})
+    table['quantity_bands'] = np.array([list(j['quantity_bands'].values()) for j in offers], dtype=float)
+
+    return table
+
+
+@pytest.fixture(scope='module')
+def offers():
+    rng = random.Random(10)
+    return [get_offer_params(rng, f'T{i:04}') for i in range(2000)]
+
+
+def test_get_trader_fcas_trapezia_scaled(offers):
+    scaled = fcas.get_trader_fcas_trapezia_scaled(get_table(offers))
+
+    for i, params in enumerate(offers):
+        expected = fcas.get_trader_fcas_trapezium_scaled(params)
+        for key, value in expected.items():
+            assert scaled[key][i] == pytest.approx(value), (params, key)
+
+
+def test_get_trader_fcas_availability_statuses(offers):
+    statuses = fcas.get_trader_fcas_availability_statuses(get_table(offers))
+    expected = [fcas.get_trader_fcas_availability_status(i) for i in offers]
+
+    assert statuses.tolist() == expected
+    assert 0 < sum(expected) < len(expected)
+
+
+def test_get_trader_fcas_trapezia_scaled_unexpected_trader_type(offers):
+    params = dict(offers[0], trade_type='R5RE', trader_type='UNKNOWN')
+
+    with pytest.raises(Exception, match='Unexpected trade type'):
+        fcas.get_trader_fcas_trapezia_scaled(get_table([params]))
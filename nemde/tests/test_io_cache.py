@@ -0,0 +1,122 @@
+"""
+Test read-through casefile cache
+"""
+
+import os
+import threading
+
+import pytest
+
+import context
+from nemde.io import cache, codec, store
+from nemde.io.database import sqlite
+from nemde.io.cache import CasefileCache, get_cache_key, get_casefile_cache
+from nemde.io.casefile import load_base_case
+
+
+def get_casefile(case_id):
+    return {'NEMSPDCaseFile': {'NemSpdInputs': {'Case': {'@CaseID': case_id}}}}
+
+
+def test_cache_returns_independent_copies():
+    cache = CasefileCache(max_items=2)
+    cache.set('20210401001', get_casefile('20210401001'))
+
+    casefile = cache.get('20210401001')
+    casefile['NEMSPDCaseFile']['NemSpdInputs'] = None
+
+    assert cache.get('20210401001') == get_casefile('20210401001')
+
+
+def test_cache_evicts_least_recently_used():
+    cache = CasefileCache(max_items=2)
+    cache.set('20210401001', get_casefile('20210401001'))
+    cache.set('20210401002', get_casefile('20210401002'))
+    cache.get('20210401001')
+    cache.set('20210401003', get_casefile('20210401003'))
+
+    assert cache.get('20210401002') is None
+    assert cache.get('20210401001') is not None
+    assert cache.get('20210401003') is not None
+
+
+def test_disk_cache(tmp_path):
+    cache = CasefileCache(max_items=0, cache_dir=str(tmp_path))
+    cache.set('20210401001', get_casefile('20210401001'))
+
+    # New cache instance reads casefiles persisted to disk
+    cache = CasefileCache(max_items=1, cache_dir=str(tmp_path))
+
+    assert cache.get('20210401001') == get_casefile('20210401001')
+    assert cache.get('20210401002') is None
+
+
+def test_disk_cache_size_limit(tmp_path):
+    size = len(store.dumps(get_casefile('20210401001')))
+    cache = CasefileCache(max_items=0, cache_dir=str(tmp_path), max_bytes=2 * size)
+
+    for i in range(1, 5):
+        cache.set(f'2021040100{i}', get_casefile(f'2021040100{i}'))
+        os.utime(cache.get_path(f'2021040100{i}'), (i, i))
+
+    cache.set('20210401005', get_casefile('20210401005'))
+
+    assert sorted(os.listdir(tmp_path)) == ['20210401004.casefile', '20210401005.casefile']
+
+
+def test_get_cache_key():
+    sections = {'NEMSPDCaseFile.NemSpdInputs': None}
+
+    assert get_cache_key('20210401001') == '20210401001'
+    assert get_cache_key('20210401001', sections) != '20210401001'
+    assert get_cache_key('20210401001', sections) == get_cache_key('20210401001', dict(sections))
+
+
+def test_load_base_case_uses_cache(tmp_path, monkeypatch):
+    """Casefiles loaded from the database are served from the cache after the first load"""
+
+    monkeypatch.setenv('DATABASE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_DIR', str(tmp_path))
+    monkeypatch.setenv('MYSQL_SCHEMA', 'nemde')
+    monkeypatch.delenv('CASEFILE_STORE_DIR', raising=False)
+    get_casefile_cache().clear()
+
+    sqlite.close_thread_connection()
+    sqlite.initialise_tables(schema='nemde')
+    sqlite.post_entry(schema='nemde', table='casefiles', entry={
+        'case_id': '20210401001', 'casefile': codec.compress(b'<NEMSPDCaseFile><Case CaseID="1"/></NEMSPDCaseFile>')})
+
+    casefile = load_base_case(case_id='20210401001')
+    sqlite.run_query("DELETE FROM nemde.casefiles")
+
+    assert load_base_case(case_id='20210401001') == casefile
+    sqlite.close_thread_connection()
+
+
+def test_load_base_case_store_not_cached(tmp_path, monkeypatch):
+    """Casefiles read from the store are not added to the cache"""
+
+    store.save_casefile(store_dir=str(tmp_path), case_id='20210401001', casefile=get_casefile('20210401001'))
+    monkeypatch.setenv('CASEFILE_STORE_DIR', str(tmp_path))
+    get_casefile_cache().clear()
+
+    assert load_base_case(case_id='20210401001') == get_casefile('20210401001')
+    assert get_casefile_cache().get('20210401001') is None
+
+
+def test_get_casefile_cache_shared_between_threads(monkeypatch):
+    monkeypatch.setattr(cache, '_casefile_cache', None)
+    barrier = threading.Barrier(8)
+    caches = []
+
+    def get_cache():
+        barrier.wait()
+        caches.append(get_casefile_cache())
+
+    threads = [threading.Thread(target=get_cache) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(i) for i in caches}) == 1
@@ -2,12 +2,47 @@
 Test loading of casefiles
 """
 
+import io
 import os
+import zipfile
+import concurrent.futures
 
 import pytest
 
 import context
-from nemde.io.casefile import load_xml_from_archive
+from nemde.errors import CasefileNotFoundError
+from nemde.io.casefile import CasefileArchive, load_xml_from_archive, iter_xml_from_archive
+from nemde.io.casefile import get_casefile_archive, close_casefile_archives
+from nemde.io.casefile import load_base_case, load_base_cases
+
+
+def get_casefile_name(year, month, day, interval):
+    """Get casefile name used within daily archives"""
+
+    return f'NEMSPDOutputs_{year}{month:02}{day:02}{interval:03}00.loaded'
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    """Construct a monthly archive with the same structure as NEMDE archives"""
+
+    year, month = 2021, 4
+    prefix = f'NEMDE_{year}_{month:02}/NEMDE_Market_Data/'
+
+    with zipfile.ZipFile(tmp_path / f'NEMDE_{year}_{month:02}.zip', 'w') as z_1:
+        z_1.writestr(prefix, '')
+
+        for day in range(1, 3):
+            day_data = io.BytesIO()
+            with zipfile.ZipFile(day_data, 'w') as z_2:
+                for interval in range(1, 289):
+                    name = get_casefile_name(year, month, day, interval)
+                    z_2.writestr(name, f'<Case ID="{year}{month:02}{day:02}{interval:03}"/>')
+
+            z_1.writestr(f'{prefix}NEMDE_Files/NemSpdOutputs_{year}{month:02}{day:02}_loaded.zip',
+                         day_data.getvalue())
+
+    return str(tmp_path)
 
 
 @pytest.mark.skip(reason='Not including casefile archive in container')
@@ -21,3 +56,91 @@ def test_load_casefile_from_database():
                                      year=year, month=month, day=1, interval=1)
 
     assert isinstance(casefile, bytes)
+
+
+def test_casefile_archive_load_xml(archive_dir):
+    """Load intervals from synthetic archive using archive reader"""
+
+    with CasefileArchive(data_dir=archive_dir, cache_size=1) as archive:
+        assert archive.load_xml(2021, 4, 1, 1) == b'<Case ID="20210401001"/>'
+        assert archive.load_xml(2021, 4, 2, 288) == b'<Case ID="20210402288"/>'
+        assert archive.load_xml(2021, 4, 1, 2) == b'<Case ID="20210401002"/>'
+
+        # Only the most recently used daily archive is retained
+        assert list(archive._days.keys()) == [(2021, 4, 1)]
+
+        with pytest.raises(CasefileNotFoundError):
+            archive.load_xml(2021, 4, 3, 1)
+
+
+def test_load_xml_from_archive(archive_dir):
+    """Load casefile from synthetic archive"""
+
+    casefile = load_xml_from_archive(data_dir=archive_dir, year=2021, month=4, day=1, interval=10)
+
+    assert casefile == b'<Case ID="20210401010"/>'
+
+
+def test_casefile_archive_shared_between_threads(archive_dir):
+    """Concurrent reads from a shared archive reader evicting daily archives"""
+
+    def load(i):
+        day, interval = i % 2 + 1, i % 288 + 1
+        return load_xml_from_archive(data_dir=archive_dir, year=2021, month=4, day=day, interval=interval)
+
+    get_casefile_archive(archive_dir).cache_size = 1
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        casefiles = list(executor.map(load, range(2000)))
+
+    assert casefiles == [f'<Case ID="202104{i % 2 + 1:02}{i % 288 + 1:03}"/>'.encode() for i in range(2000)]
+
+    close_casefile_archives()
+
+
+def test_close_casefile_archives(archive_dir):
+    archive = get_casefile_archive(archive_dir)
+    load_xml_from_archive(data_dir=archive_dir, year=2021, month=4, day=1, interval=1)
+    z_1 = archive._archives[(2021, 4)]
+
+    close_casefile_archives()
+
+    # Monthly archive handles are closed and a new reader is created on the next call
+    assert z_1.fp is None
+    assert get_casefile_archive(archive_dir) is not archive
+
+    close_casefile_archives()
+
+
+def test_iter_xml_from_archive(archive_dir):
+    """Stream casefiles between two case IDs in interval order"""
+
+    casefiles = list(iter_xml_from_archive(data_dir=archive_dir, start='20210401287', end='20210402002'))
+
+    assert [i for i, _ in casefiles] == ['20210401287', '20210401288', '20210402001', '20210402002']
+    assert casefiles[-1][1] == b'<Case ID="20210402002"/>'
+
+
+def test_load_base_cases_requires_range():
+    with pytest.raises(ValueError):
+        list(load_base_cases())
+
+
+def test_load_base_cases_empty():
+    assert list(load_base_cases(case_ids=[])) == []
+
+
+def test_load_base_cases_database():
+    """Casefiles loaded in a single query match casefiles loaded individually"""
+
+    year = int(os.environ['TEST_YEAR'])
+    month = int(os.environ['TEST_MONTH'])
+    start, end = f'{year}{month:02}01001', f'{year}{month:02}01006'
+
+    loaded = list(load_base_cases(start=start, end=end))
+
+    assert [i for i, _ in loaded] == [f'{year}{month:02}01{i:03}' for i in range(1, 7)]
+    for case_id, casefile in loaded:
+        assert casefile == load_base_case(case_id=case_id)
+
+    assert [i for i, _ in load_base_cases(case_ids=[end, start])] == [start, end]
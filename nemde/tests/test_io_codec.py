@@ -0,0 +1,47 @@
+"""
+Test compression codecs
+"""
+
+import zlib
+
+import pytest
+
+import context
+from nemde.io import codec
+from nemde.errors import CodecError
+
+
+DATA = b'<NEMSPDCaseFile>' + b'<TraderPeriod TraderID="T1"/>' * 1000 + b'</NEMSPDCaseFile>'
+
+
+@pytest.mark.parametrize('name', list(codec.CODECS.keys()))
+def test_compress_round_trip(name):
+    blob = codec.compress(DATA, codec=name)
+
+    assert blob[0] == codec.CODECS[name].header
+    assert codec.decompress(blob) == DATA
+
+
+def test_compress_level():
+    assert codec.decompress(codec.compress(DATA, codec='zlib', level=1)) == DATA
+
+
+def test_decompress_legacy_zlib():
+    """Blobs saved before codec headers were introduced are raw zlib streams"""
+
+    for level in [1, 6, 9]:
+        assert codec.decompress(zlib.compress(DATA, level)) == DATA
+
+
+def test_default_codec(monkeypatch):
+    monkeypatch.setenv('COMPRESSION_CODEC', 'lzma')
+
+    assert codec.compress(DATA)[0] == codec.CODECS['lzma'].header
+
+
+def test_unknown_codec():
+    with pytest.raises(CodecError):
+        codec.compress(DATA, codec='unknown')
+
+    with pytest.raises(CodecError):
+        codec.decompress(b'\xff' + DATA)
@@ -0,0 +1,65 @@
+"""
+Test upload manifest
+"""
+
+import pytest
+
+import context
+from nemde.io import codec
+from nemde.io.database import sqlite, manifest
+
+
+@pytest.fixture
+def schema(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_DIR', str(tmp_path))
+    monkeypatch.setenv('MYSQL_SCHEMA', 'nemde')
+
+    sqlite.close_thread_connection()
+    sqlite.initialise_tables(schema='nemde')
+
+    yield 'nemde'
+
+    sqlite.close_thread_connection()
+
+
+def test_bitmap():
+    bitmap = manifest.create_bitmap(year=2021, month=4)
+    assert len(bitmap) == 30 * 288 // 8
+
+    manifest.set_uploaded(bitmap=bitmap, case_ids=['20210401001', '20210415144', '20210430288'])
+    assert manifest.is_uploaded(bitmap=bitmap, case_id='20210415144')
+    assert not manifest.is_uploaded(bitmap=bitmap, case_id='20210415145')
+
+    missing = manifest.get_missing_case_ids(bitmap=bitmap, year=2021, month=4)
+    assert len(missing) == 30 * 288 - 3
+    assert missing[0] == '20210401002'
+    assert missing[-1] == '20210430287'
+
+
+def test_load_manifest(schema):
+    """Manifest is constructed from casefiles for the month if not saved"""
+
+    for case_id in ['20210331288', '20210401001', '20210402010', '20210501001']:
+        sqlite.post_entry(schema=schema, table='casefiles',
+                          entry={'case_id': case_id, 'casefile': codec.compress(b'<a/>')})
+
+    bitmap = manifest.load_manifest(schema=schema, year=2021, month=4)
+    missing = set(manifest.get_missing_case_ids(bitmap=bitmap, year=2021, month=4))
+
+    assert len(missing) == 30 * 288 - 2
+    assert not {'20210401001', '20210402010'} & missing
+    assert sqlite.get_upload_manifest(schema=schema, month='202104') == bytes(bitmap)
+
+
+def test_save_manifest(schema):
+    bitmap = manifest.load_manifest(schema=schema, year=2021, month=4)
+    assert not any(bitmap)
+
+    manifest.set_uploaded(bitmap=bitmap, case_ids=['20210410100'])
+    manifest.save_manifest(schema=schema, year=2021, month=4, bitmap=bitmap)
+    manifest.save_manifest(schema=schema, year=2021, month=4, bitmap=bitmap)
+
+    loaded = manifest.load_manifest(schema=schema, year=2021, month=4)
+    assert manifest.get_missing_case_ids(bitmap=loaded, year=2021, month=4).count('20210410100') == 0
+    assert len(sqlite.run_query(f"SELECT * FROM {schema}.upload_manifest")) == 1
@@ -0,0 +1,266 @@
+"""
+Test database connection pool
+"""
+
+import threading
+
+import pytest
+import MySQLdb
+
+import context
+from nemde.io.database import mysql, migrations
+from nemde.errors import DatabaseLoadError
+from nemde.io.database.mysql import ConnectionPool, check_load_warnings, format_infile_value
+from nemde.io.database.utils import get_batches
+
+
+class Connection:
+    """Stand-in for a MySQLdb connection"""
+
+    def __init__(self):
+        self.closed = False
+        self.alive = True
+        self.pings = 0
+
+    def autocommit(self, value):
+        pass
+
+    def ping(self):
+        self.pings += 1
+        if not self.alive:
+            raise MySQLdb.OperationalError('Connection lost')
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_pool_reuses_connections():
+    pool = ConnectionPool(max_size=2, connect=Connection)
+
+    with pool.connection() as conn_1:
+        pass
+
+    with pool.connection() as conn_2:
+        pass
+
+    assert conn_1 is conn_2
+
+
+def test_pool_size_bounded():
+    pool = ConnectionPool(max_size=1, connect=Connection, timeout=0.01)
+
+    with pool.connection():
+        with pytest.raises(TimeoutError):
+            with pool.connection():
+                pass
+
+    with pool.connection():
+        pass
+
+
+def test_pool_discards_connection_after_operational_error():
+    pool = ConnectionPool(max_size=1, connect=Connection)
+
+    with pytest.raises(MySQLdb.OperationalError):
+        with pool.connection() as conn_1:
+            raise MySQLdb.OperationalError('Connection lost')
+
+    with pool.connection() as conn_2:
+        pass
+
+    assert conn_1.closed
+    assert conn_1 is not conn_2
+
+
+def test_pool_health_check():
+    """Idle connections that fail to respond to a ping are replaced"""
+
+    pool = ConnectionPool(max_size=1, connect=Connection, ping_interval=0)
+
+    with pool.connection() as conn_1:
+        pass
+
+    conn_1.alive = False
+
+    with pool.connection() as conn_2:
+        pass
+
+    assert conn_1.pings == 1
+    assert conn_1 is not conn_2
+
+
+def test_pool_after_fork():
+    """Connections inherited from a parent process are never reused or closed"""
+
+    pool = ConnectionPool(max_size=1, connect=Connection)
+
+    with pool.connection() as conn_1:
+        pass
+
+    # Simulate running in a forked child process
+    pool._pid = -1
+
+    with pool.connection() as conn_2:
+        pass
+
+    pool.close()
+
+    assert conn_1 is not conn_2
+    assert not conn_1.closed
+    assert conn_2.closed
+
+
+def test_get_connection_pool_shared_between_threads(monkeypatch):
+    monkeypatch.setattr(mysql, '_pools', {})
+    barrier = threading.Barrier(8)
+    pools = []
+
+    def get_pool():
+        barrier.wait()
+        pools.append(mysql.get_connection_pool())
+
+    threads = [threading.Thread(target=get_pool) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(i) for i in pools}) == 1
+    assert mysql.get_connection_pool(local_infile=True) is not pools[0]
+
+
+class StreamConnection(Connection):
+    """Stand-in for a connection with a server-side cursor returning rows"""
+
+    def cursor(self, cursorclass=None):
+        return StreamCursor()
+
+
+class StreamCursor:
+    def execute(self, sql, params=None):
+        pass
+
+    def __iter__(self):
+        return iter([{'case_id': i} for i in range(5)])
+
+    def close(self):
+        pass
+
+
+def test_stream_query_discards_connection_if_closed_early(monkeypatch):
+    pool = ConnectionPool(max_size=1, connect=StreamConnection)
+    monkeypatch.setattr(mysql, 'get_connection_pool', lambda: pool)
+
+    # Connection returned to the pool once all rows are read
+    assert len(list(mysql.stream_query('SELECT case_id FROM nemde.results'))) == 5
+    assert len(pool._idle) == 1
+    conn, _ = pool._idle[0]
+
+    # Connection closed if generator is closed before all rows are read
+    rows = mysql.stream_query('SELECT case_id FROM nemde.results')
+    next(rows)
+    rows.close()
+
+    assert conn.closed
+    assert pool._idle == []
+
+    with pool.connection():
+        pass
+
+
+def test_get_batches():
+    assert list(get_batches(range(5), batch_size=2)) == [[0, 1], [2, 3], [4]]
+    assert list(get_batches([], batch_size=2)) == []
+
+
+def test_format_infile_value():
+    assert format_infile_value(None) == r'\N'
+    assert format_infile_value(b'\x00\xff') == '00ff'
+    assert format_infile_value(1.5) == '1.5'
+    assert format_infile_value('a\tb\nc\\') == r'a\tb\nc\\'
+
+
+class LoadConnection:
+    """Stand-in for a connection after LOAD DATA - reports info string"""
+
+    def __init__(self, info):
+        self._info = info
+
+    def info(self):
+        return self._info
+
+
+class WarningsCursor:
+    """Stand-in for a cursor returning warnings"""
+
+    def __init__(self, warnings):
+        self.warnings = warnings
+
+    def execute(self, sql, params=None):
+        assert sql == 'SHOW WARNINGS'
+
+    def fetchall(self):
+        return self.warnings
+
+
+def test_check_load_warnings():
+    duplicate = {'Level': 'Warning', 'Code': 1062, 'Message': "Duplicate entry '1' for key 'case_id'"}
+    truncated = {'Level': 'Warning', 'Code': 1265, 'Message': "Data truncated for column 'case_id' at row 2"}
+
+    # Warnings for skipped duplicate rows are ignored
+    check_load_warnings(conn=LoadConnection('Records: 3  Deleted: 0  Skipped: 1  Warnings: 1'),
+                        cur=WarningsCursor([duplicate]))
+    check_load_warnings(conn=LoadConnection(None), cur=WarningsCursor([]))
+
+    with pytest.raises(DatabaseLoadError, match='Data truncated'):
+        check_load_warnings(conn=LoadConnection('Records: 3  Deleted: 0  Skipped: 1  Warnings: 2'),
+                            cur=WarningsCursor([duplicate, truncated]))
+
+
+class Cursor:
+    """Stand-in for a cursor - tracks indexes created"""
+
+    def __init__(self, indexes):
+        self.indexes = set(indexes)
+        self.executed = []
+        self.result = None
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+        if 'information_schema' in sql:
+            self.result = [{'count': int(params[2] in self.indexes)}]
+        elif sql.startswith('CREATE INDEX'):
+            self.indexes.add(sql.split()[2])
+
+    def fetchall(self):
+        return self.result
+
+
+def test_add_index_idempotent():
+    operation = migrations.AddIndex(table='results', name='idx_results_run_id', columns=['run_id'])
+    cur = Cursor(indexes=[])
+
+    migrations.apply_operation(cur=cur, schema='nemde', operation=operation)
+    migrations.apply_operation(cur=cur, schema='nemde', operation=operation)
+
+    assert [i for i in cur.executed if i.startswith('CREATE INDEX')] == [
+        'CREATE INDEX idx_results_run_id ON nemde.results (`run_id`)']
+
+
+def test_modify_column():
+    operation = migrations.ModifyColumn(table='comparisons', column='element_id', definition='VARCHAR(100)')
+    cur = Cursor(indexes=[])
+
+    migrations.apply_operation(cur=cur, schema='nemde', operation=operation)
+
+    assert cur.executed == ['ALTER TABLE nemde.comparisons MODIFY COLUMN `element_id` VARCHAR(100)']
+
+
+def test_get_pending_migrations():
+    versions = [i[0] for i in migrations.MIGRATIONS]
+
+    assert len(set(versions)) == len(versions)
+    assert [i[0] for i in migrations.get_pending_migrations(applied={1})] == sorted(set(versions) - {1})
@@ -0,0 +1,90 @@
+"""
+Test parameterised queries
+"""
+
+import json
+
+import pytest
+
+import context
+from nemde.io import codec
+from nemde.io.database import sqlite, queries
+from nemde.io.casefile import load_xml_from_database
+
+
+@pytest.fixture
+def schema(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_DIR', str(tmp_path))
+    monkeypatch.setenv('MYSQL_SCHEMA', 'nemde')
+
+    sqlite.close_thread_connection()
+    sqlite.initialise_tables(schema='nemde')
+
+    for i in range(1, 4):
+        sqlite.post_entry(schema='nemde', table='casefiles', entry={
+            'case_id': f'20210401{i:03}', 'casefile': codec.compress(f'<Case ID="{i}"/>'.encode('utf-8'))})
+
+    yield 'nemde'
+
+    sqlite.close_thread_connection()
+
+
+def test_get_statement():
+    sql = queries.get_statement('group_results', 'nemde', 'comparisons')
+    assert sql == "SELECT * FROM nemde.comparisons WHERE group_id=%s"
+
+    # SQL is constructed once
+    assert queries.get_statement('group_results', 'nemde', 'comparisons') is sql
+    assert queries.get_statement('casefiles_in', 'nemde', n_params=3).count('%s') == 3
+
+
+@pytest.mark.parametrize('name', ['nemde; DROP TABLE casefiles', "nemde'", '', None])
+def test_get_statement_invalid_identifier(name):
+    with pytest.raises(ValueError):
+        queries.get_statement('casefile', name)
+
+
+def test_get_statement_missing_schema(monkeypatch):
+    monkeypatch.delenv('MYSQL_SCHEMA', raising=False)
+
+    with pytest.raises(ValueError, match='MYSQL_SCHEMA'):
+        load_xml_from_database(year=2021, month=4, day=1, interval=1)
+
+
+def test_get_most_recent_test_ids(schema):
+    sqlite.post_entry(schema=schema, table='results', entry={'run_id': 'r1', 'group_id': 'g1', 'case_id': '20210401001'})
+    sqlite.post_entry(schema=schema, table='comparisons', entry={'run_id': 'r2', 'group_id': 'g2'})
+
+    assert sqlite.get_most_recent_test_run_id(schema=schema, table='results') == 'r1'
+    assert sqlite.get_most_recent_test_group_id(schema=schema, table='comparisons') == 'g2'
+
+
+def test_get_casefile(schema):
+    assert codec.decompress(queries.get_casefile(schema=schema, case_id='20210401002')) == b'<Case ID="2"/>'
+    assert queries.get_casefile(schema=schema, case_id="20210401002' OR '1'='1") is None
+    assert load_xml_from_database(year=2021, month=4, day=1, interval=3) == '<Case ID="3"/>'
+
+
+def test_iter_casefiles(schema):
+    case_ids = [i for i, _ in queries.iter_casefiles(schema=schema, case_ids=['20210401003', '20210401001'])]
+    assert case_ids == ['20210401001', '20210401003']
+
+    assert queries.get_case_ids(schema=schema, start='20210401002', end='20210401009') == ['20210401002',
+                                                                                          '20210401003']
+
+    with pytest.raises(ValueError):
+        list(queries.iter_casefiles(schema=schema))
+
+
+def test_get_remaining_case_ids(schema):
+    for group_id in ['a', 'b']:
+        sqlite.post_entry(schema=schema, table='test_run_info', entry={
+            'group_id': group_id, 'parameters': json.dumps({'case_ids': ['20210401003', '20210401001']})})
+
+    sqlite.post_entry(schema=schema, table='results', entry={'run_id': 'r', 'group_id': 'b', 'case_id': '20210401001'})
+
+    assert queries.get_test_run_info(schema=schema)['group_id'] == 'b'
+    assert queries.get_remaining_case_ids(schema=schema, group_id='b') == ['20210401003']
+    assert queries.get_remaining_case_ids(schema=schema, group_id='a') == ['20210401001', '20210401003']
+    assert len(queries.get_group_results(schema=schema, group_id='b')) == 1
@@ -0,0 +1,86 @@
+"""
+Test SQLite database backend
+"""
+
+import pytest
+
+import context
+from nemde.io import codec
+from nemde.io.casefile import load_xml_from_database, load_base_cases
+from nemde.io.database import sqlite
+from nemde.io.database.backend import get_backend
+
+
+@pytest.fixture
+def schema(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_DIR', str(tmp_path))
+    monkeypatch.setenv('MYSQL_SCHEMA', 'nemde')
+
+    sqlite.close_thread_connection()
+    sqlite.initialise_tables(schema='nemde')
+
+    yield 'nemde'
+
+    sqlite.close_thread_connection()
+
+
+def test_get_backend(monkeypatch):
+    monkeypatch.setenv('DATABASE_BACKEND', 'sqlite')
+    assert get_backend() is sqlite
+
+    with pytest.raises(ValueError):
+        get_backend('unknown')
+
+
+def test_upgrade_schema_idempotent(schema):
+    assert sqlite.upgrade_schema(schema=schema) == []
+
+    indexes = {i['name'] for i in sqlite.run_query(f"SELECT name FROM {schema}.sqlite_master WHERE type='index'")}
+    assert 'idx_results_group_id_case_id' in indexes
+
+
+def test_post_entries(schema):
+    entries = [{'case_id': f'20210401{i:03}', 'casefile': codec.compress(b'<a/>'), 'upload_timestamp': 1.5}
+               for i in range(1, 11)]
+
+    assert sqlite.post_entries(schema=schema, table='casefiles', entries=entries, batch_size=3, verbose=False) == 10
+    sqlite.post_entries(schema=schema, table='casefiles', entries=entries[:2], ignore=True, verbose=False)
+
+    results = sqlite.run_query(f"SELECT case_id FROM {schema}.casefiles ORDER BY case_id")
+    assert [i['case_id'] for i in results] == [i['case_id'] for i in entries]
+
+
+def test_load_casefiles(schema):
+    """Casefile loaders use SQLite backend"""
+
+    for i in range(1, 4):
+        sqlite.post_entry(schema=schema, table='casefiles', entry={
+            'case_id': f'20210401{i:03}', 'casefile': codec.compress(f'<Case ID="{i}"/>'.encode('utf-8'))})
+
+    assert load_xml_from_database(year=2021, month=4, day=1, interval=2) == '<Case ID="2"/>'
+    assert [i for i, _ in load_base_cases(start='20210401002', end='20210401003')] == ['20210401002', '20210401003']
+
+
+def test_validation_results(schema):
+    for i, case_id in enumerate(['20210401002', '20210401001']):
+        sqlite.post_entry(schema=schema, table='results', entry={
+            'run_id': 'r1', 'group_id': 'g1', 'run_time': i, 'case_id': case_id, 'results': b'{}'})
+
+    results = sqlite.iter_test_run_validation_results(schema=schema, table='results', group_id='g1')
+
+    assert [i['case_id'] for i in results] == ['20210401001', '20210401002']
+    assert sqlite.get_most_recent_test_group_id(schema=schema, table='results') == 'g1'
+    assert sqlite.get_casefile_validation_results(
+        schema=schema, table='results', run_id='r1', case_id='20210401001')['run_time'] == 1
+
+
+def test_attach_schema(schema):
+    """Schemas other than MYSQL_SCHEMA are attached when used"""
+
+    sqlite.initialise_tables(schema='other')
+    sqlite.post_entry(schema='other', table='upload_manifest', entry={'month': '202104', 'bitmap': b'\x01'})
+    sqlite.close_thread_connection()
+
+    assert sqlite.get_upload_manifest(schema='other', month='202104') == b'\x01'
+    assert sqlite.get_upload_manifest(schema=schema, month='202104') is None
@@ -0,0 +1,105 @@
+"""
+Test background result writer
+"""
+
+import os
+import time
+
+import pytest
+
+import context
+from nemde.io.database import sqlite
+from nemde.io.database.writer import ResultWriter, write_spool_file
+
+
+@pytest.fixture
+def schema(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_DIR', str(tmp_path / 'database'))
+    monkeypatch.setenv('MYSQL_SCHEMA', 'nemde')
+
+    sqlite.close_thread_connection()
+    sqlite.initialise_tables(schema='nemde')
+
+    yield 'nemde'
+
+    sqlite.close_thread_connection()
+
+
+def get_entry(case_id):
+    return {'run_id': 'r1', 'group_id': 'g1', 'run_time': 1, 'case_id': case_id, 'results': b'{}'}
+
+
+def get_case_ids(schema):
+    return [i['case_id'] for i in sqlite.run_query(f"SELECT case_id FROM {schema}.results ORDER BY case_id")]
+
+
+def test_writer_writes_entries(schema, tmp_path):
+    spool_dir = str(tmp_path / 'spool')
+    os.makedirs(spool_dir)
+
+    with ResultWriter(schema=schema, spool_dir=spool_dir, batch_size=3, flush_interval=0.05) as writer:
+        for i in range(1, 8):
+            writer.write(table='results', entries=get_entry(f'20210401{i:03}'))
+
+        assert writer.flush(timeout=10)
+
+    assert get_case_ids(schema) == [f'20210401{i:03}' for i in range(1, 8)]
+    assert os.listdir(spool_dir) == []
+
+
+def test_writer_recovers_spooled_entries(schema, tmp_path):
+    """Entries spooled by a writer that exited before writing them are recovered"""
+
+    spool_dir = tmp_path / 'spool'
+    os.makedirs(spool_dir / 'crashed')
+    (spool_dir / 'crashed' / '.lock').touch()
+    write_spool_file(path=str(spool_dir / 'crashed' / '1.entry'), table='results',
+                     entries=[get_entry('20210401001'), get_entry('20210401002')])
+
+    with ResultWriter(schema=schema, spool_dir=str(spool_dir), flush_interval=0.05):
+        pass
+
+    assert get_case_ids(schema) == ['20210401001', '20210401002']
+    assert os.listdir(spool_dir) == []
+
+
+def test_writer_does_not_recover_active_writer(schema, tmp_path):
+    spool_dir = str(tmp_path / 'spool')
+    os.makedirs(spool_dir)
+
+    with ResultWriter(schema=schema, spool_dir=spool_dir, flush_interval=60) as writer_1:
+        writer_1.write(table='results', entries=get_entry('20210401001'))
+
+        with ResultWriter(schema=schema, spool_dir=spool_dir, flush_interval=0.05) as writer_2:
+            assert writer_2.pending() == 0
+
+    assert get_case_ids(schema) == ['20210401001']
+
+
+def test_writer_raises_error_without_rewriting_committed_tables(schema, tmp_path):
+    """Entries for tables that were committed are not written again when another table fails, and later entries are still written"""
+
+    spool_dir = str(tmp_path / 'spool')
+    os.makedirs(spool_dir)
+
+    writer = ResultWriter(schema=schema, spool_dir=spool_dir, batch_size=2, flush_interval=0.05)
+    writer.write(table='results', entries=get_entry('20210401001'))
+    writer.write(table='missing_table', entries={'case_id': '20210401001'})
+
+    with pytest.raises(Exception, match='missing_table'):
+        writer.flush(timeout=10)
+
+    # Entries are still accepted and written after a failure
+    writer.write(table='results', entries=get_entry('20210401002'))
+
+    deadline = time.monotonic() + 10
+    while (get_case_ids(schema) != ['20210401001', '20210401002']) and (time.monotonic() < deadline):
+        time.sleep(0.05)
+
+    with pytest.raises(Exception, match='missing_table'):
+        writer.close()
+
+    # Failed entries remain spooled so they can be recovered
+    assert get_case_ids(schema) == ['20210401001', '20210401002']
+    assert writer.pending() == 1
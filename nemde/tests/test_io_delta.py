@@ -0,0 +1,51 @@
+"""
+Test structural differences between casefiles
+"""
+
+import copy
+import json
+
+import pytest
+
+import context
+from nemde.io.delta import get_delta, apply_delta
+
+
+def get_casefile(energy, traders=('T1', 'T2')):
+    return {'NEMSPDCaseFile': {'NemSpdInputs': {
+        'Case': {'@CaseID': '20210401001', '@Intervention': 'False'},
+        'TraderPeriodCollection': {'TraderPeriod': [
+            {'@TraderID': i, 'TradeCollection': {'Trade': [{'@TradeType': 'ENOF', '@BandAvail1': energy}]}}
+            for i in traders]},
+    }}}
+
+
+@pytest.mark.parametrize('old, new', [
+    (get_casefile('10'), get_casefile('10')),
+    (get_casefile('10'), get_casefile('20')),
+    (get_casefile('10'), get_casefile('10', traders=('T1', 'T2', 'T3'))),
+    (get_casefile('10'), get_casefile('10', traders=('T2', 'T1'))),
+    ({'a': '1', 'b': '2'}, {'b': '2', 'a': '1'}),
+    ({'a': '1', 'b': '2'}, {'a': '1'}),
+    ({'a': '1'}, {'a': '1', 'b': {'c': None}}),
+    ({'a': None}, {'a': '1'}),
+    ({'a': {'b': '1'}}, {'a': [{'b': '1'}]}),
+    ({'a': {'b': '1'}}, {'a': None}),
+])
+def test_apply_delta(old, new):
+    """Applying delta reconstructs new value including key order"""
+
+    original = copy.deepcopy(old)
+    reconstructed = apply_delta(old, get_delta(old, new))
+
+    assert json.dumps(reconstructed) == json.dumps(new)
+    assert old == original
+
+
+def test_delta_only_contains_changes():
+    traders = tuple(f'T{i}' for i in range(50))
+    old, new = get_casefile('10', traders=traders), get_casefile('10', traders=traders)
+    new['NEMSPDCaseFile']['NemSpdInputs']['Case']['@Intervention'] = 'True'
+
+    assert get_delta(old, old) is None
+    assert 'T1' not in json.dumps(get_delta(old, new))
@@ -0,0 +1,129 @@
+"""
+Test parity between casefile parser backends
+"""
+
+import os
+import json
+
+import pytest
+import xmltodict
+
+import context
+from nemde.io.casefile import load_xml_from_database
+from nemde.io.parser import parse_casefile, filter_sections, FORCE_LIST
+
+
+SAMPLES = [
+    '<a/>',
+    '<a>text</a>',
+    '<a x="1"/>',
+    '<a x="1">text</a>',
+    '<a>  padded text \n </a>',
+    '<a>\n  <b>1</b>\n  <b>2</b>\n  <b>3</b>\n</a>',
+    '<a><b x="1"/><c/><b x="2">t</b></a>',
+    '<a>before<b/>after</a>',
+    '<a x="&amp;&lt;">&gt; &#65;</a>',
+    '<a><![CDATA[<raw>]]></a>',
+    '<a xmlns:s="http://example.com"><s:b s:x="1">t</s:b></a>',
+    '<?xml version="1.0" encoding="utf-8"?><!-- comment --><a><b/></a>',
+    '<a><Trade TradeType="ENOF"/></a>',
+    '<a><Trade TradeType="ENOF"/><Trade TradeType="R6SE"/></a>',
+    '<a><TradeTypePriceStructure TradeType="ENOF"/></a>',
+    '<a><TradeCollection/></a>',
+    '<a>éè</a>',
+]
+
+
+def get_casefile_sample():
+    """Construct XML with a similar structure to NEMDE casefiles"""
+
+    traders = ''.join(
+        f'<TraderPeriod TraderID="T{i}" RegionID="NSW1"><TradeCollection>'
+        f'<Trade TradeType="ENOF" BandAvail1="{i}" MaxAvail="100"/></TradeCollection></TraderPeriod>'
+        for i in range(20))
+
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<NEMSPDCaseFile xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+        '<NemSpdInputs><Case CaseID="20210401001" Intervention="False"/>'
+        '<PeriodCollection><Period><TraderPeriodCollection>'
+        f'{traders}'
+        '</TraderPeriodCollection></Period></PeriodCollection>'
+        '<GenericConstraintCollection><GenericConstraint ConstraintID="C1">'
+        '<s:ConstraintTrkCollection xmlns:s="urn:x"><ConstraintTrkItem DynamicRHS="0"/></s:ConstraintTrkCollection>'
+        '</GenericConstraint></GenericConstraintCollection>'
+        '</NemSpdInputs>'
+        '<NemSpdOutputs><ConstraintSolution ConstraintID="C1" Intervention="0" RHS="10"/></NemSpdOutputs>'
+        '</NEMSPDCaseFile>'
+    )
+
+
+@pytest.mark.parametrize('xml', SAMPLES + [get_casefile_sample()])
+def test_parse_casefile_parity(xml):
+    """Parser output must match xmltodict for str and bytes input"""
+
+    expected = xmltodict.parse(xml, force_list=FORCE_LIST)
+
+    for value in [xml, xml.encode('utf-8')]:
+        parsed = parse_casefile(value, backend='expat')
+        assert json.dumps(parsed) == json.dumps(expected)
+
+
+def test_parse_casefile_force_list():
+    """Forced nodes are lists even if only one element is present"""
+
+    parsed = parse_casefile(get_casefile_sample())
+    trader = (parsed['NEMSPDCaseFile']['NemSpdInputs']['PeriodCollection']['Period']
+              ['TraderPeriodCollection']['TraderPeriod'][0])
+
+    assert isinstance(trader['TradeCollection']['Trade'], list)
+
+
+def test_parse_casefile_unknown_backend():
+    with pytest.raises(ValueError):
+        parse_casefile('<a/>', backend='unknown')
+
+
+def test_parse_casefile_database_parity():
+    """Check parity using casefile stored in database"""
+
+    year = int(os.environ['TEST_YEAR'])
+    month = int(os.environ['TEST_MONTH'])
+    xml = load_xml_from_database(year=year, month=month, day=1, interval=1)
+
+    assert (json.dumps(parse_casefile(xml, backend='expat'))
+            == json.dumps(parse_casefile(xml, backend='xmltodict')))
+
+
+@pytest.mark.parametrize('sections', [
+    {'NEMSPDCaseFile.NemSpdInputs': None},
+    {'NEMSPDCaseFile.NemSpdInputs.Case': ('@CaseID',)},
+    {'NEMSPDCaseFile.NemSpdInputs': None,
+     'NEMSPDCaseFile.NemSpdOutputs.ConstraintSolution': ('@ConstraintID', '@Intervention', '@RHS')},
+    {'NEMSPDCaseFile.NemSpdOutputs.ConstraintSolution': ('@Missing',)},
+    {'NEMSPDCaseFile.Missing': None},
+    {'Missing': None},
+])
+def test_parse_casefile_sections(sections):
+    """Skipping sections while parsing must match filtering a fully parsed casefile"""
+
+    xml = get_casefile_sample()
+    expected = filter_sections(xmltodict.parse(xml, force_list=FORCE_LIST), sections)
+
+    for backend in ['expat', 'xmltodict']:
+        parsed = parse_casefile(xml, backend=backend, sections=sections)
+        assert json.dumps(parsed) == json.dumps(expected)
+
+
+def test_parse_casefile_sections_skips_outputs():
+    """Only retained sections and attributes are present"""
+
+    sections = {
+        'NEMSPDCaseFile.NemSpdInputs.Case': None,
+        'NEMSPDCaseFile.NemSpdOutputs.ConstraintSolution': ('@ConstraintID', '@RHS'),
+    }
+    parsed = parse_casefile(get_casefile_sample(), sections=sections)
+
+    assert list(parsed['NEMSPDCaseFile']['NemSpdInputs'].keys()) == ['Case']
+    assert parsed['NEMSPDCaseFile']['NemSpdOutputs'] == {
+        'ConstraintSolution': {'@ConstraintID': 'C1', '@RHS': '10'}}
@@ -0,0 +1,68 @@
+"""
+Test casefile prefetcher
+"""
+
+import time
+
+import pytest
+
+import context
+from nemde.io.prefetch import CasefilePrefetcher
+
+
+def load_casefile(case_id, sections=None):
+    return {'case_id': case_id, 'sections': sections}
+
+
+def test_prefetcher_order():
+    case_ids = [f'20210401{i:03}' for i in range(1, 21)]
+
+    with CasefilePrefetcher(case_ids=case_ids, depth=3, loader=load_casefile) as casefiles:
+        loaded = list(casefiles)
+
+    assert [i for i, _ in loaded] == case_ids
+    assert [i['case_id'] for _, i in loaded] == case_ids
+
+
+def test_prefetcher_depth():
+    """Loader does not run more than 'depth' casefiles ahead of the consumer"""
+
+    loaded = []
+
+    def loader(case_id, sections=None):
+        loaded.append(case_id)
+        return load_casefile(case_id)
+
+    case_ids = [f'20210401{i:03}' for i in range(1, 21)]
+    with CasefilePrefetcher(case_ids=case_ids, depth=2, loader=loader) as casefiles:
+        for index, _ in enumerate(casefiles):
+            time.sleep(0.01)
+            assert len(loaded) <= index + 4
+
+
+def test_prefetcher_raises_loader_errors():
+    def loader(case_id, sections=None):
+        if case_id == '20210401002':
+            raise KeyError(case_id)
+        return load_casefile(case_id)
+
+    received = []
+    with pytest.raises(KeyError):
+        with CasefilePrefetcher(case_ids=['20210401001', '20210401002', '20210401003'], loader=loader) as casefiles:
+            for case_id, _ in casefiles:
+                received.append(case_id)
+
+    assert received == ['20210401001']
+
+
+def test_prefetcher_close_early():
+    """Background thread stops if consumer stops iterating"""
+
+    case_ids = [f'20210401{i:03}' for i in range(1, 289)]
+    prefetcher = CasefilePrefetcher(case_ids=case_ids, depth=2, loader=load_casefile)
+
+    with prefetcher as casefiles:
+        for _ in casefiles:
+            break
+
+    assert not prefetcher._thread.is_alive()
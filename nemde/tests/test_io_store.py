@@ -0,0 +1,132 @@
+"""
+Test storing and loading pre-parsed casefiles
+"""
+
+import zlib
+import pickle
+
+import pytest
+
+import context
+from nemde.io import codec
+from nemde.io import store
+from nemde.io.cache import get_casefile_cache
+from nemde.io.casefile import load_base_case
+from nemde.errors import CasefileNotFoundError, CasefileStoreError
+
+
+@pytest.fixture
+def casefile():
+    return {'NEMSPDCaseFile': {'NemSpdInputs': {'Case': {'@CaseID': '20210401001'}},
+                               'NemSpdOutputs': {'CaseSolution': {'@Intervention': '0'}}}}
+
+
+def test_save_and_load_casefile(tmp_path, casefile):
+    store.save_casefile(store_dir=str(tmp_path), case_id='20210401001', casefile=casefile)
+
+    assert store.has_casefile(store_dir=str(tmp_path), case_id='20210401001')
+    assert store.load_casefile(store_dir=str(tmp_path), case_id='20210401001') == casefile
+
+
+def test_load_missing_casefile(tmp_path):
+    with pytest.raises(CasefileNotFoundError):
+        store.load_casefile(store_dir=str(tmp_path), case_id='20210401001')
+
+
+def test_load_unsupported_version(casefile):
+    blob = bytearray(store.dumps(casefile))
+    blob[len(store.MAGIC)] = store.VERSION + 1
+
+    with pytest.raises(CasefileStoreError):
+        store.loads(bytes(blob))
+
+
+def test_load_version_one(casefile):
+    """Version 1 payloads are raw zlib streams"""
+
+    blob = store.MAGIC + bytes([1]) + zlib.compress(pickle.dumps(casefile), 1)
+
+    assert store.loads(blob) == casefile
+
+
+def test_load_version_two(casefile):
+    blob = store.MAGIC + bytes([2]) + codec.compress(pickle.dumps(casefile), codec='zlib')
+
+    assert store.loads(blob) == casefile
+
+
+def get_interval_casefile(case_id):
+    return {'NEMSPDCaseFile': {'NemSpdInputs': {'Case': {'@CaseID': case_id},
+                                                'Traders': [{'@TraderID': 'T1'}, {'@TraderID': 'T2'}]}}}
+
+
+def test_save_and_load_delta(tmp_path):
+    """Casefiles stored as deltas are reconstructed from the previous keyframe"""
+
+    case_ids = [f'20210401{i:03}' for i in range(1, 7)]
+
+    previous = None
+    for case_id in case_ids:
+        casefile = get_interval_casefile(case_id)
+        store.save_casefile(store_dir=str(tmp_path), case_id=case_id, casefile=casefile,
+                            previous=None if store.is_keyframe(case_id, keyframe_interval=3) else previous)
+        previous = casefile
+
+    for case_id in case_ids:
+        assert store.load_casefile(store_dir=str(tmp_path), case_id=case_id) == get_interval_casefile(case_id)
+
+    assert list(store.iter_casefiles(store_dir=str(tmp_path), start=case_ids[1], end=case_ids[-1])) == [
+        (i, get_interval_casefile(i)) for i in case_ids[1:]]
+
+    with pytest.raises(CasefileStoreError):
+        store.loads(store.dumps_delta({}))
+
+
+def test_load_delta_missing_keyframe(tmp_path):
+    store.save_casefile(store_dir=str(tmp_path), case_id='20210401002', casefile=get_interval_casefile('20210401002'),
+                        previous=get_interval_casefile('20210401001'))
+
+    with pytest.raises(CasefileNotFoundError):
+        store.load_casefile(store_dir=str(tmp_path), case_id='20210401002')
+
+
+def test_get_previous_case_id():
+    assert store.get_previous_case_id('20210401002') == '20210401001'
+    assert store.get_previous_case_id('20210401001') == '20210331288'
+    assert store.get_previous_case_id('20210101001') == '20201231288'
+
+
+def test_load_base_case_from_store(tmp_path, monkeypatch, casefile):
+    """Casefile store is used before querying the database"""
+
+    store.save_casefile(store_dir=str(tmp_path), case_id='20210401001', casefile=casefile)
+    monkeypatch.setenv('CASEFILE_STORE_DIR', str(tmp_path))
+    get_casefile_cache().clear()
+
+    assert load_base_case(case_id='20210401001') == casefile
+    assert load_base_case(case_id='20210401001', sections={'NEMSPDCaseFile.NemSpdInputs': None}) == {
+        'NEMSPDCaseFile': {'NemSpdInputs': {'Case': {'@CaseID': '20210401001'}}}}
+
+
+def test_get_next_case_id():
+    assert store.get_next_case_id('20210401001') == '20210401002'
+    assert store.get_next_case_id('20210430288') == '20210501001'
+    assert store.get_next_case_id('20201231288') == '20210101001'
+
+
+def test_get_dependent_case_ids(tmp_path):
+    case_ids = [f'20210401{i:03}' for i in range(1, 8)]
+
+    previous = None
+    for case_id in case_ids:
+        casefile = get_interval_casefile(case_id)
+        store.save_casefile(store_dir=str(tmp_path), case_id=case_id, casefile=casefile,
+                            previous=None if store.is_keyframe(case_id, keyframe_interval=3) else previous)
+        previous = casefile
+
+    # Deltas following a casefile up to the next keyframe
+    assert store.get_dependent_case_ids(store_dir=str(tmp_path), case_id='20210401001') == [
+        '20210401002', '20210401003']
+    assert store.get_dependent_case_ids(store_dir=str(tmp_path), case_id='20210401003') == []
+    assert store.get_dependent_case_ids(store_dir=str(tmp_path), case_id='20210401005') == ['20210401006']
+    assert store.get_dependent_case_ids(store_dir=str(tmp_path), case_id='20210401007') == []
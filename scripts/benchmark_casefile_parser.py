@@ -0,0 +1,57 @@
+"""
+Compare parse time and peak memory for casefile parser backends
+"""
+
+import time
+import tracemalloc
+
+import context
+from nemde.io.casefile import load_xml_from_database
+from nemde.io.parser import PARSERS, parse_casefile
+from setup_variables import setup_environment_variables
+
+
+def benchmark_parser(xml, backend, repeats=5):
+    """Get mean parse time (s) and peak memory (MB) for a given backend"""
+
+    # Parse time
+    start = time.perf_counter()
+    for _ in range(repeats):
+        parse_casefile(xml, backend=backend)
+    parse_time = (time.perf_counter() - start) / repeats
+
+    # Peak memory allocated while parsing
+    tracemalloc.start()
+    parse_casefile(xml, backend=backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'backend': backend, 'parse_time': parse_time, 'peak_memory': peak / 1e6}
+
+
+def benchmark_parsers(case_ids, repeats=5):
+    """Benchmark all parser backends for a list of casefiles"""
+
+    out = []
+    for case_id in case_ids:
+        year, month, day, interval = (int(case_id[:4]), int(case_id[4:6]),
+                                      int(case_id[6:8]), int(case_id[8:]))
+
+        xml = load_xml_from_database(year=year, month=month, day=day, interval=interval)
+
+        for backend in PARSERS.keys():
+            result = benchmark_parser(xml=xml, backend=backend, repeats=repeats)
+            result['case_id'] = case_id
+            result['size'] = len(xml) / 1e6
+            out.append(result)
+
+            print(f"{case_id} {backend:>10} size={result['size']:.2f}MB "
+                  f"time={result['parse_time']:.3f}s peak={result['peak_memory']:.1f}MB")
+
+    return out
+
+
+if __name__ == '__main__':
+    setup_environment_variables()
+
+    benchmark_parsers(case_ids=['20210401001', '20210401144', '20210415200'])
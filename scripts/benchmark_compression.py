@@ -0,0 +1,96 @@
+"""
+Compare compressed size and decompression throughput for compression codecs
+"""
+
+import os
+import time
+
+import context
+from nemde.io import codec
+from nemde.io.casefile import iter_xml_from_database
+from setup_variables import setup_environment_variables
+
+
+# Codecs and compression levels to compare
+SETTINGS = {
+    'zlib': [1, 6, 9],
+    'lzma': [0, 6],
+    'zstd': [1, 3, 9],
+    'lz4': [0, 9],
+}
+
+
+def benchmark_codec(casefiles, codec_name, level, repeats=3):
+    """
+    Get compression ratio, and compression and decompression throughput (MB/s)
+
+    Parameters
+    ----------
+    casefiles : list
+        Casefile XML as bytes
+
+    codec_name : str
+        Name of codec
+
+    level : int
+        Compression level
+
+    repeats : int
+        Number of times casefiles are decompressed
+
+    Returns
+    -------
+    Dictionary summarising benchmark results
+    """
+
+    size = sum(len(i) for i in casefiles)
+
+    start = time.perf_counter()
+    blobs = [codec.compress(i, codec=codec_name, level=level) for i in casefiles]
+    compress_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for blob in blobs:
+            codec.decompress(blob)
+    decompress_time = (time.perf_counter() - start) / repeats
+
+    return {
+        'codec': codec_name,
+        'level': level,
+        'ratio': size / sum(len(i) for i in blobs),
+        'compress_throughput': size / compress_time / 1e6,
+        'decompress_throughput': size / decompress_time / 1e6,
+    }
+
+
+def benchmark_codecs(start, end, repeats=3):
+    """Benchmark installed codecs using casefiles stored in database"""
+
+    casefiles = [xml.encode('utf-8') for _, xml in iter_xml_from_database(start=start, end=end)]
+    print(f'Loaded {len(casefiles)} casefiles ({sum(len(i) for i in casefiles) / 1e6:.1f}MB)')
+
+    out = []
+    for codec_name, levels in SETTINGS.items():
+        if codec_name not in codec.CODECS:
+            print(f'{codec_name} not installed - skipping')
+            continue
+
+        for level in levels:
+            result = benchmark_codec(casefiles=casefiles, codec_name=codec_name, level=level, repeats=repeats)
+            out.append(result)
+
+            print(f"{codec_name:>5} level={level:<2} ratio={result['ratio']:.1f} "
+                  f"compress={result['compress_throughput']:.0f}MB/s "
+                  f"decompress={result['decompress_throughput']:.0f}MB/s")
+
+    return out
+
+
+if __name__ == '__main__':
+    setup_environment_variables()
+
+    year = int(os.environ['TEST_YEAR'])
+    month = int(os.environ['TEST_MONTH'])
+
+    benchmark_codecs(start=f'{year}{month:02}01001', end=f'{year}{month:02}01024')
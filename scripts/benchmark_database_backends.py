@@ -0,0 +1,76 @@
+"""
+Compare casefile load latency for database backends. Casefiles are copied
+from MySQL to SQLite before running the benchmark.
+"""
+
+import os
+import time
+import statistics
+
+import context
+from nemde.io.casefile import load_xml_from_database
+from nemde.io.database import backend
+from nemde.io.database import sqlite
+from setup_variables import setup_environment_variables
+
+
+def copy_casefiles_to_sqlite(schema, start, end):
+    """Copy casefiles from MySQL to SQLite"""
+
+    sqlite.initialise_tables(schema=schema)
+
+    sql = f"SELECT case_id, casefile, upload_timestamp FROM {schema}.casefiles WHERE case_id BETWEEN %s AND %s"
+    rows = backend.get_backend('mysql').stream_query(sql=sql, params=(start, end))
+
+    return sqlite.post_entries(schema=schema, table='casefiles', entries=rows, ignore=True, verbose=False)
+
+
+def benchmark_backend(name, case_ids, repeats=3):
+    """Get casefile load latency (s) for a given backend"""
+
+    os.environ['DATABASE_BACKEND'] = name
+
+    latency = []
+    for _ in range(repeats):
+        for case_id in case_ids:
+            start = time.perf_counter()
+            load_xml_from_database(year=int(case_id[:4]), month=int(case_id[4:6]),
+                                   day=int(case_id[6:8]), interval=int(case_id[8:]))
+            latency.append(time.perf_counter() - start)
+
+    return {
+        'backend': name,
+        'mean': statistics.mean(latency),
+        'median': statistics.median(latency),
+        'max': max(latency),
+    }
+
+
+def benchmark_backends(start, end, repeats=3):
+    """Compare casefile load latency for MySQL and SQLite backends"""
+
+    schema = os.environ['MYSQL_SCHEMA']
+    n = copy_casefiles_to_sqlite(schema=schema, start=start, end=end)
+    print(f'Copied {n} casefiles to SQLite')
+
+    sql = f"SELECT case_id FROM {schema}.casefiles WHERE case_id BETWEEN '{start}' AND '{end}' ORDER BY case_id"
+    case_ids = [i['case_id'] for i in sqlite.run_query(sql=sql)]
+
+    out = []
+    for name in ['mysql', 'sqlite']:
+        result = benchmark_backend(name=name, case_ids=case_ids, repeats=repeats)
+        out.append(result)
+
+        print(f"{name:>6} mean={result['mean'] * 1e3:.1f}ms median={result['median'] * 1e3:.1f}ms "
+              f"max={result['max'] * 1e3:.1f}ms")
+
+    return out
+
+
+if __name__ == '__main__':
+    setup_environment_variables()
+
+    year = int(os.environ['TEST_YEAR'])
+    month = int(os.environ['TEST_MONTH'])
+
+    benchmark_backends(start=f'{year}{month:02}01001', end=f'{year}{month:02}01024')
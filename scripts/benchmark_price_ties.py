@@ -0,0 +1,108 @@
+"""
+Compare price-tie detection against pairwise comparison of price bands using
+synthetic cases with many identical price bands (e.g. -1000 $/MWh floors)
+"""
+
+import time
+import random
+
+import context
+from nemde.core.model.serializers.casefile_serializer import get_price_tied_bands, reorder_tuple
+from nemde.core.model.serializers.casefile_serializer import get_trader_price_bands, get_trader_quantity_bands
+from nemde.core.model.serializers.casefile_serializer import get_trader_period_attribute
+
+
+# Prices offered by synthetic traders - floor and cap prices are heavily tied
+PRICES = [-1000.0, -1000.0, -1000.0, -50.0, 0.0, 0.0, 35.5, 80.0, 300.0, 15000.0]
+
+REGIONS = ['NSW1', 'QLD1', 'SA1', 'TAS1', 'VIC1']
+
+
+def get_synthetic_casefile(n_traders, seed=10):
+    """
+    Construct casefile with trader price and quantity bands only
+
+    Parameters
+    ----------
+    n_traders : int
+        Number of traders
+
+    seed : int
+        Random number generator seed
+
+    Returns
+    -------
+    Casefile with trader collection and trader period collection
+    """
+
+    rng = random.Random(seed)
+
+    traders, periods = [], []
+    for i in range(n_traders):
+        trader_id = f'T{i:04}'
+        trade_type = 'ENOF' if rng.random() < 0.8 else 'LDOF'
+        prices = sorted(rng.choice(PRICES) for _ in range(10))
+
+        traders.append({
+            '@TraderID': trader_id,
+            'TradePriceStructureCollection': {'TradePriceStructure': {'TradeTypePriceStructureCollection': {
+                'TradeTypePriceStructure': dict({'@TradeType': trade_type},
+                                                **{f'@PriceBand{k}': str(prices[k - 1]) for k in range(1, 11)})}}}})
+
+        periods.append({
+            '@TraderID': trader_id,
+            '@RegionID': rng.choice(REGIONS),
+            'TradeCollection': {'Trade': dict({'@TradeType': trade_type},
+                                              **{f'@BandAvail{k}': str(rng.choice([0, 10, 50])) for k in range(1, 11)})}})
+
+    return {'NEMSPDCaseFile': {'NemSpdInputs': {
+        'TraderCollection': {'Trader': traders},
+        'PeriodCollection': {'Period': {'TraderPeriodCollection': {'TraderPeriod': periods}}}}}}
+
+
+def get_price_tied_bands_pairwise(data, trade_type):
+    """Reference implementation comparing every price band with every other price band"""
+
+    price_bands = get_trader_price_bands(data)
+    quantity_bands = get_trader_quantity_bands(data)
+    trader_region = get_trader_period_attribute(data, '@RegionID', str)
+
+    filtered_price_bands = {k: v for k, v in price_bands.items() if k[1] == trade_type}
+
+    price_tied = []
+    for i, j in filtered_price_bands.items():
+        for m, n in filtered_price_bands.items():
+            if (m == i) or (trader_region[i[0]] != trader_region[m[0]]):
+                continue
+
+            if abs(j - n) < 1e-6:
+                if (quantity_bands[m] != 0) and (quantity_bands[i] != 0):
+                    price_tied.append((i, m))
+
+    price_tied_unique = sorted(set(reorder_tuple(i) for i in price_tied))
+
+    return [(i[0][0], i[0][1], i[0][2], i[1][0], i[1][1], i[1][2]) for i in price_tied_unique]
+
+
+def benchmark_price_ties(sizes=(100, 250, 500, 1000)):
+    """Time tie detection for synthetic cases of increasing size - checks both methods give the same ties"""
+
+    for n_traders in sizes:
+        casefile = get_synthetic_casefile(n_traders=n_traders)
+
+        start = time.perf_counter()
+        pairwise = [get_price_tied_bands_pairwise(casefile, i) for i in ['ENOF', 'LDOF']]
+        pairwise_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sweep = [get_price_tied_bands(casefile, i) for i in ['ENOF', 'LDOF']]
+        sweep_time = time.perf_counter() - start
+
+        assert sweep == pairwise, 'Price-tied bands differ'
+
+        print(f'{n_traders:>5} traders {sum(len(i) for i in sweep):>8} ties: pairwise {pairwise_time:.3f}s, '
+              f'sweep {sweep_time:.3f}s ({pairwise_time / sweep_time:.1f}x)')
+
+
+if __name__ == '__main__':
+    benchmark_price_ties()
@@ -0,0 +1,145 @@
+"""
+Convert casefiles to dictionaries and save them in the casefile store
+"""
+
+import os
+
+import context
+from nemde.io import store
+from nemde.io.parser import parse_casefile
+from nemde.io.casefile import iter_xml_from_archive, iter_xml_from_database
+from nemde.io.database import queries
+from setup_variables import setup_environment_variables
+
+
+def save_casefiles(store_dir, casefiles, keyframe_interval=None):
+    """
+    Save casefiles to store. Casefiles are stored as deltas relative to the
+    previous interval unless they are keyframes.
+
+    Parameters
+    ----------
+    store_dir : str
+        Root directory of casefile store
+
+    casefiles : iterable
+        Tuples of the form (case_id, casefile XML) ordered by case ID
+
+    keyframe_interval : int or None
+        Number of intervals between casefiles stored in full. All casefiles
+        are stored in full if None.
+    """
+
+    previous_id, previous = None, None
+
+    for case_id, xml in casefiles:
+        casefile = parse_casefile(xml)
+
+        # Deltas can only be computed if the preceding casefile was just saved
+        if (store.is_keyframe(case_id=case_id, keyframe_interval=keyframe_interval)
+                or (previous_id != store.get_previous_case_id(case_id))):
+            store.save_casefile(store_dir=store_dir, case_id=case_id, casefile=casefile)
+        else:
+            store.save_casefile(store_dir=store_dir, case_id=case_id, casefile=casefile, previous=previous)
+
+        print('Saved', case_id)
+        previous_id, previous = case_id, casefile
+
+
+def get_overwrite_end(store_dir, end):
+    """
+    Extend range of overwritten casefiles to include casefiles stored as
+    deltas that depend on the last overwritten casefile. Otherwise these
+    deltas would be applied to the new casefile when reconstructed.
+    """
+
+    dependent = store.get_dependent_case_ids(store_dir=store_dir, case_id=end)
+
+    return dependent[-1] if dependent else end
+
+
+def build_store_from_archive(store_dir, data_dir, start, end, overwrite=False, keyframe_interval=None):
+    """
+    Populate casefile store using zipped casefile archives
+
+    Parameters
+    ----------
+    store_dir : str
+        Root directory of casefile store
+
+    data_dir : str
+        Path to directory containing zipped NEMDE casefile archives
+
+    start : str
+        First case ID to convert (inclusive)
+
+    end : str
+        Last case ID to convert (inclusive)
+
+    overwrite : bool
+        Overwrite casefiles that already exist in the store. Casefiles after
+        'end' stored as deltas up to the next keyframe are also rewritten.
+
+    keyframe_interval : int or None
+        Number of intervals between casefiles stored in full. Other casefiles
+        are stored as deltas. All casefiles are stored in full if None.
+    """
+
+    if overwrite:
+        end = get_overwrite_end(store_dir=store_dir, end=end)
+
+    casefiles = ((case_id, casefile) for case_id, casefile
+                 in iter_xml_from_archive(data_dir=data_dir, start=start, end=end)
+                 if overwrite or not store.has_casefile(store_dir=store_dir, case_id=case_id))
+
+    save_casefiles(store_dir=store_dir, casefiles=casefiles, keyframe_interval=keyframe_interval)
+
+
+def build_store_from_database(schema, store_dir, start, end, overwrite=False, keyframe_interval=None):
+    """
+    Populate casefile store using casefiles uploaded to the database
+
+    Parameters
+    ----------
+    schema : str
+        Database schema containing 'casefiles' table
+
+    store_dir : str
+        Root directory of casefile store
+
+    start : str
+        First case ID to convert (inclusive)
+
+    end : str
+        Last case ID to convert (inclusive)
+
+    overwrite : bool
+        Overwrite casefiles that already exist in the store. Casefiles after
+        'end' stored as deltas up to the next keyframe are also rewritten.
+
+    keyframe_interval : int or None
+        Number of intervals between casefiles stored in full. Other casefiles
+        are stored as deltas. All casefiles are stored in full if None.
+    """
+
+    if overwrite:
+        end = get_overwrite_end(store_dir=store_dir, end=end)
+
+    case_ids = queries.get_case_ids(schema=schema, start=start, end=end)
+
+    if not overwrite:
+        case_ids = [i for i in case_ids if not store.has_casefile(store_dir=store_dir, case_id=i)]
+
+    # Fetch remaining casefiles using a single query
+    save_casefiles(store_dir=store_dir, casefiles=iter_xml_from_database(case_ids=case_ids),
+                   keyframe_interval=keyframe_interval)
+
+
+if __name__ == '__main__':
+    setup_environment_variables()
+
+    year = int(os.environ['TEST_YEAR'])
+    month = int(os.environ['TEST_MONTH'])
+
+    build_store_from_database(schema=os.environ['MYSQL_SCHEMA'], store_dir=os.environ['CASEFILE_STORE_DIR'],
+                              start=f'{year}{month:02}01001', end=f'{year}{month:02}31288', keyframe_interval=12)
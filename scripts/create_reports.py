@@ -1,65 +1,91 @@
 """Validate by comparing model outputs with NEMDE outputs"""
 
 import os
-import zlib
+import csv
 import json
 import shutil
-import itertools
-
-import pandas as pd
 
 import context
-from nemde.io.database.mysql import get_most_recent_test_group_id
-from nemde.io.database.mysql import get_test_run_validation_results
+from nemde.io import codec
+from nemde.io.database.backend import get_most_recent_test_group_id
+from nemde.io.database.backend import iter_test_run_validation_results
 from setup_variables import setup_environment_variables
 
 
+# Solution keys, output filenames, and ID columns included in each report
+SOLUTION_REPORTS = [
+    ('TraderSolution', 'traders.csv', ['trader_id']),
+    ('InterconnectorSolution', 'interconnectors.csv', ['interconnector_id']),
+    ('RegionSolution', 'regions.csv', ['region_id']),
+    ('ConstraintSolution', 'constraints.csv', ['constraint_id']),
+    ('PeriodSolution', 'periods.csv', []),
+]
+
+# Columns appearing in all results files
+INDEX_COLUMNS = ['case_id', 'intervention']
+METRIC_COLUMNS = ['key', 'model', 'actual', 'abs_difference']
+
+
 def parse_validation_results(group_id):
-    """Load validation results and convert to JSON"""
+    """Load validation results one at a time and convert to JSON"""
 
-    results = get_test_run_validation_results(
+    results = iter_test_run_validation_results(
         schema=os.environ['MYSQL_SCHEMA'], table='results', group_id=group_id)
 
-    return [json.loads(zlib.decompress(i['results'])) for i in results]
+    for i in results:
+        yield json.loads(codec.decompress(i['results']))
 
 
-def save_basis_results(results, key, filename):
+def get_basis_rows(result, key):
     """
-    Save comparison results as csv. These data are used as the basis for
-    summary reports.
+    Get rows for a given solution key from a single validation result. Rows
+    are sorted by intervention status.
     """
 
-    # Construct basis results
-    df = pd.DataFrame(itertools.chain.from_iterable([i['output'][key] for i in results]))
+    rows = []
+    for row in result['output'][key]:
+        row = dict(row)
+        row['abs_difference'] = abs(row['model'] - row['actual'])
+        rows.append(row)
+
+    return sorted(rows, key=lambda x: x['intervention'])
 
-    # Columns appearing in all results files
-    index = ['case_id', 'intervention']
-    metrics = ['key', 'model', 'actual', 'abs_difference']
 
-    # Construct column based on filename
-    if filename.endswith('traders.csv'):
-        columns = index + ['trader_id'] + metrics
+def save_basis_results(results, output_dir):
+    """
+    Save comparison results as csv. These data are used as the basis for
+    summary reports. Results are written as they are received, so memory use
+    does not depend on the number of results.
 
-    elif filename.endswith('interconnectors.csv'):
-        columns = index + ['interconnector_id'] + metrics
+    Parameters
+    ----------
+    results : iterable
+        Validation results ordered by case ID
 
-    elif filename.endswith('regions.csv'):
-        columns = index + ['region_id'] + metrics
+    output_dir : str
+        Directory in which CSV files are saved
+    """
 
-    elif filename.endswith('constraints.csv'):
-        columns = index + ['constraint_id'] + metrics
+    files = []
+    writers = {}
 
-    elif filename.endswith('periods.csv'):
-        columns = index + metrics
+    try:
+        for key, filename, columns in SOLUTION_REPORTS:
+            f = open(os.path.join(output_dir, filename), 'w', newline='')
+            files.append(f)
 
-    else:
-        raise ValueError("Unrecognised filename pattern", filename)
+            writer = csv.DictWriter(f, fieldnames=INDEX_COLUMNS + columns + METRIC_COLUMNS,
+                                    extrasaction='ignore')
+            writer.writeheader()
+            writers[key] = writer
 
-    # Compute absolute difference and sort by this value
-    df['abs_difference'] = df['model'].subtract(df['actual']).abs()
-    df = df.sort_values(by=['case_id', 'intervention'], ascending=True)
+        for result in results:
+            for key, writer in writers.items():
+                writer.writerows(get_basis_rows(result=result, key=key))
 
-    df.loc[:, columns].to_csv(filename, index=False)
+    finally:
+        for f in files:
+            f.close()
 
 
 def construct_validation_report(group_id, root_dir):
@@ -68,25 +94,13 @@ def construct_validation_report(group_id, root_dir):
     model results conform with NEMDE solutions
     """
 
-    # Load results and convert to JSON
-    results = parse_validation_results(group_id=group_id)
-
     # Construct directory where results are to be saved
     output_dir = os.path.join(root_dir, group_id)
     os.makedirs(output_dir, exist_ok=True)
 
-    # Save basis results
-    solution_filename_map = [
-        ('TraderSolution', 'traders.csv'),
-        ('InterconnectorSolution', 'interconnectors.csv'),
-        ('RegionSolution', 'regions.csv'),
-        ('ConstraintSolution', 'constraints.csv'),
-        ('PeriodSolution', 'periods.csv')
-    ]
-
-    for (key, filename) in solution_filename_map:
-        path = os.path.join(output_dir, filename)
-        save_basis_results(results=results, key=key, filename=path)
+    # Stream results and save basis results
+    results = parse_validation_results(group_id=group_id)
+    save_basis_results(results=results, output_dir=output_dir)
 
     # Zip validation results and save to disk
     shutil.make_archive(base_name=output_dir, format='zip', root_dir=output_dir)
@@ -1,6 +1,11 @@
 #!/bin/bash
 
-echo "Sleeping for 10s" && sleep 10
+# Wait for MySQL service to start - not required if using SQLite
+if [ "$DATABASE_BACKEND" != "sqlite" ]
+then
+    echo "Sleeping for 10s" && sleep 10
+fi
+
 echo "Starting run"
 
 # Initialise database tables
@@ -25,7 +30,7 @@ status=$?
 
 /usr/bin/python3.9 /app/scripts/save_junitxml_to_db.py
 
-# Construct reports - instance may need > 40GB of RAM if constructing monthly report
+# Construct reports - results are streamed from the database
 /usr/bin/python3.9 /app/scripts/create_reports.py
 
 echo "Finished run"
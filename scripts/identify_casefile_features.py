@@ -9,8 +9,9 @@ import itertools
 import pandas as pd
 
 import context
-from nemde.io.casefile import load_base_case
+from nemde.io.casefile import load_base_cases
 from nemde.core.casefile import lookup
+from nemde.core.casefile.index import IndexedCasefile
 from setup_variables import setup_environment_variables
 
 
@@ -104,15 +105,16 @@ def identify_fast_start_unit_startup_casefiles(year, month):
 
     days_in_month = calendar.monthrange(year, month)[-1]
 
-    out = []
-    for index, (day, interval) in enumerate(itertools.product(range(1, days_in_month + 1), range(1, 289))):
-        case_id = f'{year}{month:02}{day:02}{interval:03}'
+    # Casefiles for the month are fetched using a single query
+    casefiles = load_base_cases(start=f'{year}{month:02}01001', end=f'{year}{month:02}{days_in_month:02}288')
 
+    out = []
+    for index, (case_id, casefile) in enumerate(casefiles):
         if index % 50 == 0:
             print(index, case_id)
 
-        # Load casefile and extract intervention status
-        casefile = load_base_case(case_id=case_id)
+        # Traders are looked up individually - index collections once per casefile
+        casefile = IndexedCasefile(casefile)
 
         entry = {
             'case_id': case_id,
@@ -143,12 +145,12 @@ def identify_fast_start_unit_startup_casefiles(year, month):
 def identify_casefiles(year, month, function):
     """Check intervention status"""
 
-    for index, (day, interval) in enumerate(itertools.product(range(1, 31), range(1, 289))):
-        case_id = f'{year}{month:02}{day:02}{interval:03}'
+    case_ids = [f'{year}{month:02}{day:02}{interval:03}'
+                for day, interval in itertools.product(range(1, 31), range(1, 289))]
 
-        # Load casefile and extract intervention status
-        casefile = load_base_case(case_id=case_id)
-        function(casefile)
+    # Load casefiles and extract intervention status
+    for _, casefile in load_base_cases(case_ids=case_ids):
+        function(IndexedCasefile(casefile))
 
 
 if __name__ == '__main__':
@@ -1,13 +1,13 @@
-"""Initialise MySQL database tables"""
+"""Initialise MySQL database tables and apply pending migrations. Safe to re-run on existing databases."""
 
 import os
 
 import context
-from nemde.io.database import mysql
+from nemde.io.database import backend
 from setup_variables import setup_environment_variables
 
 
 if __name__ == '__main__':
     setup_environment_variables()
 
-    mysql.initialise_tables(schema=os.environ['MYSQL_SCHEMA'])
+    backend.initialise_tables(schema=os.environ['MYSQL_SCHEMA'])
@@ -4,6 +4,7 @@ import time
 
 import context
 from nemde.io.casefile import load_base_case
+from nemde.io.prefetch import CasefilePrefetcher
 from nemde.core.model.execution import run_model
 from setup_variables import setup_environment_variables
 
@@ -60,6 +61,19 @@ def run_case(data):
     return solution
 
 
+def run_cases(case_ids, depth=2):
+    """Run cases sequentially - upcoming casefiles are loaded while the current case is solved"""
+
+    solutions = {}
+    with CasefilePrefetcher(case_ids=case_ids, depth=depth) as casefiles:
+        for case_id, casefile in casefiles:
+            start = time.time()
+            solutions[case_id] = run_model(get_case_inputs(case_id=case_id), base_case=casefile)
+            print('Finished', case_id, time.time() - start)
+
+    return solutions
+
+
 if __name__ == '__main__':
     setup_environment_variables('offline-host.env')
 
@@ -1,10 +1,10 @@
 """Save pytest report to database"""
 
 import os
-import zlib
 
 import context
-from nemde.io.database import mysql
+from nemde.io import codec
+from nemde.io.database import backend
 from setup_variables import setup_environment_variables
 
 
@@ -14,7 +14,7 @@ def save_to_db():
     schema = os.environ['MYSQL_SCHEMA']
 
     # Get latest run ID
-    run_id = mysql.get_most_recent_test_run_id(schema=schema, table='results')
+    run_id = backend.get_most_recent_test_run_id(schema=schema, table='results')
 
     # Open pytest report
     report_path = os.path.join(os.path.dirname(__file__), os.path.pardir, 'reports', 'latest.xml')
@@ -25,10 +25,10 @@ def save_to_db():
     # Construct database entry and save to database
     entry = {
         'run_id': run_id,
-        'report': zlib.compress(report.encode('utf-8')),
+        'report': codec.compress(report.encode('utf-8')),
     }
 
-    mysql.post_entry(schema=schema, table='reports', entry=entry)
+    backend.post_entry(schema=schema, table='reports', entry=entry)
 
     return entry
 
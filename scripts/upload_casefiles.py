@@ -2,88 +2,154 @@
 
 
 import os
-import zlib
 import time
-import calendar
-
-import MySQLdb
+import itertools
+import collections
+import concurrent.futures
 
 import context
 import nemde
-from nemde.io.casefile import load_xml_from_archive
-from nemde.io.database.mysql import initialise_tables, post_entry, run_query
+from nemde.io import codec
+from nemde.io.casefile import CasefileArchive
+from nemde.io.database import manifest
+from nemde.io.database.utils import get_batches
+from nemde.io.database.backend import initialise_tables, post_entries, load_entries
 from setup_variables import setup_environment_variables
 
 
-def get_month_dispatch_intervals(year, month):
-    """Get all dispatch interval IDs for a given month"""
+def compress_day_casefiles(data_dir, year, month, day, case_ids):
+    """
+    Extract and compress casefiles for a given day. Run in worker processes.
+
+    Parameters
+    ----------
+    data_dir : str
+        Path to directory containing zipped NEMDE casefile archives
+
+    year : int
+        Dispatch interval year
+
+    month : int
+        Dispatch interval month
+
+    day : int
+        Dispatch interval day
+
+    case_ids : set
+        Case IDs to extract
+
+    Returns
+    -------
+    List of entries to upload
+    """
 
-    days = range(1, calendar.monthrange(year, month)[1] + 1)
-    intervals = range(1, 289)
+    entries = []
+    with CasefileArchive(data_dir=data_dir, cache_size=1) as archive:
+        for case_id, casefile in archive.iter_day(year=year, month=month, day=day):
+            if case_id in case_ids:
+                entries.append({'case_id': case_id, 'casefile': codec.compress(casefile),
+                                'upload_timestamp': time.time()})
 
-    return [f'{year}{month:02}{d:02}{i:03}' for d in days for i in intervals]
+    return entries
 
 
-def get_uploaded_casefile_ids(schema):
-    """Get all uploaded casefile IDs"""
+def get_day_entries(data_dir, intervals, n_workers):
+    """
+    Extract and compress casefiles in parallel with one task per day. The
+    number of days being processed is bounded so completed days do not
+    accumulate in memory if the database writer falls behind.
 
-    sql = f"SELECT case_id FROM {schema}.casefiles"
-    results = run_query(sql=sql)
-    uploaded = [i['case_id'] for i in results]
+    Parameters
+    ----------
+    data_dir : str
+        Path to directory containing zipped NEMDE casefile archives
 
-    return uploaded
+    intervals : list
+        Case IDs to upload
 
+    n_workers : int
+        Number of worker processes
 
-def get_intervals_to_upload(schema, year, month):
-    """Get case IDs to upload"""
+    Returns
+    -------
+    Generator yielding entries to upload
+    """
 
-    intervals = get_month_dispatch_intervals(year=year, month=month)
-    uploaded = get_uploaded_casefile_ids(schema=schema)
+    # Case IDs to upload grouped by day
+    days = collections.defaultdict(set)
+    for case_id in intervals:
+        days[(int(case_id[:4]), int(case_id[4:6]), int(case_id[6:8]))].add(case_id)
 
-    to_upload = list(set(intervals) - set(uploaded))
-    to_upload.sort()
+    tasks = iter(sorted(days.items()))
 
-    return to_upload
+    with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+        pending = set()
 
+        while True:
+            # Keep workers busy with a bounded number of days in flight
+            for (year, month, day), case_ids in itertools.islice(tasks, 2 * n_workers - len(pending)):
+                pending.add(executor.submit(compress_day_casefiles, data_dir, year, month, day, case_ids))
 
-def upload_casefile(data_dir, schema, year, month, day, interval):
-    """Upload a single casefile"""
+            if not pending:
+                return
 
-    # Load casefile and construct case ID
-    casefile = load_xml_from_archive(data_dir=data_dir, year=year, month=month,
-                                     day=day, interval=interval)
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
 
-    # Construct entry to be uploaded
-    entry = {
-        'case_id': f'{year}{month:02}{day:02}{interval:03}',
-        'casefile': zlib.compress(casefile),
-        'upload_timestamp': time.time(),
-    }
 
-    post_entry(schema=schema, table='casefiles', entry=entry)
+def upload_casefiles(schema, data_dir, year, month, batch_size=100, use_infile=False, n_workers=None):
+    """
+    Upload casefiles for a given month to the database. Casefiles are
+    extracted and compressed in worker processes, while the main process
+    writes batches to the database.
 
+    Parameters
+    ----------
+    schema : str
+        Name of database
 
-def upload_casefiles(schema, data_dir, year, month):
-    """Upload casefiles for a given month to the database"""
+    data_dir : str
+        Path to directory containing zipped NEMDE casefile archives
+
+    year : int
+        Year of casefiles to upload
+
+    month : int
+        Month of casefiles to upload
+
+    batch_size : int
+        Number of casefiles inserted per transaction
+
+    use_infile : bool
+        Upload using LOAD DATA LOCAL INFILE (requires local_infile to be
+        enabled on the MySQL server)
+
+    n_workers : int or None
+        Number of worker processes used to extract and compress casefiles.
+        Uses the number of CPUs if None.
+    """
 
     # Initialise database tables
     initialise_tables(schema=schema)
 
-    # All dispatch intervals for a given month
-    intervals = get_intervals_to_upload(schema=schema, year=year, month=month)
+    # Dispatch intervals for the month that have not been uploaded
+    bitmap = manifest.load_manifest(schema=schema, year=year, month=month)
+    intervals = manifest.get_missing_case_ids(bitmap=bitmap, year=year, month=month)
+
+    if not intervals:
+        return
 
-    for i in intervals:
+    # Entries to be uploaded
+    entries = get_day_entries(data_dir=data_dir, intervals=intervals, n_workers=n_workers or os.cpu_count())
+    post = load_entries if use_infile else post_entries
 
-        # Extract year, month, day, and interval from casefile ID
-        year, month, day, interval_id = int(i[:4]), int(i[4:6]), int(i[6:8]), int(i[8:])
+    # Casefiles already in the table are skipped. Manifest is updated after each batch so uploads can be resumed.
+    for batch in get_batches(entries, batch_size=batch_size):
+        post(schema=schema, table='casefiles', entries=batch, batch_size=batch_size, ignore=True)
 
-        # Upload file if it's not already in table
-        try:
-            upload_casefile(data_dir=data_dir, schema=schema, year=year,
-                            month=month, day=day, interval=interval_id)
-            print('Uploaded', i)
-        except MySQLdb.IntegrityError:
-            print('Skipping', i)
+        manifest.set_uploaded(bitmap=bitmap, case_ids=[i['case_id'] for i in batch])
+        manifest.save_manifest(schema=schema, year=year, month=month, bitmap=bitmap)
 
 
 if __name__ == '__main__':